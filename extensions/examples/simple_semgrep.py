@@ -14,8 +14,10 @@ import asyncio
 class SemgrepJob(Job):
     """Job that runs a semgrep scan on a specified path"""
 
+    job_type = "semgrep"
+
     def __init__(self, path: str):
-        super().__init__(job_type="semgrep")
+        super().__init__()
         self.path = path
         self.logger = Logger("SemgrepJob")
 
@@ -23,6 +25,10 @@ class SemgrepJob(Job):
         module_dir = pathlib.Path(__file__).parent
         self.rules_path = os.path.join(module_dir, "semgrep-rules")
 
+    def get_params(self) -> dict:
+        """Get the path to scan, which identifies the job for deduplication and workers"""
+        return {"path": self.path}
+
     async def start(self) -> None:
         """Start the semgrep scan"""
         try:
@@ -27,7 +27,8 @@ Examples:
 /scheduler status weekly_embeddings
 
 Scheduled actions are configured in config.yml under the scheduled_actions section.
-Each action has a name, command to execute, interval in minutes, and enabled status.""",
+Each action has a name, command to execute, an interval in minutes or a cron expression,
+optional jitter in minutes, and enabled status. Run times survive restarts.""",
         agent_hint="Use this command to manage actions that run automatically at configured intervals",
         arguments=[
             ActionArgument(
@@ -67,14 +68,18 @@ Each action has a name, command to execute, interval in minutes, and enabled sta
                 lines = ["📅 Scheduled Actions:"]
                 for name, status in actions.items():
                     enabled = "✅" if status["enabled"] else "❌"
-                    interval = f"{status['interval_minutes']} minutes"
                     last_run = status["last_run"] or "Never"
                     lines.append(f"\n{enabled} {name}")
                     lines.append(f"   • Command: {status['command']}")
-                    lines.append(f"   • Interval: {interval}")
+                    if status.get("cron"):
+                        lines.append(f"   • Cron: {status['cron']}")
+                    else:
+                        lines.append(f"   • Interval: {status['interval_minutes']} minutes")
                     lines.append(f"   • Last run: {last_run}")
                     if status["next_run"]:
                         lines.append(f"   • Next run: {status['next_run']}")
+                if not getattr(scheduler, "is_leader", True):
+                    lines.append("\nℹ️ This instance is on standby, another replica runs the scheduled actions")
                 return ActionResult.text("\n".join(lines))
 
             if len(args) < 2:
@@ -100,7 +105,12 @@ Each action has a name, command to execute, interval in minutes, and enabled sta
                 lines = [f"📊 Status for {action_name}:"]
                 lines.append(f"• Command: {status['command']}")
                 lines.append(f"• Enabled: {'Yes' if status['enabled'] else 'No'}")
-                lines.append(f"• Interval: {status['interval_minutes']} minutes")
+                if status.get("cron"):
+                    lines.append(f"• Cron: {status['cron']}")
+                else:
+                    lines.append(f"• Interval: {status['interval_minutes']} minutes")
+                if status.get("jitter_minutes"):
+                    lines.append(f"• Jitter: up to {status['jitter_minutes']} minutes")
                 lines.append(f"• Last run: {status['last_run'] or 'Never'}")
                 if status["next_run"]:
                     lines.append(f"• Next run: {status['next_run']}")
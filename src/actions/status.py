@@ -8,6 +8,8 @@ from src.jobs.base import JobStatus
 from src.config.config import Config
 from src.models.base import Project, Asset
 from src.backend.database import DBSessionMixin
+from src.util.http import HttpClient
+from src.util.rate_limit import RateLimiter
 import os
 
 
@@ -19,6 +21,7 @@ class StatusAction(BaseAction):
         description="Show system status",
         help_text="""Show the current status of the system, including:
 - Job statistics
+- Resource usage per job type
 - Installed extensions
 - Scheduled actions
 - Webhook server status""",
@@ -30,6 +33,25 @@ class StatusAction(BaseAction):
         self.logger = Logger("StatusAction")
         self.config = Config()
 
+    def _format_rate_limits(self) -> list:
+        """Format calls and limit utilization per block explorer key"""
+        lines = ["\n⏱️ Explorer Rate Limits:"]
+        try:
+            stats = RateLimiter().get_stats()
+            if self.config.get("jobs.distributed", False):
+                lines.append("• Calls of worker processes are not included")
+            if not stats:
+                lines.append("• No calls since start")
+            for name, bucket in stats.items():
+                lines.append(
+                    f"• {name}: {bucket['requests']} calls at {bucket['rate']:g}/s, "
+                    f"{bucket['utilization']:.0%} utilized, {bucket['wait_seconds']:.1f}s queued, "
+                    f"{bucket['throttled']} throttled"
+                )
+        except Exception as e:
+            lines.append(f"• Error getting rate limits: {str(e)}")
+        return lines
+
     async def execute(self, *args) -> ActionResult:
         """Execute the status action"""
         try:
@@ -52,6 +74,43 @@ class StatusAction(BaseAction):
             except Exception as e:
                 lines.append(f"• Error getting job statistics: {str(e)}")
 
+            # Add resource usage section
+            lines.append("\n⚙️ Resource Usage (24h):")
+            try:
+                job_manager = await JobManager.get_instance()
+                summary = job_manager.get_resource_summary()
+                if summary:
+                    # Most expensive job types first
+                    for job_type, usage in sorted(summary.items(), key=lambda item: item[1]["wall_time"], reverse=True):
+                        lines.append(f"• {job_type} ({usage['runs']} runs)")
+                        lines.append(f"   • Time: {usage['wall_time']:.1f}s wall, {usage['cpu_time']:.1f}s CPU")
+                        lines.append(f"   • Peak RSS: +{usage['peak_rss_delta_kb'] / 1024:.1f} MB")
+                        lines.append(f"   • DB: {usage['db_queries']} queries in {usage['db_time']:.1f}s")
+                        lines.append(f"   • HTTP: {usage['http_requests']} requests, {usage['http_bytes'] / 1048576:.1f} MB")
+                        lines.append(f"   • LLM: {usage['llm_tokens']} tokens")
+                else:
+                    lines.append("• No finished jobs")
+            except Exception as e:
+                lines.append(f"• Error getting resource usage: {str(e)}")
+
+            # Add outbound HTTP section
+            lines.append("\n🔌 Outbound HTTP:")
+            try:
+                metrics = HttpClient().get_metrics()
+                if metrics:
+                    for host, host_metrics in metrics.items():
+                        lines.append(
+                            f"• {host}: {host_metrics['requests']} requests, {host_metrics['errors']} errors, "
+                            f"{host_metrics['retries']} retries, {host_metrics['avg_time']:.2f}s avg"
+                        )
+                else:
+                    lines.append("• No requests since start")
+            except Exception as e:
+                lines.append(f"• Error getting HTTP metrics: {str(e)}")
+
+            # Add block explorer rate limit section
+            lines.extend(self._format_rate_limits())
+
             # Add database statistics section
             lines.append("\n📚 Database Statistics:")
             try:
@@ -94,11 +153,13 @@ class StatusAction(BaseAction):
                 if actions:
                     for name, status in actions.items():
                         enabled = "✅" if status["enabled"] else "❌"
-                        interval = f"{status['interval_minutes']} minutes"
                         last_run = status["last_run"] or "Never"
                         lines.append(f"{enabled} {name}")
                         lines.append(f"   • Command: {status['command']}")
-                        lines.append(f"   • Interval: {interval}")
+                        if status.get("cron"):
+                            lines.append(f"   • Cron: {status['cron']}")
+                        else:
+                            lines.append(f"   • Interval: {status['interval_minutes']} minutes")
                         lines.append(f"   • Last run: {last_run}")
                         if status["next_run"]:
                             lines.append(f"   • Next run: {status['next_run']}")
@@ -3,6 +3,7 @@
 from typing import List, Dict
 from openai import AsyncOpenAI
 from src.config.config import Config
+from src.util.resource_usage import record_llm_usage
 
 
 async def chat_completion(messages: List[Dict[str, str]], model: str = None, temperature: float = 0.1) -> str:
@@ -25,5 +26,6 @@ async def chat_completion(messages: List[Dict[str, str]], model: str = None, tem
     model = model or config.get("llm.openai.model", "gpt-4")
 
     response = await client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    record_llm_usage(response)
 
     return response.choices[0].message.content
@@ -0,0 +1,74 @@
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from src.backend.blob_store import BlobStore
+from src.config.config import Config
+from src.util.logging import Logger
+
+
+@dataclass
+class FileChange:
+    """A file that differs between two versions of an asset"""
+
+    path: str  # Relative to the asset directory, or the base name of a single-file asset
+    status: str  # "added", "modified" or "removed"
+    old_digest: Optional[str] = None
+    new_digest: Optional[str] = None
+
+
+def diff_manifests(old: Dict[str, str], new: Dict[str, str]) -> List[FileChange]:
+    """Compare two blob store manifests, without reading any file
+
+    Returns:
+        The added, modified and removed files, sorted by path
+    """
+    changes = []
+    for path in sorted(old.keys() | new.keys()):
+        old_digest, new_digest = old.get(path), new.get(path)
+        if old_digest == new_digest:
+            continue
+        status = "added" if old_digest is None else "removed" if new_digest is None else "modified"
+        changes.append(FileChange(path, status, old_digest, new_digest))
+    return changes
+
+
+class AssetSnapshot:
+    """Previous version of an updated asset, kept on disk under data_dir/snapshots/<asset_id>
+
+    Only the old versions of modified and removed files are kept, as links to their blobs, so
+    diffs can be computed per file after the asset was replaced. A snapshot lives until the
+    next update or the removal of its asset.
+    """
+
+    def __init__(self, asset_id: int, blob_store: Optional[BlobStore] = None, root: Optional[str] = None):
+        self.logger = Logger("AssetSnapshot")
+        self.blob_store = blob_store or BlobStore()
+        self.path = os.path.join(root or os.path.join(Config().data_dir, "snapshots"), str(asset_id))
+
+    def keep(self, changes: List[FileChange]) -> str:
+        """Replace the snapshot with the old versions of the changed files
+
+        Must run before the blob store is garbage collected, while the old blobs still exist.
+
+        Returns:
+            The snapshot directory
+        """
+        self.remove()
+        os.makedirs(self.path, exist_ok=True)
+        for change in changes:
+            if change.old_digest is None:
+                continue
+            try:
+                self.blob_store.link(change.old_digest, self.file_path(change.path))
+            except FileNotFoundError:
+                self.logger.warning(f"Old version of {change.path} is not stored, no diff available")
+        return self.path
+
+    def file_path(self, path: str) -> str:
+        """Get the snapshot path of a file of the asset"""
+        return os.path.join(self.path, path)
+
+    def remove(self) -> None:
+        """Delete the snapshot"""
+        shutil.rmtree(self.path, ignore_errors=True)
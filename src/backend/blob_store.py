@@ -0,0 +1,211 @@
+import errno
+import hashlib
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config.config import Config
+from src.util.logging import Logger
+
+# Read size when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """Content-addressed store for asset files
+
+    Every distinct file content is kept once, under data_dir/blobs/<first two hex digits>/<sha256>.
+    Asset trees under data_dir/<project_id>/ stay ordinary directories, but their files are
+    hardlinks to the blobs, so the same library file or verified contract in many projects takes
+    disk space once and all existing readers keep working on plain paths.
+
+    Files in asset trees may be shared: replace them, never write into them in place.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.logger = Logger("BlobStore")
+        self.root = root or os.path.join(Config().data_dir, "blobs")
+        self.deduplicated_bytes = 0  # Bytes saved by linking to existing blobs since creation
+        self._inodes: Optional[Dict[Tuple[int, int], str]] = None
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """Get the sha256 hex digest of a file's contents"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def blob_path(self, digest: str) -> str:
+        """Get the path of a blob"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def add_file(self, path: str) -> str:
+        """Store a file and replace it with a hardlink to its blob
+
+        Returns:
+            The digest of the file
+        """
+        digest = self.hash_file(path)
+        blob = self.blob_path(digest)
+        stat = os.stat(path)
+
+        if os.path.exists(blob):
+            blob_stat = os.stat(blob)
+            if (blob_stat.st_dev, blob_stat.st_ino) == (stat.st_dev, stat.st_ino):
+                return digest
+            try:
+                # Link to a temporary name first so the file is never missing
+                tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+                os.link(blob, tmp)
+                os.replace(tmp, path)
+                self.deduplicated_bytes += stat.st_size
+                self._remember(blob, digest)
+                return digest
+            except FileNotFoundError:
+                pass  # Garbage collected in the meantime, store this copy instead
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                return digest  # Asset tree on another filesystem, keep the copy
+
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = f"{blob}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(path, tmp)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            return digest
+        os.replace(tmp, blob)
+        self._remember(blob, digest)
+        return digest
+
+    def add_tree(self, path: str, paths: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Store all files of an asset file or directory
+
+        Git metadata directories are skipped, only checked out files are stored.
+
+        Args:
+            path: Asset file or directory
+            paths: Only store these files, relative to path, e.g. the files changed by a repository sync
+
+        Returns:
+            Manifest of relative path to digest; a single file is listed under its base name
+        """
+        if os.path.isfile(path):
+            return {os.path.basename(path): self.add_file(path)}
+
+        manifest = {}
+        for relative_path in self._list_files(path) if paths is None else paths:
+            file_path = os.path.join(path, relative_path)
+            if os.path.islink(file_path) or not os.path.isfile(file_path):
+                continue
+            manifest[relative_path] = self.add_file(file_path)
+        return manifest
+
+    def manifest(self, path: str) -> Dict[str, str]:
+        """Get the manifest of an asset file or directory without reading files that are already stored
+
+        Files that are not stored yet, e.g. written before deduplication was enabled, are added.
+        """
+        if os.path.isfile(path):
+            return {os.path.basename(path): self.digest_of(path) or self.add_file(path)}
+
+        manifest = {}
+        for relative_path in self._list_files(path):
+            file_path = os.path.join(path, relative_path)
+            if os.path.islink(file_path) or not os.path.isfile(file_path):
+                continue
+            manifest[relative_path] = self.digest_of(file_path) or self.add_file(file_path)
+        return manifest
+
+    @staticmethod
+    def _list_files(path: str) -> List[str]:
+        """List the files of a directory relative to it, skipping git metadata"""
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs[:] = [name for name in dirs if name != ".git"]
+            files.extend(os.path.relpath(os.path.join(root, name), path) for name in names)
+        return files
+
+    def link(self, digest: str, target: str) -> None:
+        """Materialize a blob at a path, e.g. to restore an asset tree from a manifest"""
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(self.blob_path(digest), tmp)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copyfile(self.blob_path(digest), tmp)
+        os.replace(tmp, target)
+
+    def _remember(self, blob: str, digest: str) -> None:
+        if self._inodes is not None:
+            stat = os.stat(blob)
+            self._inodes[(stat.st_dev, stat.st_ino)] = digest
+
+    def _load_inodes(self) -> Dict[Tuple[int, int], str]:
+        """Index blobs by inode, so files in asset trees can be mapped to their blob without reading them"""
+        inodes = {}
+        if os.path.isdir(self.root):
+            for prefix in os.scandir(self.root):
+                if not prefix.is_dir():
+                    continue
+                for entry in os.scandir(prefix.path):
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    stat = entry.stat()
+                    inodes[(stat.st_dev, stat.st_ino)] = entry.name
+        return inodes
+
+    def digest_of(self, path: str) -> Optional[str]:
+        """Get the digest of a file in an asset tree, or None if it is not stored
+
+        Scanners can use this to process each distinct content once, however many assets contain it.
+        """
+        if self._inodes is None:
+            self._inodes = self._load_inodes()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return self._inodes.get((stat.st_dev, stat.st_ino))
+
+    def gc(self) -> int:
+        """Remove blobs no asset tree links to anymore
+
+        Returns:
+            Number of removed blobs
+        """
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                stat = entry.stat()
+                # Only the store itself links to it
+                if stat.st_nlink == 1 and not entry.name.endswith(".tmp"):
+                    os.remove(entry.path)
+                    removed += 1
+                    if self._inodes is not None:
+                        self._inodes.pop((stat.st_dev, stat.st_ino), None)
+        if removed:
+            self.logger.info(f"Removed {removed} unused blobs")
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number and total size of stored blobs"""
+        blobs = size = 0
+        if os.path.isdir(self.root):
+            for prefix in os.scandir(self.root):
+                if not prefix.is_dir():
+                    continue
+                for entry in os.scandir(prefix.path):
+                    blobs += 1
+                    size += entry.stat().st_size
+        return {"blobs": blobs, "bytes": size}
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config.config import Config
+from src.util.resource_usage import instrument_engine
 import os
 from urllib.parse import urlparse, parse_qs
 
@@ -83,6 +84,10 @@ class Database:
             self._async_engine = create_async_engine(async_url, future=True, connect_args=connect_args_async)
             self._AsyncSessionLocal = sessionmaker(bind=self._async_engine, class_=AsyncSession, expire_on_commit=False)
 
+            # Attribute queries to the job that runs them
+            instrument_engine(self._engine)
+            instrument_engine(self._async_engine.sync_engine)
+
     @contextmanager
     def session(self):
         """Provide a transactional scope around a series of operations."""
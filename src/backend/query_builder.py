@@ -2,6 +2,7 @@ from typing import Any, Dict, Union, Type
 from sqlalchemy import select, and_, text
 from sqlalchemy.sql import Select
 from src.models.base import Asset, Project, Base
+from src.models.proxy import ProxyUpgrade
 from src.util.logging import Logger
 import json
 
@@ -11,9 +12,9 @@ class QueryBuilder:
 
     Query Specification Format:
     {
-        "from": "assets" | "projects",  # Required: Base table
+        "from": "assets" | "projects" | "proxy_upgrades",  # Required: Base table
         "join": {  # Optional: Join specification
-            "table": "assets" | "projects",
+            "table": "assets" | "projects" | "proxy_upgrades",
             "on": {  # Join conditions as field mappings
                 "left_field": "right_field"  # e.g. "project_id": "id"
             }
@@ -40,7 +41,7 @@ class QueryBuilder:
     """
 
     # Define allowed tables and their models
-    ALLOWED_TABLES = {"projects": Project, "assets": Asset}
+    ALLOWED_TABLES = {"projects": Project, "assets": Asset, "proxy_upgrades": ProxyUpgrade}
 
     # Define columns to exclude by default for each table
     EXCLUDED_COLUMNS = {
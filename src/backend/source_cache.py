@@ -0,0 +1,81 @@
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, List, Optional
+from src.backend.blob_store import BlobStore
+from src.config.config import Config
+from src.util.logging import Logger
+
+
+class SourceCache:
+    """Verified contract sources by chain and address, kept under data_dir/sources/<chain>/<address>
+
+    Verified sources of an address do not change, so they are downloaded once and every later
+    request, from any project, is served from disk. Entries hold hardlinks to blob store blobs,
+    which keeps the blobs alive through garbage collection, and are materialized into asset
+    directories as hardlinks as well.
+    """
+
+    def __init__(self, blob_store: Optional[BlobStore] = None, root: Optional[str] = None):
+        self.logger = Logger("SourceCache")
+        self.blob_store = blob_store or BlobStore()
+        self.root = root or os.path.join(Config().data_dir, "sources")
+
+    def entry_path(self, chain: str, address: str) -> str:
+        """Get the directory of a cache entry"""
+        return os.path.join(self.root, chain, address.lower())
+
+    def get(self, chain: str, address: str) -> Optional[Dict[str, str]]:
+        """Get the manifest of the cached sources of an address, or None if they are not cached"""
+        entry = self.entry_path(chain, address)
+        if not os.path.isdir(entry):
+            return None
+        return self.blob_store.manifest(entry)
+
+    def materialize(self, chain: str, address: str, target_path: str) -> List[str]:
+        """Link the cached sources of an address into a directory
+
+        Files of an earlier version at the same paths are replaced, other files are left alone.
+
+        Returns:
+            The paths of the linked files relative to target_path, empty if the address is not cached
+        """
+        manifest = self.get(chain, address)
+        if not manifest:
+            return []
+        for relative_path, digest in manifest.items():
+            self.blob_store.link(digest, os.path.join(target_path, relative_path))
+        return sorted(manifest)
+
+    def store(self, chain: str, address: str, source_path: str, paths: Iterable[str]) -> Dict[str, str]:
+        """Cache the sources of an address that were written to a directory
+
+        The files are added to the blob store, so source_path ends up linked to the blobs too.
+
+        Args:
+            chain: Explorer of the chain, e.g. "etherscan"
+            address: Contract address
+            source_path: Directory the sources were written to
+            paths: The source files, relative to source_path
+
+        Returns:
+            Manifest of relative path to digest
+        """
+        manifest = self.blob_store.add_tree(source_path, paths)
+        entry = self.entry_path(chain, address)
+        # Build the entry next to its final place and swap it in, so readers never see a partial entry
+        tmp = f"{entry}.{uuid.uuid4().hex}.tmp"
+        try:
+            for relative_path, digest in manifest.items():
+                self.blob_store.link(digest, os.path.join(tmp, relative_path))
+            os.makedirs(tmp, exist_ok=True)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return manifest
+
+    def remove(self, chain: str, address: str) -> None:
+        """Drop the cached sources of an address"""
+        shutil.rmtree(self.entry_path(chain, address), ignore_errors=True)
@@ -110,6 +110,23 @@ async def server_start(ctx, interface):
         raise
 
 
+@cli.command(name="worker")
+@click.option("--concurrency", "-c", type=int, default=None, help="Maximum number of jobs to run at once")
+@click.pass_context
+@async_command
+async def worker(ctx, concurrency):
+    """Run a worker that executes queued jobs (requires jobs.distributed)"""
+    logger = ctx.obj["logger"]
+
+    try:
+        LogConfig.set_log_level(ctx.obj["log_level"])
+        await Server.run_worker(concurrency=concurrency)
+
+    except Exception as e:
+        logger.error(f"Failed to start worker: {e}")
+        raise
+
+
 @cli.group()
 def project():
     """Project management commands"""
@@ -284,6 +284,7 @@ ENV_MAPPINGS = {
     "github.api_token": "LEGION_GITHUB_TOKEN",
     "embeddings.model": "LEGION_EMBEDDINGS_MODEL",
     "embeddings.dimension": {"env": "LEGION_EMBEDDINGS_DIMENSION", "type": "int"},
+    "jobs.distributed": {"env": "LEGION_JOBS_DISTRIBUTED", "type": "bool"},
 }
 
 # Default configuration
@@ -21,6 +21,16 @@ ENV_MAPPINGS = {
     "github.poll_interval": "LEGION_GITHUB_POLL_INTERVAL",
     "webhook_server.enabled": {"env": "LEGION_WEBHOOK_SERVER_ENABLED", "type": "bool"},
     "webhook_server.port": {"env": "LEGION_WEBHOOK_PORT", "type": "int"},
+    "jobs.distributed": {"env": "LEGION_JOBS_DISTRIBUTED", "type": "bool"},
+}
+
+# Settings of each block explorer: API key, calls per second, calls that may be sent at once and node of the chain
+EXPLORER_PROPERTIES = {
+    "key": {"type": ["string", "null"]},
+    "rate_limit": {"type": "number", "exclusiveMinimum": 0, "default": 5},
+    "burst": {"type": "integer", "minimum": 1, "default": 1},
+    # JSON-RPC endpoint of a node of the explorer's chain, used to detect EIP-1967 proxies
+    "rpc_url": {"type": ["string", "null"]},
 }
 
 CONFIG_SCHEMA = {
@@ -42,27 +52,27 @@ CONFIG_SCHEMA = {
             "properties": {
                 "etherscan": {
                     "type": "object",
-                    "properties": {"key": {"type": ["string", "null"]}},
+                    "properties": EXPLORER_PROPERTIES,
                     "additionalProperties": False,
                 },
                 "basescan": {
                     "type": "object",
-                    "properties": {"key": {"type": ["string", "null"]}},
+                    "properties": EXPLORER_PROPERTIES,
                     "additionalProperties": False,
                 },
                 "arbiscan": {
                     "type": "object",
-                    "properties": {"key": {"type": ["string", "null"]}},
+                    "properties": EXPLORER_PROPERTIES,
                     "additionalProperties": False,
                 },
                 "polygonscan": {
                     "type": "object",
-                    "properties": {"key": {"type": ["string", "null"]}},
+                    "properties": EXPLORER_PROPERTIES,
                     "additionalProperties": False,
                 },
                 "bscscan": {
                     "type": "object",
-                    "properties": {"key": {"type": ["string", "null"]}},
+                    "properties": EXPLORER_PROPERTIES,
                     "additionalProperties": False,
                 },
             },
@@ -86,7 +96,26 @@ CONFIG_SCHEMA = {
         },
         "github": {
             "type": "object",
-            "properties": {"api_token": {"type": "string"}, "poll_interval": {"type": "integer", "default": 300}},
+            "properties": {
+                "api_token": {"type": "string"},
+                "poll_interval": {"type": "integer", "default": 300},
+                # Repository archives larger than this are not downloaded
+                "max_archive_size": {"type": "integer", "minimum": 1, "default": 536870912},
+                # Larger files in repository archives are not extracted
+                "max_file_size": {"type": "integer", "minimum": 1, "default": 5242880},
+                # Extensions extracted from repository archives, defaults to file_search.allowed_extensions
+                "repo_extensions": {"type": "array", "items": {"type": "string"}},
+                # Keep repositories as shallow git checkouts, or download archives
+                "repo_sync": {"type": "string", "enum": ["git", "archive"], "default": "git"},
+                # Seconds a git command may take
+                "git_timeout": {"type": "integer", "minimum": 1, "default": 300},
+                # Repositories the monitor checks at once
+                "concurrency": {"type": "integer", "minimum": 1, "default": 4},
+                # Requests of each rate-limit window the monitor leaves for commands and other jobs
+                "rate_limit_reserve": {"type": "integer", "minimum": 0, "default": 10},
+                # Seconds the monitor waits for a request slot under the rate limit before deferring repositories
+                "max_rate_limit_wait": {"type": "number", "minimum": 0, "default": 60},
+            },
         },
         "webhook_server": {
             "type": "object",
@@ -108,13 +137,80 @@ CONFIG_SCHEMA = {
                     "properties": {
                         "command": {"type": "string"},
                         "interval_minutes": {"type": "integer", "minimum": 1},
+                        "cron": {"type": "string"},  # e.g. "0 3 * * *", alternative to interval_minutes
+                        "jitter_minutes": {"type": "integer", "minimum": 0, "default": 0},
+                        "catch_up": {"type": "boolean", "default": True},
                         "enabled": {"type": "boolean", "default": True},
                     },
-                    "required": ["command", "interval_minutes"],
+                    "required": ["command"],
+                    "anyOf": [{"required": ["interval_minutes"]}, {"required": ["cron"]}],
                 }
             },
             "default": {},
         },
+        "http": {
+            "type": "object",
+            "properties": {
+                "pool_size": {"type": "integer", "minimum": 1, "default": 100},
+                "pool_size_per_host": {"type": "integer", "minimum": 1, "default": 10},
+                "dns_cache_ttl": {"type": "integer", "minimum": 0, "default": 300},
+                "timeout": {"type": "integer", "minimum": 1, "default": 300},
+                "connect_timeout": {"type": "integer", "minimum": 1, "default": 10},
+                "read_timeout": {"type": "integer", "minimum": 1, "default": 60},
+                "max_retries": {"type": "integer", "minimum": 0, "default": 3},
+                "backoff": {"type": "number", "minimum": 0, "default": 0.5},
+            },
+            "default": {},
+        },
+        "indexer": {
+            "type": "object",
+            "properties": {
+                "download_concurrency": {"type": "integer", "minimum": 1, "default": 8},
+                "host_concurrency": {"type": "integer", "minimum": 1, "default": 4},
+                # Per-host overrides of host_concurrency, e.g. {"api.github.com": 2}
+                "host_limits": {"type": "object", "additionalProperties": {"type": "integer", "minimum": 1}},
+                "project_concurrency": {"type": "integer", "minimum": 1, "default": 4},
+                "notify_concurrency": {"type": "integer", "minimum": 1, "default": 4},
+                "queue_size": {"type": "integer", "minimum": 1, "default": 16},
+            },
+            "default": {},
+        },
+        "proxy_monitor": {
+            "type": "object",
+            "properties": {
+                # Contracts whose upgrade events are fetched at once, paced by the explorer rate limits
+                "concurrency": {"type": "integer", "minimum": 1, "default": 8},
+                # Contracts updated per database commit
+                "batch_size": {"type": "integer", "minimum": 1, "default": 100},
+                # Contracts whose EIP-1967 slots are read per JSON-RPC request
+                "rpc_batch_size": {"type": "integer", "minimum": 1, "default": 100},
+            },
+            "default": {},
+        },
+        "scheduler": {
+            "type": "object",
+            "properties": {
+                # Seconds after which another replica may take over scheduling from a dead leader
+                "lease_timeout": {"type": "integer", "minimum": 3, "default": 60},
+            },
+            "default": {},
+        },
+        "jobs": {
+            "type": "object",
+            "properties": {
+                "distributed": {"type": "boolean", "default": False},
+                "worker_concurrency": {"type": "integer", "minimum": 1, "default": 2},
+                # Worker processes sharing the block explorer keys, which split their rate limits
+                "workers": {"type": "integer", "minimum": 1, "default": 1},
+                "poll_interval": {"type": "integer", "minimum": 1, "default": 2},
+                "heartbeat_interval": {"type": "integer", "minimum": 1, "default": 15},
+                "heartbeat_timeout": {"type": "integer", "minimum": 1, "default": 90},
+                "max_attempts": {"type": "integer", "minimum": 1, "default": 3},
+                "dedup_ttl": {"type": "integer", "minimum": 0, "default": 0},
+                "cancel_timeout": {"type": "integer", "minimum": 1, "default": 10},
+            },
+            "default": {"distributed": False},
+        },
         "file_search": {
             "type": "object",
             "properties": {
@@ -126,6 +222,19 @@ CONFIG_SCHEMA = {
             },
             "default": {"allowed_extensions": [".sol", ".cairo", ".rs", ".vy", ".fe", ".move", ".yul"]},
         },
+        "diff": {
+            "type": "object",
+            "properties": {
+                # Layout of diffs sent with asset update notifications
+                "layout": {"type": "string", "enum": ["side_by_side", "unified"], "default": "side_by_side"},
+                "context": {"type": "integer", "minimum": 0, "default": 3},
+                # Seconds per file after which remaining changes are shown as replaced blocks
+                "timeout": {"type": "number", "minimum": 0, "default": 2},
+                # Bytes of HTML per diff document, later files and hunks are left out
+                "max_size": {"type": "integer", "minimum": 1, "default": 2097152},
+            },
+            "default": {},
+        },
     },
     "required": ["database", "data_dir"],
 }
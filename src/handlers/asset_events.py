@@ -1,12 +1,24 @@
-from typing import List, Union, Dict, Any, Optional
+from typing import IO, Iterable, List, Tuple, Union, Dict, Any, Optional
 from src.handlers.base import Handler, HandlerTrigger, HandlerResult
 from src.services.telegram import TelegramService
 from src.util.logging import Logger
 from src.models.base import Asset, AssetType
-import difflib
+from src.config.config import Config
+from src.util.diff import DEFAULT_CONTEXT, DEFAULT_TIMEOUT, render_html
+import asyncio
+import html as html_lib
 import io
+import itertools
+import tempfile
 from datetime import datetime
 
+# Changed files listed in repository update messages
+MAX_LISTED_FILES = 20
+
+# Changed files included in diff documents, and the size up to which a document is kept in memory
+MAX_DIFF_FILES = 50
+DIFF_SPOOL_SIZE = 1024 * 1024
+
 
 class AssetEventHandler(Handler):
     """Handler for asset-related events"""
@@ -14,6 +26,7 @@ class AssetEventHandler(Handler):
     def __init__(self):
         super().__init__()
         self.logger = Logger("AssetEventHandler")
+        self.config = Config()
         self.telegram = TelegramService.get_instance()
 
     @classmethod
@@ -38,6 +51,9 @@ class AssetEventHandler(Handler):
                     new_revision=self.context.get("new_revision"),
                     old_code=self.context.get("old_code"),
                     new_code=self.context.get("new_code"),
+                    changed_paths=self.context.get("changed_paths"),
+                    removed_paths=self.context.get("removed_paths"),
+                    changed_files=self.context.get("changed_files"),
                 )
             elif self.trigger == HandlerTrigger.ASSET_REMOVE:
                 result = await self._handle_asset_removal(self.context.get("asset"))
@@ -65,6 +81,9 @@ class AssetEventHandler(Handler):
         new_revision: Optional[str],
         old_code: Optional[str] = None,
         new_code: Optional[str] = None,
+        changed_paths: Optional[List[str]] = None,
+        removed_paths: Optional[List[str]] = None,
+        changed_files: Optional[List[Dict[str, Any]]] = None,
     ) -> dict:
         """Handle asset update"""
         project_name = self._get_asset_attr(asset, "project").name if hasattr(asset, "project") else "Unknown Project"
@@ -77,77 +96,140 @@ class AssetEventHandler(Handler):
         message_parts = ["📝 Asset Updated", f"🔗 Project: {project_name}", f"🔗 URL: {source_url}", f"📁 Type: {asset_type}"]
 
         # Show revision changes and diffs if revisions are different
+        diff_document = None
         if old_revision is not None and new_revision is not None and old_revision != new_revision:
             message_parts.append(f"📝 Revision: {old_revision} → {new_revision}")
+            old_title, new_title = f"Revision {old_revision}", f"Revision {new_revision}"
 
-            # Only create diff if we have both code versions
-            if old_code and new_code and asset_type in [AssetType.GITHUB_FILE, AssetType.DEPLOYED_CONTRACT]:
-                try:
-                    self.logger.debug("Creating diff...")
-                    # Create HTML diff
-                    diff_html = self._create_html_diff(
-                        old_code, new_code, f"Revision {old_revision}", f"Revision {new_revision}", project_name, source_url
-                    )
+            if asset_type == AssetType.GITHUB_REPO and changed_paths is not None:
+                message_parts.append(self._format_changed_files(changed_paths, removed_paths or []))
 
-                    # Create file-like object with the HTML content
-                    html_bytes = diff_html.encode("utf-8")
-                    html_io = io.BytesIO(html_bytes)
-                    html_io.name = f"diff_{project_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-
-                    self.logger.debug("Sending message first...")
-                    # Send the message first
-                    await self.telegram.send_message("\n".join(message_parts))
-
-                    self.logger.debug("Sending document...")
-                    # Then send the HTML file
-                    await self.telegram.send_document(html_io)
-                    return HandlerResult(
-                        success=True,
-                        data={
-                            "event": "asset_updated",
-                            "project": project_name,
-                            "source_url": source_url,
-                            "old_revision": old_revision,
-                            "new_revision": new_revision,
-                            "message": "Asset update processed with diff",
-                        },
+            try:
+                if old_code and new_code and asset_type in [AssetType.GITHUB_FILE, AssetType.DEPLOYED_CONTRACT]:
+                    self.logger.debug("Creating diff...")
+                    diff_html = self._create_html_diff(old_code, new_code, old_title, new_title, project_name, source_url)
+                    diff_document = io.BytesIO(diff_html.encode("utf-8"))
+                    diff_document.name = f"diff_{project_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+                elif changed_files:
+                    # Old versions are read from the snapshot and diffed one file at a time
+                    self.logger.debug(f"Creating diff of {len(changed_files)} changed files...")
+                    diff_document = await asyncio.to_thread(
+                        self._create_file_diffs, changed_files, old_title, new_title, project_name, source_url
                     )
-
-                except Exception as e:
-                    self.logger.error(f"Failed to generate diff: {e}")
-                    message_parts.append("\nFailed to generate diff")
-            elif asset_type == AssetType.GITHUB_REPO:
-                message_parts.append("\nℹ️ No diff available for repository updates")
-            else:
-                message_parts.append("\nℹ️ Code comparison not available")
-
-        # Only send message if we haven't already sent it with the diff
-        if not (old_code and new_code and asset_type in [AssetType.GITHUB_FILE, AssetType.DEPLOYED_CONTRACT]):
-            await self.telegram.send_message("\n".join(message_parts))
-
-        return HandlerResult(
-            success=True,
-            data={
-                "event": "asset_updated",
-                "project": project_name,
-                "source_url": source_url,
-                "old_revision": old_revision,
-                "new_revision": new_revision,
-            },
-        )
+                elif asset_type == AssetType.GITHUB_REPO:
+                    if changed_paths is None:
+                        message_parts.append("\nℹ️ No diff available for repository updates")
+                else:
+                    message_parts.append("\nℹ️ Code comparison not available")
+            except Exception as e:
+                self.logger.error(f"Failed to generate diff: {e}")
+                message_parts.append("\nFailed to generate diff")
+
+        self.logger.debug("Sending message first...")
+        await self.telegram.send_message("\n".join(message_parts))
+
+        data = {
+            "event": "asset_updated",
+            "project": project_name,
+            "source_url": source_url,
+            "old_revision": old_revision,
+            "new_revision": new_revision,
+        }
+        if diff_document is not None:
+            self.logger.debug("Sending document...")
+            filename = f"diff_{project_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+            try:
+                await self.telegram.send_document(diff_document, filename=filename)
+            finally:
+                diff_document.close()
+            data["message"] = "Asset update processed with diff"
+
+        return HandlerResult(success=True, data=data)
+
+    @staticmethod
+    def _format_changed_files(changed_paths: List[str], removed_paths: List[str]) -> str:
+        """List the files changed by a repository sync"""
+        lines = [f"\n📄 {len(changed_paths)} files changed, {len(removed_paths)} removed"]
+        entries = [f"  ~ {path}" for path in changed_paths] + [f"  - {path}" for path in removed_paths]
+        lines.extend(entries[:MAX_LISTED_FILES])
+        if len(entries) > MAX_LISTED_FILES:
+            lines.append(f"  ... and {len(entries) - MAX_LISTED_FILES} more")
+        return "\n".join(lines)
 
     def _create_html_diff(
         self, old_code: str, new_code: str, old_title: str, new_title: str, project_name: str, source_url: str
     ) -> str:
-        """Create an HTML diff view with syntax highlighting"""
-        old_lines = old_code.splitlines()
-        new_lines = new_code.splitlines()
+        """Create an HTML diff view of two versions of the code"""
+        document = io.BytesIO()
+        files = [(None, old_code.splitlines(), new_code.splitlines())]
+        self._write_diffs(document, files, old_title, new_title, project_name, source_url)
+        return document.getvalue().decode("utf-8")
+
+    def _create_file_diffs(
+        self, changed_files: List[Dict[str, Any]], old_title: str, new_title: str, project_name: str, source_url: str
+    ) -> IO[bytes]:
+        """Create an HTML diff view of the changed files of an asset
+
+        Each file is read and diffed on its own and appended to a temporary file, so only one
+        file is held in memory at a time, however large the asset.
+        """
 
-        diff = difflib.HtmlDiff()
-        html = diff.make_file(old_lines, new_lines, fromdesc=old_title, todesc=new_title, context=True)
+        def files():
+            for change in changed_files[:MAX_DIFF_FILES]:
+                title = f"{change['path']} ({change['status']})"
+                yield title, self._read_lines(change.get("old_file")), self._read_lines(change.get("new_file"))
 
-        # Enhance the HTML with better styling
-        enhanced_html = f"""
+        document = tempfile.SpooledTemporaryFile(max_size=DIFF_SPOOL_SIZE)
+        self._write_diffs(document, files(), old_title, new_title, project_name, source_url)
+        if len(changed_files) > MAX_DIFF_FILES:
+            self.logger.info(f"Diff limited to {MAX_DIFF_FILES} of {len(changed_files)} changed files")
+        document.seek(0)
+        return document
+
+    def _write_diffs(
+        self,
+        document: IO[bytes],
+        files: Iterable[Tuple[Optional[str], List[str], List[str]]],
+        old_title: str,
+        new_title: str,
+        project_name: str,
+        source_url: str,
+    ) -> None:
+        """Write the diff view of (title, old lines, new lines) per file, up to diff.max_size bytes"""
+        layout = self.config.get("diff.layout", "side_by_side")
+        context = self.config.get("diff.context", DEFAULT_CONTEXT)
+        timeout = self.config.get("diff.timeout", DEFAULT_TIMEOUT)
+        max_size = self.config.get("diff.max_size", 2 * 1024 * 1024)
+
+        size = document.write(self._html_header(project_name, source_url, old_title, new_title).encode("utf-8"))
+        truncated = False
+        for title, old_lines, new_lines in files:
+            chunks = render_html(old_lines, new_lines, layout=layout, context=context, timeout=timeout)
+            if title:
+                chunks = itertools.chain([f"<h3>{html_lib.escape(title)}</h3>\n"], chunks)
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                if size + len(data) > max_size:
+                    truncated = True
+                    break
+                size += document.write(data)
+            if truncated:
+                document.write(b'<p class="diff_note">Diff truncated, the remaining changes are not shown.</p>')
+                break
+        document.write(b"</div></body></html>")
+
+    @staticmethod
+    def _read_lines(path: Optional[str]) -> List[str]:
+        """Read the lines of one version of a changed file, none if it did not exist"""
+        if not path:
+            return []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+
+    @staticmethod
+    def _html_header(project_name: str, source_url: str, old_title: str, new_title: str) -> str:
+        """Get the document head with styles and the header of diff views"""
+        return f"""
         <!DOCTYPE html>
         <html>
         <head>
@@ -208,6 +290,17 @@ class AssetEventHandler(Handler):
                 .diff_sub {{
                     background-color: #ffe6e6;
                 }}
+                details {{
+                    margin-bottom: 10px;
+                }}
+                summary {{
+                    cursor: pointer;
+                    color: #555;
+                }}
+                .diff_fold, .diff_note {{
+                    color: #888;
+                    font-style: italic;
+                }}
             </style>
         </head>
         <body>
@@ -219,14 +312,6 @@ class AssetEventHandler(Handler):
             <div class="diff">
         """
 
-        # Insert our enhanced header and style
-        html = html.replace("<html>", enhanced_html)
-
-        # Close the diff div
-        html = html.replace("</body>", "</div></body>")
-
-        return html
-
     async def _handle_asset_removal(self, asset: Union[Asset, Dict[str, Any]]) -> dict:
         """Handle asset removal"""
         project_name = self._get_asset_attr(asset, "project").name if hasattr(asset, "project") else "Unknown Project"
@@ -1,19 +1,29 @@
-import aiohttp
 from src.models.base import Project, Asset, AssetType
+from src.models.indexer import IndexerState
 from src.config.config import Config
+from src.util.http import HttpClient
+from src.util.pipeline import Pipeline, Stage
 from src.util.etherscan import fetch_verified_sources
 import os
 import asyncio
-from src.util.github import fetch_github_file, fetch_github_repo
+from src.util.github import fetch_github_file, fetch_github_repo, sync_github_repo
+from src.util.git import git_available
 import shutil
 from src.util.logging import Logger
 from src.handlers.base import HandlerTrigger
 from src.handlers.registry import HandlerRegistry
 import threading
-from sqlalchemy.orm import Session
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import json
+from urllib.parse import urlparse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 from src.backend.asset_storage import AssetStorage
-from sqlalchemy import text
+from src.backend.blob_store import BlobStore
+from src.backend.asset_snapshot import AssetSnapshot, diff_manifests
+from sqlalchemy.exc import IntegrityError
 
 
 def _serialize_datetime(obj):
@@ -79,16 +89,92 @@ def _serialize_event_data(event_data):
     return result
 
 
+EXPLORER_DOMAINS = ["etherscan.io", "bscscan.com", "polygonscan.com"]
+
+# Maximum number of identifiers per IN clause when prefetching assets
+PREFETCH_CHUNK_SIZE = 500
+
+
+class AssetDownload:
+    """An asset that needs to be downloaded during indexing"""
+
+    def __init__(self, url: str, revision, asset_type: AssetType, target_dir: str, existing_asset: Optional[Asset] = None):
+        self.url = url
+        self.revision = revision
+        self.asset_type = asset_type
+        self.target_dir = target_dir
+        self.existing_asset = existing_asset  # None for new assets
+        self.old_revision = None
+        # Blob store manifests of the files before and after the download, compared to find changed files
+        self.old_manifest: Optional[Dict[str, str]] = None
+        self.new_manifest: Optional[Dict[str, str]] = None
+        # Files changed and removed by an incremental repository sync, relative to target_dir
+        self.changed_paths: Optional[List[str]] = None
+        self.removed_paths: Optional[List[str]] = None
+        self.commit: Optional[str] = None
+
+
+class ProjectWork:
+    """A listed project on its way through the indexing pipeline"""
+
+    def __init__(self, data: dict, source_hash: Optional[str] = None, changed: bool = True):
+        self.data = data
+        self.name = data.get("project", "unknown")
+        self.source_hash = source_hash  # Stored once the project and all its assets are indexed
+        self.changed = changed  # Unchanged projects only pass through to be checkpointed in order
+        self.project: Optional[Project] = None
+        self.project_id: Optional[int] = None
+        self.is_new = False
+        self.old_project: Optional[Project] = None
+        self.updates: Dict[str, Any] = {}  # Changed project fields, applied when persisting
+        self.downloads: List[AssetDownload] = []
+        self.results: List[bool] = []
+        self.events: List[Tuple[HandlerTrigger, dict]] = []
+        self.complete = True  # False if any asset failed
+        self.failed = False  # True if the project itself could not be indexed
+
+
 class ImmunefiIndexer:
     """Immunefi indexer implementation"""
 
-    def __init__(self, session: Session, initialize_mode: bool = False):
+    def __init__(
+        self,
+        session: Session,
+        initialize_mode: bool = False,
+        resume_after: Optional[str] = None,
+        on_project_indexed: Optional[Callable[[str], Awaitable[None]]] = None,
+    ):
+        """Initialize the indexer
+
+        Args:
+            session: Database session
+            initialize_mode: Index without triggering events
+            resume_after: Name of the last project processed by an interrupted run; earlier projects are skipped
+            on_project_indexed: Callback invoked with the project name after each processed project
+        """
         self.logger = Logger("ImmunefiIndexer")
         self.session = session
         self.initialize_mode = initialize_mode
+        self.resume_after = resume_after
+        self.on_project_indexed = on_project_indexed
         self.config = Config()
         self._stop_event = threading.Event()
         self.handler_registry = None if initialize_mode else HandlerRegistry()
+        self.host_concurrency = self.config.get("indexer.host_concurrency", 4)
+        self._download_semaphore = asyncio.Semaphore(self.config.get("indexer.download_concurrency", 8))
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Repositories are kept as shallow git checkouts unless git is missing or archives are configured
+        self.repo_sync = self.config.get("github.repo_sync", "git")
+        if self.repo_sync == "git" and not git_available():
+            self.logger.warning("git not found, downloading repository archives instead")
+            self.repo_sync = "archive"
+        # Prefetched records by project name and asset identifier, None until index() loads them
+        self._projects: Optional[Dict[str, Project]] = None
+        self._assets: Optional[Dict[str, Asset]] = None
+        # Assets planned for download by projects that have not been persisted yet
+        self._in_flight_urls: Set[str] = set()
+        self.blob_store = BlobStore()
+        self._incomplete_projects = 0
 
     async def trigger_event(self, event_type: HandlerTrigger, event_data: dict):
         """Safely trigger an event with serialized data."""
@@ -105,15 +191,90 @@ class ImmunefiIndexer:
         """Signal the indexer to stop"""
         self._stop_event.set()
 
-    async def index(self):
-        """Fetch and index bounties"""
+    def _load_state(self) -> Optional[IndexerState]:
+        """Load the validators of the last complete sync"""
+        return self.session.query(IndexerState).filter(IndexerState.platform == "immunefi").first()
+
+    def _save_state(self, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store the validators of a complete sync"""
+        self.session.merge(
+            IndexerState(platform="immunefi", etag=etag, last_modified=last_modified, last_sync=datetime.utcnow())
+        )
+        self.session.commit()
+
+    def _prefetch_projects(self) -> None:
+        """Load all Immunefi projects with their assets in two queries"""
+        projects = (
+            self.session.query(Project)
+            .options(selectinload(Project.assets))
+            .filter(Project.project_type == "bounty", Project.project_source == "immunefi")
+            .all()
+        )
+        self._projects = {project.name: project for project in projects}
+        self._assets = {asset.identifier: asset for project in projects for asset in project.assets}
+
+    def _prefetch_assets(self, urls: Set[str]) -> None:
+        """Load the assets listed under other projects than their own, in chunks of PREFETCH_CHUNK_SIZE"""
+        missing = sorted(set(urls) - self._assets.keys())
+        for start in range(0, len(missing), PREFETCH_CHUNK_SIZE):
+            chunk = missing[start : start + PREFETCH_CHUNK_SIZE]
+            for asset in self.session.query(Asset).filter(Asset.identifier.in_(chunk)).all():
+                self._assets[asset.identifier] = asset
+
+    def _find_project(self, name: str) -> Optional[Project]:
+        """Get an Immunefi project by name, from the prefetched projects if loaded"""
+        if self._projects is not None:
+            return self._projects.get(name)
+        return (
+            self.session.query(Project)
+            .filter(Project.name == name, Project.project_type == "bounty", Project.project_source == "immunefi")
+            .first()
+        )
+
+    def _find_asset(self, url: str) -> Optional[Asset]:
+        """Get an asset by identifier, from the prefetched assets if loaded"""
+        if self._assets is not None:
+            return self._assets.get(url)
+        return self.session.query(Asset).filter(Asset.identifier == url).first()
+
+    @staticmethod
+    def _hash_payload(project_data: dict) -> str:
+        """Hash a project payload independent of key order"""
+        return hashlib.sha256(json.dumps(project_data, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def index(self) -> Dict[str, Any]:
+        """Fetch and index bounties
+
+        The listing is fetched conditionally with the ETag and Last-Modified of the last complete
+        sync; if the server reports it unchanged, nothing else is done. Otherwise only projects
+        whose payload hash differs from the stored one are processed.
+
+        Projects go through a pipeline of stages joined by bounded queues: plan (look up the
+        project and decide what to download), download, persist (in listing order) and notify
+        (run the event handlers). Slow handlers therefore only fill the notify queue instead of
+        holding up downloads, until the queue is full.
+
+        Returns:
+            Project counts and per-stage throughput and queue depth
+        """
         try:
             url = self.config.get("api", {}).get("immunefi", {}).get("url", "https://immunefi.com/public-api/bounties.json")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    response.raise_for_status()
-                    bounty_data = await response.json()
+            state = self._load_state()
+            headers = {}
+            if state and state.etag:
+                headers["If-None-Match"] = state.etag
+            if state and state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+            async with HttpClient().get(url, headers=headers) as response:
+                if response.status == 304:
+                    self.logger.info("Immunefi bounties unchanged since last sync")
+                    return {"listing_unchanged": True}
+                response.raise_for_status()
+                bounty_data = await response.json()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
 
             # Normalize asset revisions - keep only latest revision for each asset
             asset_revisions = {}  # url -> latest revision
@@ -138,17 +299,99 @@ class ImmunefiIndexer:
             # Track current project names
             current_projects = {project["project"] for project in bounty_data if "project" in project}
 
-            # Process all current projects
-            for project_data in bounty_data:
-                if self._stop_event.is_set():
-                    self.logger.info("Indexing stopped by request")
-                    break
+            # Skip projects already processed by an interrupted run
+            projects_to_process = bounty_data
+            names = [project.get("project") for project in bounty_data]
+            if self.resume_after in names:
+                projects_to_process = bounty_data[names.index(self.resume_after) + 1 :]
+                self.logger.info(f"Resuming after project {self.resume_after}, {len(projects_to_process)} projects left")
+
+            # Load existing records once instead of querying them per project and asset
+            self._prefetch_projects()
+            source_hashes = {name: project.source_hash for name, project in self._projects.items()}
+            changed = {}
+            for project_data in projects_to_process:
+                source_hash = self._hash_payload(project_data)
+                if source_hashes.get(project_data.get("project")) != source_hash:
+                    changed[id(project_data)] = source_hash
+            self._prefetch_assets(
+                {
+                    asset["url"]
+                    for project_data in projects_to_process
+                    if id(project_data) in changed
+                    for asset in project_data.get("assets", [])
+                }
+            )
+
+            # Process changed projects in a pipeline. Unchanged ones only pass through to be checkpointed in order.
+            queue_size = self.config.get("indexer.queue_size", 16)
+            pipeline = Pipeline(
+                [
+                    Stage("plan", self._plan_project, queue_size=queue_size),
+                    Stage(
+                        "download",
+                        self._download_project,
+                        concurrency=self.config.get("indexer.project_concurrency", 4),
+                        queue_size=queue_size,
+                    ),
+                    Stage("persist", self._persist_stage, queue_size=queue_size, ordered=True),
+                    Stage(
+                        "notify",
+                        self._notify,
+                        concurrency=self.config.get("indexer.notify_concurrency", 4),
+                        queue_size=queue_size,
+                    ),
+                ],
+                name="ImmunefiPipeline",
+            )
+
+            def listed_projects():
+                for project_data in projects_to_process:
+                    if self._stop_event.is_set():
+                        self.logger.info("Indexing stopped by request")
+                        return
+                    source_hash = changed.get(id(project_data))
+                    yield ProjectWork(project_data, source_hash, changed=source_hash is not None)
+
+            self._incomplete_projects = 0
+            try:
+                await pipeline.run(listed_projects())
+            finally:
+                # Assets of projects that left the pipeline early are indexed again by the next sync
+                self._in_flight_urls.clear()
+            stage_metrics = pipeline.get_metrics()
 
-                await self.process_bounty(project_data)
+            unchanged = len(projects_to_process) - len(changed)
+            if unchanged:
+                self.logger.info(f"Skipped {unchanged} unchanged projects")
 
             # Clean up removed projects
             await self.cleanup_removed_projects(current_projects)
 
+            # Drop blobs no asset links to anymore, after all replaced and removed files are gone
+            try:
+                await asyncio.to_thread(self.blob_store.gc)
+            except Exception as e:
+                self.logger.warning(f"Failed to clean up blob store: {str(e)}")
+
+            # Only a complete sync may answer the next conditional request, otherwise failed projects would be skipped
+            complete = (
+                not self._stop_event.is_set()
+                and self._incomplete_projects == 0
+                and not any(metrics["failed"] for metrics in stage_metrics.values())
+            )
+            if complete:
+                self._save_state(etag, last_modified)
+
+            return {
+                "projects": len(bounty_data),
+                "changed": len(changed),
+                "unchanged": unchanged,
+                "incomplete": self._incomplete_projects,
+                "deduplicated_bytes": self.blob_store.deduplicated_bytes,
+                "stages": stage_metrics,
+            }
+
         except Exception as e:
             self.logger.error(f"Failed to index Immunefi: {str(e)}")
             raise
@@ -157,11 +400,14 @@ class ImmunefiIndexer:
         """Remove projects that are no longer listed in Immunefi"""
         try:
             # Get all Immunefi projects from database
-            projects = (
-                self.session.query(Project)
-                .filter(Project.project_type == "bounty", Project.project_source == "immunefi")
-                .all()
-            )
+            if self._projects is not None:
+                projects = list(self._projects.values())
+            else:
+                projects = (
+                    self.session.query(Project)
+                    .filter(Project.project_type == "bounty", Project.project_source == "immunefi")
+                    .all()
+                )
 
             # Update any old projects that might not have project_source set
             old_projects = self.session.query(Project).filter(Project.project_type == "immunefi").all()
@@ -197,6 +443,10 @@ class ImmunefiIndexer:
 
                     # Delete project from database
                     self.session.delete(project)
+                    if self._projects is not None:
+                        self._projects.pop(project.name, None)
+                        for asset in project.assets:
+                            self._assets.pop(asset.identifier, None)
 
             self.session.commit()
 
@@ -205,24 +455,33 @@ class ImmunefiIndexer:
             self.session.rollback()
             raise
 
-    async def process_bounty(self, bounty_data: dict) -> None:
-        """Process a single bounty program"""
+    async def process_bounty(self, bounty_data: dict, source_hash: Optional[str] = None) -> bool:
+        """Process a single bounty program, running all pipeline stages one after another
+
+        Args:
+            bounty_data: Project payload from the Immunefi listing
+            source_hash: Hash of the payload, stored once the project and all its assets are indexed
+
+        Returns:
+            True if the project and all its assets were indexed
+        """
+        work = ProjectWork(bounty_data, source_hash)
+        await self._plan_project(work)
+        await self._download_project(work)
+        await self._persist_project(work)
+        await self._notify(work)
+        return work.complete
+
+    async def _plan_project(self, work: ProjectWork) -> ProjectWork:
+        """Pipeline stage: look up or create the project and decide which assets to download"""
+        if not work.changed:
+            return work
+
         try:
+            bounty_data = work.data
             self.logger.info(f"Processing bounty: {bounty_data['project']}")
 
-            existing_project = (
-                self.session.query(Project)
-                .filter(
-                    Project.name == bounty_data["project"],
-                    Project.project_type == "bounty",
-                    Project.project_source == "immunefi",
-                )
-                .first()
-            )
-
-            # Get current asset URLs from bounty data
-            current_asset_urls = {asset["url"] for asset in bounty_data.get("assets", []) if asset.get("url")}
-            self.logger.debug(f"Current asset URLs: {current_asset_urls}")
+            existing_project = self._find_project(bounty_data["project"])
 
             # Collect all keywords from various fields
             keywords = set()
@@ -277,116 +536,198 @@ class ImmunefiIndexer:
                     extra_data=extra_data,
                 )
 
-                try:
-                    self.session.add(new_project)
-                    self.session.commit()
-
-                    # Process assets after successful project commit
-                    asset_data = bounty_data.get("assets", [])
-                    await self.download_assets(new_project.id, asset_data)
-
-                    # Only trigger events if not in initialize mode
-                    await self.trigger_event(HandlerTrigger.NEW_PROJECT, {"project": new_project})
-
-                except Exception as e:
-                    self.logger.error(f"Error processing project {new_project.id}: {e}")
-                    self.session.rollback()
-                    raise
+                # The project needs an id before its assets can be stored
+                self.session.add(new_project)
+                self.session.commit()
+                if self._projects is not None:
+                    self._projects[new_project.name] = new_project
+                work.project = new_project
+                work.is_new = True
             else:
                 self.logger.info(f"Found existing project: {existing_project.name}")
+                work.project = existing_project
 
                 # Store old project state for comparison
-                old_project = Project(
+                work.old_project = Project(
                     name=existing_project.name,
                     description=existing_project.description,
                     project_type=existing_project.project_type,
                     project_source=existing_project.project_source,
                     keywords=existing_project.keywords.copy() if existing_project.keywords else [],
                     extra_data=existing_project.extra_data.copy() if existing_project.extra_data else {},
-                    assets=existing_project.assets.copy() if existing_project.assets else [],
                 )
 
-                # Check for changes
-                has_changes = False
-
-                # Update basic fields
+                # Collect changes, applied when the project is persisted
                 if existing_project.description != bounty_data.get("description", ""):
-                    existing_project.description = bounty_data.get("description", "")
-                    has_changes = True
-
-                # Update keywords
+                    work.updates["description"] = bounty_data.get("description", "")
                 if set(existing_project.keywords or []) != keywords:
-                    existing_project.keywords = list(keywords)
-                    has_changes = True
-
-                # Update extra data
+                    work.updates["keywords"] = list(keywords)
                 if existing_project.extra_data != extra_data:
-                    existing_project.extra_data = extra_data
-                    has_changes = True
+                    work.updates["extra_data"] = extra_data
 
-                # Download assets for existing project
-                await self.download_assets(existing_project.id, bounty_data.get("assets", []))
+            work.project_id = work.project.id
+            await self._plan_downloads(work)
 
-                # Clean up out-of-scope assets
-                try:
-                    await self.cleanup_removed_assets(existing_project, current_asset_urls)
-                except Exception as e:
-                    self.logger.error(f"Error cleaning up assets for {existing_project.name}: {str(e)}")
-                    # Don't re-raise, continue with next project
+        except Exception as e:
+            self.logger.error(f"Error processing project {work.name}: {str(e)}")
+            self.session.rollback()
+            work.failed = True
 
-                # Commit changes
-                self.session.commit()
+        return work
+
+    async def _download_project(self, work: ProjectWork) -> ProjectWork:
+        """Pipeline stage: download the planned assets of a project concurrently and deduplicate their files"""
+        if not work.downloads:
+            return work
+        try:
+            work.results = list(await asyncio.gather(*(self._fetch_asset(download) for download in work.downloads)))
+            for download, success in zip(work.downloads, work.results):
+                if success:
+                    download.new_manifest = await self._deduplicate(download.target_dir, download.changed_paths)
+                    if download.new_manifest is not None and download.changed_paths is not None:
+                        # A repository sync only rewrote the changed files, the others are as before
+                        unchanged = {
+                            path: digest
+                            for path, digest in (download.old_manifest or {}).items()
+                            if path not in download.removed_paths
+                        }
+                        download.new_manifest = {**unchanged, **download.new_manifest}
+        except BaseException:
+            # The project is dropped from the pipeline and never reaches the persist stage that releases its assets
+            self._release_downloads(work)
+            raise
+        return work
+
+    def _release_downloads(self, work: ProjectWork) -> None:
+        """Let other projects index the assets planned for download by a project"""
+        self._in_flight_urls.difference_update(download.url for download in work.downloads)
 
-                # Trigger update event if there were changes and not in initialize mode
-                if has_changes:
-                    await self.trigger_event(
-                        HandlerTrigger.PROJECT_UPDATE, {"project": existing_project, "old_project": old_project}
-                    )
+    async def _deduplicate(self, path: str, paths: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+        """Replace the files of a downloaded asset, or only the given ones, with links into the blob store
 
+        Returns:
+            The manifest of the stored files, or None if they could not be stored
+        """
+        try:
+            return await asyncio.to_thread(self.blob_store.add_tree, path, paths)
         except Exception as e:
-            self.logger.error(f"Error processing project {bounty_data.get('project', 'unknown')}: {str(e)}")
-            self.session.rollback()
-            # Don't re-raise, continue with next project
+            # Only costs disk space, the asset itself is fine
+            self.logger.warning(f"Failed to deduplicate {path}: {str(e)}")
+            return None
 
-    async def cleanup_removed_assets(self, project: Project, current_asset_urls: set):
-        """Remove assets that are no longer in project scope"""
+    async def _persist_project(self, work: ProjectWork) -> None:
+        """Store the downloaded assets and the changes of a project and queue its events"""
         try:
-            # Get all assets currently associated with the project
-            for asset in project.assets:
-                if asset.identifier not in current_asset_urls:
-                    self.logger.info(f"Asset {asset.identifier} no longer in scope for project {project.name}, removing")
+            if not work.changed or work.failed:
+                return
 
-                    try:
-                        # Trigger event BEFORE deletion if not in initialize mode
-                        if not self.initialize_mode:
-                            await self.trigger_event(HandlerTrigger.ASSET_REMOVE, {"asset": asset, "project": project})
+            self._store_downloads(work)
 
-                        # Delete local files if they exist
-                        if asset.local_path and os.path.exists(asset.local_path):
-                            if os.path.isdir(asset.local_path):
-                                await self._remove_dir(asset.local_path)
-                            else:
-                                await self._remove_file(asset.local_path)
+            if work.is_new:
+                if work.source_hash and work.complete:
+                    work.project.source_hash = work.source_hash
+                    self.session.commit()
+                work.events.append((HandlerTrigger.NEW_PROJECT, {"project": work.project}))
+                return
 
-                        # Delete asset from database
-                        self.session.delete(asset)
-                        await self.session.commit()
-
-                    except Exception as e:
-                        if "ForeignKeyViolation" in str(e):
-                            self.logger.warning(f"Asset {asset.identifier} is referenced by other tables, skipping deletion")
-                            await self.session.rollback()
-                            continue
-                        else:
-                            self.logger.error(f"Failed to remove asset {asset.identifier}: {str(e)}")
-                            await self.session.rollback()
-                            continue
+            # Clean up out-of-scope assets
+            current_asset_urls = {asset["url"] for asset in work.data.get("assets", []) if asset.get("url")}
+            try:
+                work.events.extend(await self.cleanup_removed_assets(work.project, current_asset_urls))
+            except Exception as e:
+                self.logger.error(f"Error cleaning up assets for {work.project.name}: {str(e)}")
+                # Don't re-raise, continue with the project
+
+            # Commit changes, forgetting the hash if some assets failed so that they are retried
+            for attr, value in work.updates.items():
+                setattr(work.project, attr, value)
+            work.project.source_hash = work.source_hash if work.complete else None
+            self.session.commit()
+
+            if work.updates:
+                work.events.append((HandlerTrigger.PROJECT_UPDATE, {"project": work.project, "old_project": work.old_project}))
+
+        except Exception as e:
+            self.logger.error(f"Error processing project {work.name}: {str(e)}")
+            self.session.rollback()
+            work.failed = True
+
+        finally:
+            if work.failed:
+                work.complete = False
+            self._release_downloads(work)
+
+    async def _persist_stage(self, work: ProjectWork) -> Optional[ProjectWork]:
+        """Pipeline stage: persist a project and checkpoint it, in listing order"""
+        await self._persist_project(work)
+        if not work.complete:
+            self._incomplete_projects += 1
+        if self.on_project_indexed:
+            await self.on_project_indexed(work.name)
+        return work if work.events else None
+
+    async def _notify(self, work: ProjectWork) -> ProjectWork:
+        """Pipeline stage: trigger the events of a project in order"""
+        for event_type, event_data in work.events:
+            await self.trigger_event(event_type, event_data)
+        return work
+
+    async def cleanup_removed_assets(self, project: Project, current_asset_urls: set) -> List[Tuple[HandlerTrigger, dict]]:
+        """Remove assets that are no longer in project scope
+
+        All removed assets are deleted with a single commit. If that fails because some asset is
+        still referenced, they are deleted one at a time and referenced assets are kept.
+
+        Returns:
+            The ASSET_REMOVE events to trigger
+        """
+        removed = [asset for asset in project.assets if asset.identifier not in current_asset_urls]
+        if not removed:
+            return []
+
+        events = []
+        try:
+            for asset in removed:
+                self.logger.info(f"Asset {asset.identifier} no longer in scope for project {project.name}, removing")
+
+                if not self.initialize_mode:
+                    events.append((HandlerTrigger.ASSET_REMOVE, {"asset": asset, "project": project}))
+
+                # Delete local files and the snapshot of the last update if they exist
+                await asyncio.to_thread(AssetSnapshot(asset.id, self.blob_store).remove)
+                if asset.local_path and os.path.exists(asset.local_path):
+                    if os.path.isdir(asset.local_path):
+                        await self._remove_dir(asset.local_path)
+                    else:
+                        await self._remove_file(asset.local_path)
+
+            try:
+                self._delete_assets(project, removed)
+            except IntegrityError:
+                self.session.rollback()
+                for asset in removed:
+                    try:
+                        self._delete_assets(project, [asset])
+                    except IntegrityError:
+                        self.logger.warning(f"Asset {asset.identifier} is referenced by other tables, skipping deletion")
+                        self.session.rollback()
+            return events
 
         except Exception as e:
             self.logger.error(f"Error cleaning up removed assets for project {project.name}: {str(e)}")
-            await self.session.rollback()
+            self.session.rollback()
             raise
 
+    def _delete_assets(self, project: Project, assets: list) -> None:
+        """Delete asset records with a single statement"""
+        self.session.query(Asset).filter(Asset.id.in_([asset.id for asset in assets])).delete(synchronize_session=False)
+        self.session.commit()
+        for asset in assets:
+            self.session.expunge(asset)
+            if self._assets is not None:
+                self._assets.pop(asset.identifier, None)
+        set_committed_value(project, "assets", [asset for asset in project.assets if asset not in assets])
+
     async def _remove_dir(self, path: str):
         """Asynchronously remove a directory"""
         await asyncio.to_thread(shutil.rmtree, path)
@@ -395,281 +736,294 @@ class ImmunefiIndexer:
         """Asynchronously remove a file"""
         await asyncio.to_thread(os.remove, path)
 
-    async def download_assets(self, project_id: int, asset_data):  # noqa: C901
-        """Download asset files and create Asset records."""
-        if not asset_data:
-            return
-
-        base_dir = os.path.join(self.config.data_dir, str(project_id))
-        os.makedirs(base_dir, exist_ok=True)
+    @staticmethod
+    def _get_asset_type(url: str) -> Optional[AssetType]:
+        """Determine the asset type from an asset URL"""
+        if "/blob/" in url or "/tree/" in url:
+            return AssetType.GITHUB_FILE
+        if "github.com" in url:
+            return AssetType.GITHUB_REPO
+        if any(explorer in url for explorer in EXPLORER_DOMAINS):
+            return AssetType.DEPLOYED_CONTRACT
+        return None
 
-        for asset in asset_data:
-            url = asset.get("url")
-            revision = asset.get("revision")
+    def _get_download_host(self, download: AssetDownload) -> str:
+        """Get the host a download talks to, used for per-host concurrency limits"""
+        if download.asset_type == AssetType.GITHUB_FILE:
+            return "raw.githubusercontent.com"
+        if download.asset_type == AssetType.GITHUB_REPO:
+            return "github.com" if self.repo_sync == "git" else "api.github.com"
+        return urlparse(download.url).netloc
+
+    async def _plan_download(self, base_dir: str, asset: dict) -> Optional[AssetDownload]:
+        """Decide whether an asset needs to be downloaded and prepare its target directory
+
+        Runs before any download starts, so old code is captured before files are replaced.
+        """
+        url = asset.get("url")
+        revision = asset.get("revision")
+        self.logger.debug(f"Processing {url} with revision {revision}")
+
+        existing_asset = self._find_asset(url)
+        if existing_asset:
+            self.logger.debug(f"Found existing asset: {existing_asset.id}")
+            self.logger.debug(f"Current extra_data: {existing_asset.extra_data}")
+            self.logger.debug(f"New revision from API: {revision}")
+
+            # Check if anything has actually changed
+            if existing_asset.extra_data and existing_asset.extra_data.get("revision") == revision:
+                self.logger.debug(f"Asset {url} already exists with same revision")
+                return None
+        else:
+            self.logger.info(f"Creating new asset: {url}")
+
+        # Create new directory path
+        target_dir, _ = AssetStorage.get_asset_path(base_dir, url)
+
+        asset_type = self._get_asset_type(url)
+        if asset_type is None:
+            self.logger.warning(f"Unknown asset type for URL: {url}")
+            return None
+
+        # Skip directory-like paths (ending with branch name or no file extension)
+        if (
+            "github.com" in url
+            and "/tree/" in url
+            and (
+                url.split("/")[-1].startswith("v")  # version tag like v0.2.x
+                or "." not in url.split("/")[-1]  # no file extension
+            )
+        ):
+            self.logger.debug(f"Skipping directory path: {url}")
+            return None
 
-            if not url:
-                continue
+        download = AssetDownload(url, revision, asset_type, target_dir, existing_asset)
+        if not existing_asset:
+            return download
 
-            self.logger.debug(f"Processing {url} with revision {revision}")
+        # Record the old files BEFORE any changes or cleanup. Their contents stay in the blob store.
+        download.old_revision = existing_asset.extra_data.get("revision") if existing_asset.extra_data else None
+        if os.path.exists(target_dir):
+            try:
+                download.old_manifest = await asyncio.to_thread(self.blob_store.manifest, target_dir)
+            except Exception as e:
+                self.logger.error(f"Failed to record old files of {url}: {e}")
 
+        # Now it's safe to clean up old files. Repository checkouts are updated in place instead.
+        if asset_type == AssetType.GITHUB_REPO and self.repo_sync == "git":
+            return download
+        if os.path.exists(target_dir):
+            self.logger.info(f"Cleaning up old path: {target_dir}")
             try:
-                # Find existing asset
-                existing_asset = self.session.query(Asset).filter(Asset.identifier == url).first()
-
-                if existing_asset:
-                    # Debug logging for revision check
-                    self.logger.debug(f"Found existing asset: {existing_asset.id}")
-                    self.logger.debug(f"Current extra_data: {existing_asset.extra_data}")
-                    self.logger.debug(
-                        f"Current revision in DB: {existing_asset.extra_data.get('revision') if existing_asset.extra_data else None}"
-                    )
-                    self.logger.debug(f"New revision from API: {revision}")
-
-                    # Check if anything has actually changed
-                    if existing_asset.extra_data and existing_asset.extra_data.get("revision") == revision:
-                        self.logger.debug(f"Asset {url} already exists with same revision")
-                        continue
-
-                    # Get old code BEFORE any changes or cleanup
-                    old_code = None
-                    new_code = None
-                    can_diff = existing_asset.asset_type in [AssetType.GITHUB_FILE, AssetType.DEPLOYED_CONTRACT]
-                    old_revision = existing_asset.extra_data.get("revision") if existing_asset.extra_data else None
-
-                    self.logger.debug(f"Asset type before getting old code: {existing_asset.asset_type}")
-                    if can_diff:
-                        try:
-                            old_code = existing_asset.get_code()
-                            self.logger.debug(f"Successfully got old code, length: {len(old_code) if old_code else 0}")
-                        except Exception as e:
-                            self.logger.error(f"Failed to get old code: {e}")
-
-                    # Create new directory path
-                    target_dir, _ = AssetStorage.get_asset_path(base_dir, url)
-
-                    # Store old code before cleaning up
-                    old_code_backup = old_code
-
-                    # Now it's safe to clean up old files
-                    if os.path.exists(target_dir):
-                        self.logger.info(f"Cleaning up old path: {target_dir}")
-                        try:
-                            if os.path.isfile(target_dir):
-                                await self._remove_file(target_dir)
-                                # Ensure parent directory exists
-                                os.makedirs(os.path.dirname(target_dir), exist_ok=True)
-                            else:
-                                for item in os.listdir(target_dir):
-                                    item_path = os.path.join(target_dir, item)
-                                    if os.path.isfile(item_path):
-                                        await self._remove_file(item_path)
-                                    elif os.path.isdir(item_path):
-                                        await self._remove_dir(item_path)
-                        except Exception as e:
-                            self.logger.error(f"Error during cleanup: {e}")
-
-                    # Update existing asset
-                    if "github.com" in url:
-                        # Skip directory-like paths (ending with branch name or no file extension)
-                        if "/tree/" in url and (
-                            url.split("/")[-1].startswith("v")  # version tag like v0.2.x
-                            or "." not in url.split("/")[-1]  # no file extension
-                        ):
-                            self.logger.debug(f"Skipping directory path: {url}")
-                            continue
-
-                        # Handle file paths
-                        if "/blob/" in url or "/tree/" in url:
-                            asset_type = AssetType.GITHUB_FILE
-                            self.logger.debug(f"Fetching GitHub file: {url} to {target_dir}")
-                            if not await fetch_github_file(url, target_dir):
-                                self.logger.error(f"Failed to fetch GitHub file: {url}")
-                                continue
-                        else:
-                            asset_type = AssetType.GITHUB_REPO
-                            self.logger.debug(f"Fetching GitHub repo: {url} to {target_dir}")
-                            if not await fetch_github_repo(url, target_dir):
-                                self.logger.error(f"Failed to fetch GitHub repo: {url}")
-                                continue
-                    elif any(explorer in url for explorer in ["etherscan.io", "bscscan.com", "polygonscan.com"]):
-                        asset_type = AssetType.DEPLOYED_CONTRACT
-                        self.logger.debug(f"Fetching contract source from {url} to {target_dir}")
-                        try:
-                            # Create and await the coroutine in one step
-                            if not await fetch_verified_sources(url, target_dir):
-                                self.logger.error(f"Failed to fetch verified sources: {url}")
-                                continue
-                        except Exception as e:
-                            self.logger.error(f"Error fetching verified sources for {url}: {str(e)}", exc_info=True)
-                            continue
-
-                        self.logger.debug("Successfully fetched sources, updating asset")
-                        # Only proceed if download was successful
-                        new_asset = Asset(
-                            identifier=url,
-                            project_id=project_id,
-                            asset_type=asset_type,
-                            source_url=url,
-                            local_path=target_dir,
-                            extra_data={"revision": revision} if revision else {},
-                        )
-
-                        self.session.add(new_asset)
-                        # Fix the commit logic to handle both sync and async sessions
-                        if hasattr(self.session, "commit"):
-                            if asyncio.iscoroutinefunction(self.session.commit):
-                                await self.session.commit()
-                            else:
-                                self.session.commit()
+                if os.path.isfile(target_dir):
+                    await self._remove_file(target_dir)
+                    # Ensure parent directory exists
+                    os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+                else:
+                    for item in os.listdir(target_dir):
+                        item_path = os.path.join(target_dir, item)
+                        if os.path.isfile(item_path):
+                            await self._remove_file(item_path)
+                        elif os.path.isdir(item_path):
+                            await self._remove_dir(item_path)
+            except Exception as e:
+                self.logger.error(f"Error during cleanup: {e}")
 
-                        if not self.initialize_mode:
-                            await self.trigger_event(HandlerTrigger.NEW_ASSET, {"asset": new_asset})
-                    else:
-                        self.logger.warning(f"Unknown asset type for URL: {url}")
-                        continue
-
-                    # Update metadata
-                    existing_asset.extra_data = existing_asset.extra_data or {}
-                    existing_asset.extra_data["revision"] = revision
-                    existing_asset.source_url = url
-                    existing_asset.local_path = target_dir
-
-                    # Get new code AFTER downloading
-                    self.logger.info(f"Asset type before getting new code: {existing_asset.asset_type}")
-                    if can_diff:
-                        try:
-                            new_code = existing_asset.get_code()
-                            self.logger.info(f"Successfully got new code, length: {len(new_code) if new_code else 0}")
-                        except Exception as e:
-                            self.logger.error(f"Failed to get new code: {e}")
-
-                    if not self.initialize_mode:
-                        self.logger.info(f"Asset changed - old revision: {old_revision}, new revision: {revision}")
-
-                        # Create event data
-                        event_data = {
-                            "asset": existing_asset,
-                            "old_revision": old_revision,
-                            "new_revision": revision,
-                            "old_path": target_dir,
-                            "new_path": target_dir,
-                        }
+        return download
 
-                        if can_diff and old_code_backup is not None and new_code is not None:
-                            event_data["old_code"] = old_code_backup
-                            event_data["new_code"] = new_code
-                            self.logger.debug("Added code to event data for diffing")
-
-                        # Trigger the event
-                        await self.trigger_event(HandlerTrigger.ASSET_UPDATE, event_data)
-
-                        # Update the asset's revision using raw SQL
-                        self.logger.info(f"Updating asset {existing_asset.id} revision to {revision}")
-
-                        # Debug the session type
-                        self.logger.info(f"Session type: {type(self.session)}")
-
-                        update_sql = text(
-                            """
-                        UPDATE assets
-                        SET extra_data = CAST(extra_data AS jsonb) || jsonb_build_object('revision', CAST(:revision AS integer))
-                        WHERE id = :asset_id
-                        RETURNING id, extra_data;
-                        """
-                        )
-
-                        try:
-                            # Execute with RETURNING to see what happened
-                            result = self.session.execute(
-                                update_sql, {"revision": revision, "asset_id": existing_asset.id}  # Keep as integer
-                            )
-
-                            # Log the result
-                            updated = result.first()
-                            self.logger.info(f"Update result: {updated}")
-
-                            # Explicitly commit
-                            self.session.commit()
-                            self.logger.info("Commit completed")
-
-                            # Double check with a separate query
-                            verify_sql = text("SELECT id, extra_data FROM assets WHERE id = :asset_id")
-                            verify_result = self.session.execute(verify_sql, {"asset_id": existing_asset.id})
-                            verify_row = verify_result.first()
-                            self.logger.info(f"Verification query result: {verify_row}")
-
-                        except Exception as e:
-                            self.logger.error(f"Error during update: {str(e)}")
-                            self.logger.error(f"Error type: {type(e)}")
-                            self.session.rollback()
-                            raise
-
-                        # Expire all objects to force reload from DB
-                        self.session.expire_all()
-
-                    # Final commit to ensure all changes are saved
-                    if hasattr(self.session, "commit"):
-                        self.session.commit()
-                    else:
-                        await self.session.commit()
+    async def _fetch_asset(self, download: AssetDownload) -> bool:
+        """Download an asset, honoring the global and per-host concurrency limits"""
+        host = self._get_download_host(download)
+        if host not in self._host_semaphores:
+            limit = self.config.get("indexer.host_limits", {}).get(host, self.host_concurrency)
+            self._host_semaphores[host] = asyncio.Semaphore(limit)
+
+        # Take the host slot first so that downloads queued for a busy host do not hold global slots
+        async with self._host_semaphores[host], self._download_semaphore:
+            url, target_dir = download.url, download.target_dir
+            try:
+                if download.asset_type == AssetType.GITHUB_FILE:
+                    self.logger.debug(f"Fetching GitHub file: {url} to {target_dir}")
+                    if not await fetch_github_file(url, target_dir):
+                        self.logger.error(f"Failed to fetch GitHub file: {url}")
+                        return False
+                elif download.asset_type == AssetType.GITHUB_REPO and self.repo_sync == "git":
+                    self.logger.debug(f"Syncing GitHub repo: {url} to {target_dir}")
+                    sync = await sync_github_repo(url, target_dir)
+                    if sync is None:
+                        self.logger.error(f"Failed to sync GitHub repo: {url}")
+                        return False
+                    download.commit = sync.new_commit
+                    if not sync.cloned:
+                        download.changed_paths = sync.changed
+                        download.removed_paths = sync.removed
+                elif download.asset_type == AssetType.GITHUB_REPO:
+                    self.logger.debug(f"Fetching GitHub repo: {url} to {target_dir}")
+                    if not await fetch_github_repo(url, target_dir):
+                        self.logger.error(f"Failed to fetch GitHub repo: {url}")
+                        return False
                 else:
-                    self.logger.info(f"Creating new asset: {url}")
+                    self.logger.debug(f"Fetching contract source from {url} to {target_dir}")
+                    if not await fetch_verified_sources(url, target_dir):
+                        self.logger.error(f"Failed to fetch verified sources: {url}")
+                        return False
+            except Exception as e:
+                self.logger.error(f"Failed to process asset {url}: {str(e)}")
+                return False
+        return True
+
+    def _add_new_asset(self, project_id: int, download: AssetDownload) -> Asset:
+        """Add the record of a downloaded new asset to the session"""
+        self.logger.debug(f"Creating new asset for {download.url} of type {download.asset_type}")
+        new_asset = Asset(
+            identifier=download.url,
+            project_id=project_id,
+            asset_type=download.asset_type,
+            source_url=download.url,
+            local_path=download.target_dir,
+            extra_data=self._with_commit(download, {"revision": download.revision} if download.revision else {}),
+        )
+        self.session.add(new_asset)
+        return new_asset
+
+    @staticmethod
+    def _with_commit(download: AssetDownload, extra_data: dict) -> dict:
+        """Add the checked out commit of a synced repository to the extra data of its asset"""
+        if download.commit:
+            extra_data["commit"] = download.commit
+        return extra_data
+
+    def _apply_update(self, download: AssetDownload) -> dict:
+        """Update the record of a downloaded existing asset and build its update event"""
+        existing_asset = download.existing_asset
+        revision = download.revision
+        target_dir = download.target_dir
+
+        # Assign a new dict so the change of the JSON column is tracked
+        existing_asset.extra_data = self._with_commit(download, {**(existing_asset.extra_data or {}), "revision": revision})
+        existing_asset.source_url = download.url
+        existing_asset.local_path = target_dir
+
+        self.logger.info(f"Asset changed - old revision: {download.old_revision}, new revision: {revision}")
+        event_data = {
+            "asset": existing_asset,
+            "old_revision": download.old_revision,
+            "new_revision": revision,
+            "old_path": target_dir,
+            "new_path": target_dir,
+        }
+        if download.changed_paths is not None:
+            # Downstream scanners and embedders only need to look at these files
+            event_data["changed_paths"] = download.changed_paths
+            event_data["removed_paths"] = download.removed_paths
+        if download.old_manifest is not None and download.new_manifest is not None:
+            try:
+                event_data.update(self._keep_snapshot(download))
+            except Exception as e:
+                self.logger.error(f"Failed to keep snapshot of {download.url}: {e}")
+        return event_data
 
-                    # Create new directory path
-                    target_dir, _ = AssetStorage.get_asset_path(base_dir, url)
+    def _keep_snapshot(self, download: AssetDownload) -> dict:
+        """Keep the old versions of the changed files of an updated asset
+
+        Returns:
+            Event data referencing the old and new version of each changed file
+        """
+        changes = diff_manifests(download.old_manifest, download.new_manifest)
+        if not changes:
+            return {}
+        snapshot = AssetSnapshot(download.existing_asset.id, self.blob_store)
+        snapshot_path = snapshot.keep(changes)
+        single_file = os.path.isfile(download.target_dir)
+        changed_files = [
+            {
+                "path": change.path,
+                "status": change.status,
+                "old_file": snapshot.file_path(change.path) if change.old_digest else None,
+                "new_file": (
+                    (download.target_dir if single_file else os.path.join(download.target_dir, change.path))
+                    if change.new_digest
+                    else None
+                ),
+            }
+            for change in changes
+        ]
+        return {"snapshot_path": snapshot_path, "changed_files": changed_files}
+
+    async def download_assets(self, project_id: int, asset_data) -> bool:
+        """Download asset files and create Asset records.
+
+        Downloads run concurrently, limited by indexer.download_concurrency overall and by
+        indexer.host_concurrency per host. Records are written afterwards with a single commit,
+        and events are triggered in the order of asset_data.
+
+        Returns:
+            True if no asset failed to download or store
+        """
+        work = ProjectWork({"assets": asset_data})
+        work.project_id = project_id
+        await self._plan_downloads(work)
+        try:
+            await self._download_project(work)
+            self._store_downloads(work)
+        finally:
+            self._release_downloads(work)
+        await self._notify(work)
+        return work.complete
+
+    async def _plan_downloads(self, work: ProjectWork) -> None:
+        """Decide which assets of a project to download, one at a time since this reads from the session"""
+        asset_data = work.data.get("assets", [])
+        if not asset_data:
+            return
 
-                    # Determine asset type and download content
-                    try:
-                        if "/blob/" in url or "/tree/" in url:
-                            asset_type = AssetType.GITHUB_FILE
-                            self.logger.debug(f"Fetching GitHub file: {url} to {target_dir}")
-                            if not await fetch_github_file(url, target_dir):
-                                self.logger.error(f"Failed to fetch GitHub file: {url}")
-                                continue
-                        elif "/github.com/" in url and not ("/blob/" in url or "/tree/" in url):
-                            asset_type = AssetType.GITHUB_REPO
-                            self.logger.debug(f"Fetching GitHub repo: {url} to {target_dir}")
-                            if not await fetch_github_repo(url, target_dir):
-                                self.logger.error(f"Failed to fetch GitHub repo: {url}")
-                                continue
-                        elif any(explorer in url for explorer in ["etherscan.io", "bscscan.com", "polygonscan.com"]):
-                            asset_type = AssetType.DEPLOYED_CONTRACT
-                            self.logger.debug(f"Fetching contract source from {url} to {target_dir}")
-                            if not await fetch_verified_sources(url, target_dir):
-                                self.logger.error(f"Failed to fetch verified sources: {url}")
-                                continue
-                        else:
-                            self.logger.warning(f"Unknown asset type for URL: {url}")
-                            continue
-
-                    except Exception as e:
-                        self.logger.error(f"Failed to process asset {url}: {str(e)}")
-                        self.session.rollback()
-                        continue
-
-                    # Create new asset (moved outside the if/elif blocks, same indentation as the if/elif)
-                    self.logger.debug(f"Creating new asset for {url} of type {asset_type}")
-                    new_asset = Asset(
-                        identifier=url,
-                        project_id=project_id,
-                        asset_type=asset_type,
-                        source_url=url,
-                        local_path=target_dir,
-                        extra_data={"revision": revision} if revision else {},
-                    )
-
-                    self.session.add(new_asset)
-                    # Fix the commit logic to handle both sync and async sessions
-                    if hasattr(self.session, "commit"):
-                        if asyncio.iscoroutinefunction(self.session.commit):
-                            await self.session.commit()
-                        else:
-                            self.session.commit()
-
-                    if not self.initialize_mode:
-                        await self.trigger_event(HandlerTrigger.NEW_ASSET, {"asset": new_asset})
+        base_dir = os.path.join(self.config.data_dir, str(work.project_id))
+        os.makedirs(base_dir, exist_ok=True)
 
+        for asset in asset_data:
+            url = asset.get("url")
+            if not url:
+                continue
+            if url in self._in_flight_urls:
+                # Listed by another project still in the pipeline; its record is stored there
+                self.logger.warning(f"Asset {url} is being indexed for another project, retrying next sync")
+                work.complete = False
+                continue
+            try:
+                download = await self._plan_download(base_dir, asset)
             except Exception as e:
                 self.logger.warning(f"Error in asset processing loop for {url}: {str(e)}")
                 self.session.rollback()
+                work.complete = False
+                continue
+            if download:
+                work.downloads.append(download)
+                self._in_flight_urls.add(url)
+
+    def _store_downloads(self, work: ProjectWork) -> None:
+        """Store the records of downloaded assets with a single commit and queue their events in listing order"""
+        stored = []
+        for download, success in zip(work.downloads, work.results):
+            if not success:
+                work.complete = False
                 continue
+            if download.existing_asset:
+                stored.append((HandlerTrigger.ASSET_UPDATE, self._apply_update(download)))
+            else:
+                stored.append((HandlerTrigger.NEW_ASSET, {"asset": self._add_new_asset(work.project_id, download)}))
+
+        if not stored:
+            return
+
+        try:
+            self.session.commit()
+        except Exception as e:
+            self.logger.warning(f"Failed to store {len(stored)} assets of project {work.project_id}: {str(e)}")
+            self.session.rollback()
+            work.complete = False
+            return
+
+        for event_type, event_data in stored:
+            if event_type == HandlerTrigger.NEW_ASSET and self._assets is not None:
+                self._assets[event_data["asset"].identifier] = event_data["asset"]
+        work.events.extend(stored)
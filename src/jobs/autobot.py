@@ -1,6 +1,7 @@
 """Job that runs an agent with a custom prompt"""
 
 from datetime import datetime
+from typing import Any, Dict
 from src.jobs.base import Job, JobResult
 from src.ai.chatbot import Chatbot
 from src.actions.result import ActionResult
@@ -9,12 +10,19 @@ from src.actions.result import ActionResult
 class AutobotJob(Job):
     """Job that runs an agent with a custom prompt"""
 
+    # Agent runs are not deterministic, every prompt gets its own run
+    deduplicate = False
+
     def __init__(self, prompt: str):
         super().__init__(job_type="autobot")
         self.prompt = prompt
         self.chatbot = Chatbot(max_history=10)
         self.action_results = []  # Track full results of each action
 
+    def get_params(self) -> Dict[str, Any]:
+        """Get the constructor arguments of this job"""
+        return {"prompt": self.prompt}
+
     async def start(self) -> None:
         """Start the job - required by Job base class"""
         await self.run()
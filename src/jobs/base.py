@@ -1,6 +1,12 @@
 from enum import Enum
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
 import uuid
 from src.util.logging import Logger
 from src.models.job import JobRecord
@@ -9,6 +15,7 @@ from abc import ABC, abstractmethod
 from src.services.telegram import TelegramService
 from src.util.formatting import ActionResultFormatter
 from src.actions.result import ActionResult
+from src.util.cancellation import CancellationToken
 
 
 class JobStatus(str, Enum):
@@ -88,15 +95,31 @@ class JobResult(DBSessionMixin):
 class Job(DBSessionMixin, ABC):
     """Base class for background jobs"""
 
-    def __init__(self, job_type: str):
+    # Whether identical submissions may share a single run of this job. Only jobs whose
+    # parameters are known can be compared, see get_fingerprint.
+    deduplicate = True
+
+    # Whether an interrupted run is restarted from its last checkpoint when the server starts
+    resumable = False
+
+    # Type the class is registered under when it is loaded as an extension, so that workers can
+    # recreate its jobs. Jobs of extension classes without a type only run in the server process.
+    job_type: Optional[str] = None
+
+    def __init__(self, job_type: Optional[str] = None):
         DBSessionMixin.__init__(self)
         self.id = str(uuid.uuid4())
-        self.type = job_type
+        self.type = job_type or self.job_type
         self.status = JobStatus.PENDING
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
         self.result: Optional[JobResult] = None
         self.error: Optional[str] = None
+        self.worker_id: Optional[str] = None  # Worker process that claimed the job, if any
+        self.checkpoint: Optional[Dict[str, Any]] = None  # Progress restored from an interrupted run
+        self.cancel_token = CancellationToken()  # Checked by executor work between units of work
+        self.interrupted = False  # Stopped by a shutdown rather than cancelled by a user
+        self._executor_work: List[threading.Event] = []  # Completion flags of executor work
         self.logger = Logger(self.__class__.__name__)
         self.telegram = TelegramService()
 
@@ -104,8 +127,14 @@ class Job(DBSessionMixin, ABC):
         """Store job details in database"""
         try:
             with self.get_session() as session:
-                job_record = session.query(JobRecord).filter(JobRecord.id == self.id).first()
+                query = session.query(JobRecord).filter(JobRecord.id == self.id)
+                if self.worker_id:
+                    # Never overwrite a record that was requeued and claimed by another worker
+                    query = query.filter(JobRecord.worker_id == self.worker_id)
+                job_record = query.first()
                 if not job_record:
+                    if self.worker_id:
+                        return
                     job_record = JobRecord()
                     job_record.id = self.id
                     session.add(job_record)
@@ -124,6 +153,111 @@ class Job(DBSessionMixin, ABC):
         except Exception as e:
             self.logger.error(f"Failed to store job in database: {e}")
 
+    def save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Persist the progress of the job so that an interrupted run can resume from it
+
+        Args:
+            checkpoint: JSON serializable progress marker, e.g. the last processed ID
+        """
+        self.checkpoint = checkpoint
+        try:
+            with self.get_session() as session:
+                query = session.query(JobRecord).filter(JobRecord.id == self.id)
+                if self.worker_id:
+                    query = query.filter(JobRecord.worker_id == self.worker_id)
+                job_record = query.first()
+                if job_record:
+                    job_record.checkpoint = checkpoint
+                    session.commit()
+
+        except Exception as e:
+            self.logger.error(f"Failed to save checkpoint: {e}")
+
+    def get_params(self) -> Dict[str, Any]:
+        """Get the constructor arguments needed to recreate this job from its database record.
+
+        Jobs that take constructor arguments must override this so that the job can be
+        executed by a worker process or restored after a restart.
+        """
+        return {}
+
+    def get_fingerprint(self) -> Optional[str]:
+        """Get a hash identifying jobs that do the same work
+
+        Jobs with constructor arguments are only compared if they override get_params, as the
+        fingerprint would otherwise match every job of the type whatever its arguments.
+
+        Returns:
+            Hash of the job type and parameters, or None if the job must never be deduplicated
+        """
+        if not self.deduplicate:
+            return None
+        if type(self).get_params is Job.get_params and self._takes_arguments():
+            return None
+        payload = json.dumps({"type": self.type, "params": self.get_params()}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def _takes_arguments(cls) -> bool:
+        """Check whether the constructor of the job takes any arguments"""
+        return len(inspect.signature(cls.__init__).parameters) > 1
+
+    def request_cancellation(self, shutdown: bool = False) -> None:
+        """Tell executor work started by this job to stop at the next check
+
+        Args:
+            shutdown: Whether the job is stopped because the server or worker shuts down
+        """
+        self.interrupted = self.interrupted or shutdown
+        self.cancel_token.cancel()
+
+    async def run_in_executor(self, func: Callable, *args) -> Any:
+        """Run blocking work in the default executor
+
+        The work keeps running when the calling task is cancelled, so it should check
+        self.cancel_token between files or batches and return early once it is cancelled.
+
+        Args:
+            func: Blocking function to run
+            args: Arguments for the function
+
+        Returns:
+            The return value of the function
+        """
+        finished = threading.Event()
+
+        def run():
+            try:
+                return func(*args)
+            finally:
+                finished.set()
+
+        self._executor_work.append(finished)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, run)
+        finally:
+            # Work that outlives a cancelled caller stays tracked until it returns
+            if finished.is_set():
+                self._executor_work.remove(finished)
+
+    async def wait_for_release(self, timeout: float) -> bool:
+        """Wait until all executor work started by this job has returned
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if all work returned within the timeout, False otherwise
+        """
+        deadline = time.monotonic() + timeout
+        while any(not finished.is_set() for finished in self._executor_work):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+
+        self._executor_work.clear()
+        return True
+
     async def _notify_status(self, message: str) -> None:
         """Send a notification about job status"""
         try:
@@ -149,9 +283,10 @@ class Job(DBSessionMixin, ABC):
     async def stop(self) -> None:
         """Stop the job and perform cleanup.
 
-        This method first calls the job-specific stop_handler for cleanup,
-        then marks the job as cancelled.
+        This method signals executor work to stop, calls the job-specific
+        stop_handler for cleanup, then marks the job as cancelled.
         """
+        self.request_cancellation()
         await self.stop_handler()
         await self.cancel()
 
@@ -205,17 +340,15 @@ class Job(DBSessionMixin, ABC):
         if not job_class:
             raise ValueError(f"Unknown job type: {record.type}")
 
-        # Create job instance with appropriate constructor arguments
-        if record.data:
-            job = job_class(**record.data)
-        else:
-            job = job_class()
+        # Create job instance with the constructor arguments it was submitted with
+        job = job_class(**(record.params or {}))
 
         # Restore job state
         job.id = record.id
         job.status = JobStatus(record.status)
         job.started_at = record.started_at
         job.completed_at = record.completed_at
+        job.checkpoint = record.checkpoint
 
         if record.success is not None:
             job.result = JobResult.from_record(record)
@@ -0,0 +1,22 @@
+"""Built-in jobs registration"""
+
+from typing import Dict, Type
+from src.jobs.base import Job
+from src.jobs.indexer import IndexerJob
+from src.jobs.embed import EmbedJob
+from src.jobs.file_search import FileSearchJob
+from src.jobs.github_monitor import GithubMonitorJob
+from src.jobs.proxy_monitor import ProxyMonitorJob
+from src.jobs.autobot import AutobotJob
+
+
+def get_builtin_jobs() -> Dict[str, Type[Job]]:
+    """Get all built-in job classes keyed by the job type they register under"""
+    return {
+        "indexer": IndexerJob,
+        "embed": EmbedJob,
+        "file_search": FileSearchJob,
+        "github_monitor": GithubMonitorJob,
+        "proxy_monitor": ProxyMonitorJob,
+        "autobot": AutobotJob,
+    }
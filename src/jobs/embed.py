@@ -16,6 +16,7 @@ class EmbedJob(Job, DBSessionMixin):
     """Job to generate embeddings for all assets in the database"""
 
     BATCH_SIZE = 10  # Commit every 10 assets
+    resumable = True
 
     def __init__(self):
         Job.__init__(self, "embed")
@@ -35,8 +36,12 @@ class EmbedJob(Job, DBSessionMixin):
             self.logger.info(f"Starting embedding generation using model: {model}")
 
             async with self.get_async_session() as session:
-                # Get all assets with their projects eagerly loaded
-                query = select(Asset).options(joinedload(Asset.project))
+                # Get all assets with their projects eagerly loaded, in a stable order for checkpointing
+                query = select(Asset).options(joinedload(Asset.project)).order_by(Asset.id)
+                last_asset_id = (self.checkpoint or {}).get("last_asset_id")
+                if last_asset_id is not None:
+                    self.logger.info(f"Resuming after asset {last_asset_id}")
+                    query = query.where(Asset.id > last_asset_id)
                 result = await session.execute(query)
                 assets = result.scalars().all()
 
@@ -98,6 +103,7 @@ class EmbedJob(Job, DBSessionMixin):
                                 await session.commit()
                                 self._commit_count += 1
                                 self.logger.info(f"Commit #{self._commit_count} successful")
+                                self.save_checkpoint({"last_asset_id": asset.id})
                                 current_batch = []  # Clear batch after successful commit
                                 await sleep(0.1)  # Yield after each commit
                             except Exception as e:
@@ -1,12 +1,13 @@
 from src.jobs.base import Job, JobResult
 from src.backend.database import DBSessionMixin
+from src.backend.blob_store import BlobStore
 from src.util.logging import Logger
 import os
 import re
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from src.models.base import Asset
-import asyncio
 from src.config.config import Config
+from src.util.cancellation import CancellationToken
 
 
 def is_binary_file(file_path: str) -> bool:
@@ -80,9 +81,18 @@ class FileSearchJob(Job, DBSessionMixin):
             config.get("file_search.allowed_extensions", [".sol", ".cairo", ".rs", ".vy", ".fe", ".move", ".yul"])
         )
         self.logger.info(f"Using allowed extensions: {self.allowed_extensions}")
+
+        # Files in asset trees are deduplicated, so identical content is searched once per job
+        self.blob_store = BlobStore()
+        self._blob_matches: Dict[str, List[Dict]] = {}
+        self.duplicates_skipped = 0
         if project_ids:
             self.logger.info(f"Filtering by project IDs: {project_ids}")
 
+    def get_params(self) -> Dict[str, Any]:
+        """Get the constructor arguments of this job"""
+        return {"regex_pattern": self.config["pattern"], "project_ids": self.config["project_ids"]}
+
     def _should_skip_file(self, file_path: str) -> bool:
         """Check if we should skip this file"""
         _, ext = os.path.splitext(file_path.lower())
@@ -121,15 +131,37 @@ class FileSearchJob(Job, DBSessionMixin):
             self.logger.error(f"Error searching file {file_path}: {str(e)}")
             return []
 
-    def _search_directory(self, directory: str, pattern: re.Pattern) -> List[Dict]:
-        """Recursively search a directory for regex matches"""
+    def _search_blob(self, file_path: str, pattern: re.Pattern) -> List[Dict]:
+        """Search a file, reusing the matches of an identical file already searched in this job"""
+        digest = self.blob_store.digest_of(file_path)
+        if digest is None:
+            return self._search_file(file_path, pattern)
+        if digest in self._blob_matches:
+            self.duplicates_skipped += 1
+            return self._blob_matches[digest]
+        file_matches = self._search_file(file_path, pattern)
+        self._blob_matches[digest] = file_matches
+        return file_matches
+
+    def _search_directory(
+        self, directory: str, pattern: re.Pattern, cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict]:
+        """Recursively search a directory for regex matches
+
+        Runs in an executor thread. The cancel token is checked between files so that a
+        cancelled search stops scanning instead of running to completion.
+        """
         matches = []
         try:
             for root, _, files in os.walk(directory):
                 for file in files:
+                    if cancel_token and cancel_token.is_cancelled:
+                        self.logger.info(f"Search of {directory} cancelled")
+                        return matches
+
                     file_path = os.path.join(root, file)
                     try:
-                        file_matches = self._search_file(file_path, pattern)
+                        file_matches = self._search_blob(file_path, pattern)
                         if file_matches:
                             matches.append({"file_path": file_path, "matches": file_matches})
                     except Exception as e:
@@ -142,13 +174,11 @@ class FileSearchJob(Job, DBSessionMixin):
 
     async def _search_file_async(self, file_path: str, pattern: re.Pattern) -> List[Dict]:
         """Search a single file for regex matches asynchronously"""
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._search_file, file_path, pattern)
+        return await self.run_in_executor(self._search_file, file_path, pattern)
 
     async def _search_directory_async(self, directory: str, pattern: re.Pattern) -> List[Dict]:
         """Recursively search a directory for regex matches asynchronously"""
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._search_directory, directory, pattern)
+        return await self.run_in_executor(self._search_directory, directory, pattern, self.cancel_token)
 
     async def start(self) -> None:
         """Start the file search job"""
@@ -206,7 +236,7 @@ class FileSearchJob(Job, DBSessionMixin):
             result = JobResult(
                 success=True,
                 message=f"Found {total_matches} matches across {len(results)} assets",
-                data={"results": results},
+                data={"results": results, "duplicates_skipped": self.duplicates_skipped},
             )
 
             # Format results as a table
@@ -1,17 +1,26 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from src.jobs.base import Job, JobResult, JobStatus
 from src.models.github import GitHubRepoState
 from src.handlers.base import HandlerTrigger
 from src.config.config import Config
+from src.util.github import GITHUB_API_URL
+from src.util.http import HttpClient
 from src.util.logging import Logger
+from src.util.rate_limit import QuotaScheduler, RateLimitExceeded
 from src.backend.database import DBSessionMixin
 from src.handlers.registry import HandlerRegistry
-import aiohttp
 from sqlalchemy import text
 from datetime import datetime, timezone, timedelta
 import asyncio
 from urllib.parse import urlparse
 
+# Repositories checked at once
+DEFAULT_CONCURRENCY = 4
+# Requests of each rate-limit window left for commands and other jobs
+DEFAULT_RATE_LIMIT_RESERVE = 10
+# Seconds to wait for a request slot under the rate limit before deferring the remaining repositories
+DEFAULT_MAX_RATE_LIMIT_WAIT = 60
+
 
 class GithubMonitorJob(Job, DBSessionMixin):
     """Job that polls GitHub API for repository updates"""
@@ -28,9 +37,18 @@ class GithubMonitorJob(Job, DBSessionMixin):
         self.api_token = github_config.get("api_token")
         self.logger.info(f"Github API token configured: {bool(self.api_token)}")
         self.session = None
+        self.headers = {}
         self.handler_registry = HandlerRegistry()
         self._stop_event = asyncio.Event()
 
+        self.concurrency = github_config.get("concurrency", DEFAULT_CONCURRENCY)
+        # Spreads the requests over the quota GitHub reports in its rate-limit headers
+        self.quota = QuotaScheduler(
+            reserve=github_config.get("rate_limit_reserve", DEFAULT_RATE_LIMIT_RESERVE),
+            max_wait=github_config.get("max_rate_limit_wait", DEFAULT_MAX_RATE_LIMIT_WAIT),
+            burst=self.concurrency,
+        )
+
         # Log configuration state
         self.logger.info(
             "GitHub monitor initialized with config:",
@@ -51,7 +69,8 @@ class GithubMonitorJob(Job, DBSessionMixin):
         else:
             self.logger.warning("No GitHub API token configured - rate limits will be strict")
 
-        self.session = aiohttp.ClientSession(headers=headers)
+        self.headers = headers
+        self.session = HttpClient()
         self.logger.debug(
             "GitHub API session initialized",
             extra_data={"headers": {k: "..." if k == "Authorization" else v for k, v in headers.items()}},
@@ -76,20 +95,21 @@ class GithubMonitorJob(Job, DBSessionMixin):
 
                 self.logger.info(f"Found {len(repos)} repositories to check")
 
-                # Check each repo for updates
-                for repo in repos:
-                    try:
-                        await self._check_repo_updates(repo)
-                    except Exception as e:
-                        self.logger.error(f"Failed to check repo {repo['repo_url']}: {str(e)}")
-                        continue
+                # Check the repos concurrently, repos that run out of quota are deferred to the next run
+                semaphore = asyncio.Semaphore(self.concurrency)
+                outcomes = await asyncio.gather(*(self._check_repo(repo, semaphore) for repo in repos))
+                counts = {outcome: outcomes.count(outcome) for outcome in ("checked", "deferred", "failed")}
 
-                # Clean up
-                if self.session:
-                    await self.session.close()
+                message = f"GitHub monitoring completed: checked {counts['checked']} of {len(repos)} repositories"
+                if counts["deferred"]:
+                    message += f", {counts['deferred']} deferred to the next rate-limit window"
+                if counts["failed"]:
+                    message += f", {counts['failed']} failed"
 
                 # Complete the job
-                await self.complete(JobResult(success=True, message="GitHub monitoring completed"))
+                await self.complete(
+                    JobResult(success=True, message=message, data={**counts, "rate_limit": self.quota.to_dict()})
+                )
 
             except Exception as e:
                 self.logger.error(f"Error in monitoring cycle: {str(e)}")
@@ -100,11 +120,27 @@ class GithubMonitorJob(Job, DBSessionMixin):
             await self.fail(str(e))
             raise
 
+    async def _check_repo(self, repo: Dict[str, Any], semaphore: asyncio.Semaphore) -> str:
+        """Check a repo for updates once a slot is free
+
+        Returns:
+            "checked", "deferred" if the rate limit ran out, or "failed"
+        """
+        async with semaphore:
+            try:
+                await self._check_repo_updates(repo)
+                return "checked"
+            except RateLimitExceeded as e:
+                # The repo state is left alone, so the next run picks up from the same point
+                self.logger.info(f"Deferring {repo['repo_url']}: {str(e)}")
+                return "deferred"
+            except Exception as e:
+                self.logger.error(f"Failed to check repo {repo['repo_url']}: {str(e)}")
+                return "failed"
+
     async def stop_handler(self) -> None:
         """Stop the monitoring job"""
         self._stop_event.set()
-        if self.session:
-            await self.session.close()
 
     async def _wait_or_stop(self) -> None:
         """Wait for the next check interval or stop if requested"""
@@ -146,9 +182,13 @@ class GithubMonitorJob(Job, DBSessionMixin):
                         r.source_url as repo_url,
                         s.last_commit_sha,
                         s.last_pr_number,
-                        s.last_check
+                        s.last_check,
+                        s.commits_etag,
+                        s.pulls_etag
                     FROM repo_urls r
                     LEFT JOIN github_repo_state s ON r.source_url = s.repo_url
+                    -- Repos that were deferred or never checked go first
+                    ORDER BY s.last_check ASC NULLS FIRST
                 """
                 )
 
@@ -167,6 +207,8 @@ class GithubMonitorJob(Job, DBSessionMixin):
                         "last_commit_sha": row.last_commit_sha,
                         "last_pr_number": row.last_pr_number,
                         "last_check": row.last_check,
+                        "commits_etag": row.commits_etag,
+                        "pulls_etag": row.pulls_etag,
                     }
                     for row in rows
                 ]
@@ -176,7 +218,11 @@ class GithubMonitorJob(Job, DBSessionMixin):
             return []
 
     async def _check_repo_updates(self, repo: Dict[str, Any]) -> None:
-        """Check a single repository for updates"""
+        """Check a single repository for updates
+
+        Raises:
+            RateLimitExceeded: If the rate limit ran out before the repo was checked
+        """
         repo_url = repo["repo_url"]
         owner, name = self._parse_repo_url(repo_url)
         if not owner or not name:
@@ -193,12 +239,17 @@ class GithubMonitorJob(Job, DBSessionMixin):
             cutoff_time = datetime.now(timezone.utc) - timedelta(days=1)
             self.logger.info(f"New repo - using default cutoff time: {cutoff_time}")
 
+        # Changes made while the repo is being checked are picked up by the next check
+        checked_at = datetime.utcnow()
+
         # Check commits and PRs in parallel
-        commits_task = self._get_new_commits(owner, name, cutoff_time)
-        prs_task = self._get_updated_prs(owner, name, cutoff_time)
+        commits_task = self._get_new_commits(owner, name, cutoff_time, etag=repo.get("commits_etag"))
+        prs_task = self._get_updated_prs(owner, name, cutoff_time, etag=repo.get("pulls_etag"))
 
         try:
-            commits, prs = await asyncio.gather(commits_task, prs_task)
+            (commits, commits_etag), (prs, pulls_etag) = await asyncio.gather(commits_task, prs_task)
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to fetch updates for {repo_url}: {str(e)}")
             return
@@ -243,9 +294,17 @@ class GithubMonitorJob(Job, DBSessionMixin):
                 last_pr_number = max(last_pr_number, pr_number)
 
         # Update repo state if we have new data
-        if newest_sha or last_pr_number > 0:
+        etags_changed = (commits_etag, pulls_etag) != (repo.get("commits_etag"), repo.get("pulls_etag"))
+        if newest_sha or last_pr_number > 0 or etags_changed:
             self.logger.debug(f"Updating repo state with newest_sha: {newest_sha}, last_pr_number: {last_pr_number}")
-            await self._update_repo_state(repo_url, newest_sha or repo.get("last_commit_sha"), last_pr_number)
+            await self._update_repo_state(
+                repo_url,
+                newest_sha or repo.get("last_commit_sha"),
+                last_pr_number,
+                checked_at=checked_at,
+                commits_etag=commits_etag,
+                pulls_etag=pulls_etag,
+            )
 
     def _parse_repo_url(self, url: str) -> tuple[Optional[str], Optional[str]]:
         """Parse owner and repo name from GitHub URL"""
@@ -263,69 +322,133 @@ class GithubMonitorJob(Job, DBSessionMixin):
 
         return None, None
 
-    async def _get_new_commits(self, owner: str, repo: str, since: datetime) -> List[Dict[str, Any]]:
-        """Get new commits for a repository"""
+    def _raise_if_rate_limited(self, response) -> None:
+        """Raise if a 403/429 response is a rate-limit reply rather than a permission error
+
+        Raises:
+            RateLimitExceeded: With the time the quota resets
+        """
+        retry_after = response.headers.get("Retry-After")
+        if response.status == 429 or retry_after or response.headers.get("X-RateLimit-Remaining") == "0":
+            self.quota.exhaust(float(retry_after) if retry_after and retry_after.isdigit() else None)
+            raise RateLimitExceeded(self.quota.reset_at)
+
+    def _conditional_headers(self, etag: Optional[str]) -> Dict[str, str]:
+        """Get the request headers, asking GitHub to answer 304 if the response still has the given ETag"""
+        if not etag:
+            return self.headers
+        return {**self.headers, "If-None-Match": etag}
+
+    async def _get_new_commits(
+        self, owner: str, repo: str, since: datetime, etag: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get new commits for a repository
+
+        Args:
+            etag: ETag of the last response, nothing is returned if the commits did not change
+
+        Returns:
+            The commits and the ETag to send next time
+        """
         if not self.session:
             self.logger.warning("No session available for GitHub API calls")
-            return []
+            return [], None
 
         try:
-            url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+            url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits"
             params = {"since": since.isoformat()}
 
             self.logger.debug(f"Fetching commits from {url}", extra_data={"params": params})
-            response = await self.session.get(url, params=params)
-
-            self.logger.debug(f"Commits API response status: {response.status}")
-            if response.status == 200:
-                data = await response.json() or []
-                self.logger.debug(f"Found {len(data)} commits")
-                return data
-            elif response.status == 403:
-                self.logger.warning("GitHub API rate limit exceeded or authentication required")
-            elif response.status == 404:
-                self.logger.warning(f"Repository not found: {owner}/{repo}")
-            else:
-                response_text = await response.text()
-                self.logger.warning(f"Failed to get commits: HTTP {response.status}", extra_data={"response": response_text})
-            return []
+            await self.quota.acquire()
+            async with self.session.get(url, params=params, headers=self._conditional_headers(etag)) as response:
+                self.quota.update(response.headers)
+                self.logger.debug(f"Commits API response status: {response.status}")
+                if response.status == 304:
+                    # Conditional requests answered with 304 don't count against the rate limit
+                    self.quota.refund()
+                    self.logger.debug("Commits not modified")
+                    return [], etag
+                if response.status == 200:
+                    data = await response.json() or []
+                    self.logger.debug(f"Found {len(data)} commits")
+                    return data, response.headers.get("ETag")
+                elif response.status in (403, 429):
+                    self._raise_if_rate_limited(response)
+                    self.logger.warning("GitHub API authentication required")
+                elif response.status == 404:
+                    self.logger.warning(f"Repository not found: {owner}/{repo}")
+                else:
+                    response_text = await response.text()
+                    self.logger.warning(
+                        f"Failed to get commits: HTTP {response.status}", extra_data={"response": response_text}
+                    )
+            return [], None
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Error fetching commits: {str(e)}")
-            return []
+            return [], None
+
+    async def _get_updated_prs(
+        self, owner: str, repo: str, since: datetime, etag: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get updated pull requests for a repository
+
+        Args:
+            etag: ETag of the last response, nothing is returned if the pull requests did not change
 
-    async def _get_updated_prs(self, owner: str, repo: str, since: datetime) -> List[Dict[str, Any]]:
-        """Get updated pull requests for a repository"""
+        Returns:
+            The pull requests and the ETag to send next time
+        """
         if not self.session:
             self.logger.warning("No session available for GitHub API calls")
-            return []
+            return [], None
 
         try:
-            url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
+            url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls"
             params = {"state": "all", "sort": "updated", "direction": "desc"}
 
             self.logger.debug(f"Fetching PRs from {url}", extra_data={"params": params})
-            response = await self.session.get(url, params=params)
-
-            self.logger.debug(f"PRs API response status: {response.status}")
-            if response.status == 200:
-                prs = await response.json() or []
-                self.logger.debug(f"Found {len(prs)} PRs before filtering")
-                filtered_prs = [pr for pr in prs if datetime.fromisoformat(pr["updated_at"].replace("Z", "+00:00")) > since]
-                self.logger.debug(f"Found {len(filtered_prs)} PRs after filtering by date")
-                return filtered_prs
-            elif response.status == 403:
-                self.logger.warning("GitHub API rate limit exceeded or authentication required")
-            elif response.status == 404:
-                self.logger.warning(f"Repository not found: {owner}/{repo}")
-            else:
-                response_text = await response.text()
-                self.logger.warning(f"Failed to get PRs: HTTP {response.status}", extra_data={"response": response_text})
-            return []
+            await self.quota.acquire()
+            async with self.session.get(url, params=params, headers=self._conditional_headers(etag)) as response:
+                self.quota.update(response.headers)
+                self.logger.debug(f"PRs API response status: {response.status}")
+                if response.status == 304:
+                    self.quota.refund()
+                    self.logger.debug("PRs not modified")
+                    return [], etag
+                if response.status == 200:
+                    prs = await response.json() or []
+                    self.logger.debug(f"Found {len(prs)} PRs before filtering")
+                    filtered_prs = [
+                        pr for pr in prs if datetime.fromisoformat(pr["updated_at"].replace("Z", "+00:00")) > since
+                    ]
+                    self.logger.debug(f"Found {len(filtered_prs)} PRs after filtering by date")
+                    return filtered_prs, response.headers.get("ETag")
+                elif response.status in (403, 429):
+                    self._raise_if_rate_limited(response)
+                    self.logger.warning("GitHub API authentication required")
+                elif response.status == 404:
+                    self.logger.warning(f"Repository not found: {owner}/{repo}")
+                else:
+                    response_text = await response.text()
+                    self.logger.warning(f"Failed to get PRs: HTTP {response.status}", extra_data={"response": response_text})
+            return [], None
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Error fetching PRs: {str(e)}")
-            return []
-
-    async def _update_repo_state(self, repo_url: str, commit_sha: str, pr_number: int) -> None:
+            return [], None
+
+    async def _update_repo_state(
+        self,
+        repo_url: str,
+        commit_sha: str,
+        pr_number: int,
+        checked_at: Optional[datetime] = None,
+        commits_etag: Optional[str] = None,
+        pulls_etag: Optional[str] = None,
+    ) -> None:
         """Update repository state in database"""
         try:
             async with self.get_async_session() as session:
@@ -336,7 +459,9 @@ class GithubMonitorJob(Job, DBSessionMixin):
 
                 state.last_commit_sha = commit_sha
                 state.last_pr_number = pr_number
-                state.last_check = datetime.utcnow()
+                state.last_check = checked_at or datetime.utcnow()
+                state.commits_etag = commits_etag
+                state.pulls_etag = pulls_etag
                 await session.commit()
 
         except Exception as e:
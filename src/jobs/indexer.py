@@ -3,11 +3,14 @@ from src.jobs.base import Job, JobResult, JobStatus
 from src.indexers.immunefi import ImmunefiIndexer
 from src.backend.database import DBSessionMixin
 import threading
+from typing import Any, Dict
 
 
 class IndexerJob(Job, DBSessionMixin):
     """Job to run an indexer"""
 
+    resumable = True
+
     def __init__(self, platform: str, initialize_mode: bool = False):
         Job.__init__(self, "indexer")
         DBSessionMixin.__init__(self)
@@ -17,6 +20,10 @@ class IndexerJob(Job, DBSessionMixin):
         self._executor = None
         self._task = None
 
+    def get_params(self) -> Dict[str, Any]:
+        """Get the constructor arguments of this job"""
+        return {"platform": self.platform, "initialize_mode": self.initialize_mode}
+
     async def start(self) -> None:
         """Start the indexer"""
         try:
@@ -25,18 +32,33 @@ class IndexerJob(Job, DBSessionMixin):
             # Run the indexer directly in this event loop
             with self.get_session() as session:
                 if self.platform == "immunefi":
-                    indexer = ImmunefiIndexer(session=session, initialize_mode=self.initialize_mode)
+                    indexer = ImmunefiIndexer(
+                        session=session,
+                        initialize_mode=self.initialize_mode,
+                        resume_after=(self.checkpoint or {}).get("last_project"),
+                        on_project_indexed=self._on_project_indexed,
+                    )
                     # Pass stop event to indexer
                     indexer._stop_event = self._stop_event
-                    await indexer.index()
+                    stats = await indexer.index() or {}
 
-                    await self.complete(JobResult(success=True, message=f"Successfully indexed {self.platform}"))
+                    result = JobResult(success=True, message=f"Successfully indexed {self.platform}", data=stats)
+                    for stage, metrics in stats.get("stages", {}).items():
+                        result.add_output(
+                            f"{stage}: {metrics['processed']} processed, {metrics['failed']} failed, "
+                            f"{metrics['throughput'] or 0}/s, max queue {metrics['max_queue_depth']}/{metrics['queue_size']}"
+                        )
+                    await self.complete(result)
                 else:
                     raise ValueError(f"Unknown platform: {self.platform}")
 
         except asyncio.CancelledError:
-            self.logger.info("Indexer job cancelled")
-            await self.cancel()
+            if self.interrupted:
+                # The job is left pending and resumes from its checkpoint, so it is not reported as cancelled
+                self.logger.info("Indexer job interrupted by shutdown")
+            else:
+                self.logger.info("Indexer job cancelled")
+                await self.cancel()
             raise
 
         except Exception as e:
@@ -44,6 +66,10 @@ class IndexerJob(Job, DBSessionMixin):
             await self.fail(str(e))
             raise
 
+    async def _on_project_indexed(self, project_name: str) -> None:
+        """Checkpoint the last processed project"""
+        self.save_checkpoint({"last_project": project_name})
+
     async def stop_handler(self) -> None:
         """Stop the indexer"""
         self.logger.info("Stopping indexer job...")
@@ -6,6 +6,9 @@ from src.jobs.base import Job, JobStatus, JobResult
 from src.util.logging import Logger
 from src.backend.database import DBSessionMixin
 from src.models.job import JobRecord
+from src.config.config import Config
+from src.util.resource_usage import ResourceUsage, track_usage
+from sqlalchemy import and_, or_
 from datetime import datetime, timedelta
 import time
 
@@ -15,6 +18,7 @@ class JobManager(DBSessionMixin):
 
     _instance = None
     _lock = asyncio.Lock()
+    _job_classes: Dict[str, Type[Job]] = {}
 
     def __new__(cls):
         if cls._instance is None:
@@ -35,7 +39,44 @@ class JobManager(DBSessionMixin):
         self.logger = Logger("JobManager")
         self._running_jobs: Dict[str, Job] = {}  # Jobs in memory
         self._tasks: Dict[str, asyncio.Task] = {}
+        self._fingerprints: Dict[str, str] = {}  # Fingerprint -> ID of the job in flight
         self._running = False
+        self._shutting_down = False
+        # In distributed mode jobs are only enqueued here and executed by `legion worker` processes
+        self.distributed = Config().get("jobs.distributed", False)
+        # Seconds for which a successful result is reused for identical submissions
+        self.dedup_ttl = Config().get("jobs.dedup_ttl", 0)
+        # Seconds a cancelled job gets to release executor threads before it is reported as stuck
+        self.cancel_timeout = Config().get("jobs.cancel_timeout", 10)
+
+    @classmethod
+    def register_job_class(cls, job_type: str, job_class: Type[Job]) -> None:
+        """Register a job class so that it can be recreated from a database record
+
+        Args:
+            job_type: The job type the class registers under
+            job_class: The job class
+        """
+        cls._job_classes[job_type] = job_class
+
+    @classmethod
+    def get_job_class(cls, job_type: str) -> Optional[Type[Job]]:
+        """Get the job class registered for a job type
+
+        Args:
+            job_type: The job type
+
+        Returns:
+            The job class if registered, None otherwise
+        """
+        if job_type not in cls._job_classes:
+            # Import here to avoid circular imports
+            from src.jobs.builtin import get_builtin_jobs
+
+            for builtin_type, job_class in get_builtin_jobs().items():
+                cls._job_classes.setdefault(builtin_type, job_class)
+
+        return cls._job_classes.get(job_type)
 
     async def start(self) -> None:
         """Start the job manager"""
@@ -44,6 +85,7 @@ class JobManager(DBSessionMixin):
 
         self.logger.info("Starting job manager")
         self._running = True
+        self._shutting_down = False
 
         # Clean up any stale jobs from previous runs
         self._running_jobs.clear()
@@ -55,6 +97,13 @@ class JobManager(DBSessionMixin):
             return
 
         self.logger.info("Stopping job manager")
+        # Resumable jobs are requeued instead of cancelled
+        self._shutting_down = True
+
+        # Tell executor work to stop before cancelling the tasks waiting for it
+        jobs = list(self._running_jobs.values())
+        for job in jobs:
+            job.request_cancellation(shutdown=True)
 
         # Cancel all running tasks
         for job_id, task in list(self._tasks.items()):
@@ -67,6 +116,10 @@ class JobManager(DBSessionMixin):
                 except Exception as e:
                     self.logger.error(f"Error cancelling task {job_id}: {e}")
 
+        for job in jobs:
+            if not await job.wait_for_release(self.cancel_timeout):
+                self.logger.warning(f"Job {job.id} did not release its executor threads within {self.cancel_timeout}s")
+
         # Mark any remaining running jobs as failed
         for job in list(self._running_jobs.values()):
             try:
@@ -87,7 +140,63 @@ class JobManager(DBSessionMixin):
 
         self._running_jobs.clear()
         self._tasks.clear()
+        self._fingerprints.clear()
         self._running = False
+        self._shutting_down = False
+
+    async def resume_interrupted_jobs(self) -> List[str]:
+        """Restart jobs that were interrupted by a server shutdown or crash
+
+        Resumable jobs continue from their last checkpoint. Other jobs left behind by the
+        previous server process are marked as failed. In distributed mode this is left to
+        the workers, which requeue jobs of stopped workers themselves.
+
+        Returns:
+            IDs of the resumed jobs
+        """
+        if self.distributed:
+            return []
+
+        resumed = []
+        with self.get_session() as session:
+            records = (
+                session.query(JobRecord)
+                .filter(JobRecord.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]))
+                .order_by(JobRecord.created_at)
+                .all()
+            )
+
+            for record in records:
+                if record.id in self._running_jobs:
+                    continue
+
+                job_class = self.get_job_class(record.type)
+                if not job_class or not job_class.resumable:
+                    record.status = JobStatus.FAILED.value
+                    record.success = False
+                    record.message = "Job terminated due to server shutdown"
+                    record.completed_at = record.completed_at or datetime.utcnow()
+                    continue
+
+                try:
+                    job = Job.from_record(record)
+                except Exception as e:
+                    self.logger.error(f"Failed to restore job {record.id}: {e}")
+                    record.status = JobStatus.FAILED.value
+                    record.success = False
+                    record.message = f"Failed to resume job: {e}"
+                    record.completed_at = datetime.utcnow()
+                    continue
+
+                self.logger.info(f"Resuming job {job.id} ({job.type}) from checkpoint {job.checkpoint}")
+                if record.fingerprint:
+                    self._fingerprints[record.fingerprint] = job.id
+                self.run_job_in_background(job)
+                resumed.append(job.id)
+
+            session.commit()
+
+        return resumed
 
     async def stop_job(self, job_id: str) -> bool:
         """Stop a specific job
@@ -100,6 +209,8 @@ class JobManager(DBSessionMixin):
         """
         job = self._running_jobs.get(job_id)
         if not job:
+            if self.distributed:
+                return self._cancel_queued_job(job_id)
             self.logger.warning(f"Job {job_id} not found")
             return False
 
@@ -108,6 +219,10 @@ class JobManager(DBSessionMixin):
             from src.jobs.notification import JobNotifier
 
             self.logger.info(f"Stopping job {job_id}")
+            cancel_started = time.monotonic()
+
+            # Tell executor work to stop at its next check
+            job.request_cancellation()
 
             # Cancel the task if it exists
             if job_id in self._tasks:
@@ -129,12 +244,23 @@ class JobManager(DBSessionMixin):
             job.status = JobStatus.CANCELLED
             job.completed_at = datetime.utcnow()
 
+            # Wait for executor threads to return and report how long releasing took
+            released = await job.wait_for_release(self.cancel_timeout)
+            release_time = time.monotonic() - cancel_started
+            if released:
+                message = f"Job cancelled by user, resources released in {release_time:.2f}s"
+            else:
+                message = f"Job cancelled by user, executor work still running after {release_time:.2f}s"
+                self.logger.warning(f"Job {job_id} did not release its executor threads within {self.cancel_timeout}s")
+            self.logger.info(message)
+
             # Update job record in database
             with self.get_session() as session:
                 job_record = session.query(JobRecord).filter(JobRecord.id == job_id).first()
                 if job_record:
                     job_record.status = JobStatus.CANCELLED.value
                     job_record.completed_at = job.completed_at
+                    job_record.message = message
                     session.commit()
 
             # Send cancellation notification
@@ -143,7 +269,7 @@ class JobManager(DBSessionMixin):
                 job_id=job.id,
                 job_type=job.type,
                 status=JobStatus.CANCELLED.value,
-                message="Job cancelled by user",
+                message=message,
                 started_at=job.started_at,
                 completed_at=job.completed_at,
             )
@@ -163,6 +289,42 @@ class JobManager(DBSessionMixin):
                 del self._tasks[job_id]
             return False
 
+    def _cancel_queued_job(self, job_id: str) -> bool:
+        """Cancel a job that is queued or running on a worker process
+
+        Workers notice the status change on their next heartbeat and stop the job.
+
+        Args:
+            job_id: ID of the job to cancel
+
+        Returns:
+            True if the job was cancelled, False if job not found or already finished
+        """
+        try:
+            with self.get_session() as session:
+                job_record = (
+                    session.query(JobRecord)
+                    .filter(
+                        JobRecord.id == job_id,
+                        JobRecord.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]),
+                    )
+                    .first()
+                )
+                if not job_record:
+                    self.logger.warning(f"Job {job_id} not found")
+                    return False
+
+                job_record.status = JobStatus.CANCELLED.value
+                job_record.completed_at = datetime.utcnow()
+                session.commit()
+
+            self.logger.info(f"Cancelled queued job {job_id}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to cancel job {job_id}: {e}")
+            return False
+
     async def delete_job(self, job_id: str) -> bool:
         """Delete a job and its database record
 
@@ -204,6 +366,24 @@ class JobManager(DBSessionMixin):
         """
         return self._running_jobs.get(job_id)
 
+    def is_job_active(self, job_id: str) -> bool:
+        """Check whether a job is still queued or running
+
+        Args:
+            job_id: ID of the job to check
+
+        Returns:
+            True if the job runs in this process or, in distributed mode, is pending or running on a worker
+        """
+        if job_id in self._running_jobs:
+            return True
+        if not self.distributed:
+            return False
+
+        with self.get_session() as session:
+            job_record = session.query(JobRecord).filter(JobRecord.id == job_id).first()
+            return bool(job_record and job_record.status in (JobStatus.PENDING.value, JobStatus.RUNNING.value))
+
     def get_most_recent_finished_job(self) -> Optional[JobRecord]:
         """Get the most recently finished job from the database.
 
@@ -247,6 +427,30 @@ class JobManager(DBSessionMixin):
                     if not job_type or job.type == job_type
                 ]
 
+            # Get queued jobs and jobs running on worker processes
+            queued_jobs = []
+            if self.distributed and status in (None, JobStatus.PENDING, JobStatus.RUNNING):
+                statuses = [status.value] if status else [JobStatus.PENDING.value, JobStatus.RUNNING.value]
+                with self.get_session() as session:
+                    query = session.query(JobRecord).filter(JobRecord.status.in_(statuses))
+                    if job_type:
+                        query = query.filter(JobRecord.type == job_type)
+
+                    queued_jobs = [
+                        {
+                            "id": job.id,
+                            "type": job.type,
+                            "status": job.status,
+                            "started_at": job.started_at.isoformat() if job.started_at else None,
+                            "completed_at": None,
+                            "success": None,
+                            "message": f"Claimed by {job.worker_id}" if job.worker_id else None,
+                            "outputs": [],
+                        }
+                        for job in query.all()
+                        if job.id not in self._running_jobs
+                    ]
+
             # Get completed jobs from database (last 24 hours)
             completed_jobs = []
             if status != JobStatus.RUNNING:
@@ -280,25 +484,77 @@ class JobManager(DBSessionMixin):
                     ]
 
             # Combine and sort by started_at
-            all_jobs = running_jobs + completed_jobs
+            all_jobs = running_jobs + queued_jobs + completed_jobs
             return sorted(all_jobs, key=lambda x: x["started_at"] or "", reverse=True)
 
         except Exception as e:
             self.logger.error(f"Error listing jobs: {e}")
             return []
 
-    async def submit_job(self, job: Job) -> str:
+    def find_duplicate(self, fingerprint: str) -> Optional[str]:
+        """Find a job doing the same work as a new submission
+
+        Args:
+            fingerprint: Fingerprint of the submitted job
+
+        Returns:
+            ID of a job in flight or of a successful job completed within the dedup TTL, None otherwise
+        """
+        job_id = self._fingerprints.get(fingerprint)
+        if job_id and job_id in self._running_jobs:
+            return job_id
+
+        conditions = []
+        if self.distributed:
+            # Jobs queued or running on worker processes
+            conditions.append(JobRecord.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]))
+        if self.dedup_ttl:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.dedup_ttl)
+            conditions.append(
+                and_(
+                    JobRecord.status == JobStatus.COMPLETED.value,
+                    JobRecord.success.is_(True),
+                    JobRecord.completed_at >= cutoff,
+                )
+            )
+        if not conditions:
+            return None
+
+        with self.get_session() as session:
+            job_record = (
+                session.query(JobRecord)
+                .filter(JobRecord.fingerprint == fingerprint, or_(*conditions))
+                .order_by(JobRecord.created_at.desc())
+                .first()
+            )
+            return job_record.id if job_record else None
+
+    async def submit_job(self, job: Job, deduplicate: bool = True) -> str:
         """Submit a new job for execution
 
+        Identical submissions attach to the job already in flight, or reuse a fresh
+        result within the jobs.dedup_ttl window, instead of starting a duplicate.
+
         Args:
             job: The job to submit
+            deduplicate: Set to False to always start a new run
 
         Returns:
-            The job ID
+            The job ID, which is the ID of the existing job if the submission was deduplicated
         """
         if not self._running:
             raise RuntimeError("Job manager is not running")
 
+        fingerprint = job.get_fingerprint()
+        if deduplicate and fingerprint:
+            existing_id = self.find_duplicate(fingerprint)
+            if existing_id:
+                self.logger.info(f"Job {job.type} matches job {existing_id}, attaching instead of starting a duplicate")
+                return existing_id
+
+        if self.distributed and self.get_job_class(job.type):
+            return self._enqueue_job(job, fingerprint)
+
         try:
             # Create database record and register job in a single transaction
             with self.get_session() as session:
@@ -313,6 +569,8 @@ class JobManager(DBSessionMixin):
                     message=None,
                     data=None,
                     outputs=[],
+                    params=job.get_params(),
+                    fingerprint=fingerprint,
                 )
                 session.add(job_record)
 
@@ -321,15 +579,9 @@ class JobManager(DBSessionMixin):
                     self.logger.warning(f"Job {job.id} already registered")
                     return job.id
 
-                self._running_jobs[job.id] = job
-                self.logger.info(f"Registered job: {job.id}")
-
-                # Create background task for job
-                task = asyncio.create_task(self._run_job(job))
-                self._tasks[job.id] = task
-
-                # Add task cleanup callback
-                task.add_done_callback(self._create_task_done_callback(job.id))
+                if fingerprint:
+                    self._fingerprints[fingerprint] = job.id
+                self.run_job_in_background(job)
 
                 # Commit the initial record
                 session.commit()
@@ -343,8 +595,60 @@ class JobManager(DBSessionMixin):
                 del self._running_jobs[job.id]
             if job.id in self._tasks:
                 del self._tasks[job.id]
+            if fingerprint and self._fingerprints.get(fingerprint) == job.id:
+                del self._fingerprints[fingerprint]
             raise
 
+    def _enqueue_job(self, job: Job, fingerprint: Optional[str] = None) -> str:
+        """Store a job as pending so that a worker process can claim it
+
+        Args:
+            job: The job to enqueue
+            fingerprint: Fingerprint of the job for deduplication
+
+        Returns:
+            The job ID
+        """
+        with self.get_session() as session:
+            job_record = JobRecord(
+                id=job.id,
+                type=job.type,
+                status=JobStatus.PENDING.value,
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow(),
+                outputs=[],
+                params=job.get_params(),
+                fingerprint=fingerprint,
+                attempts=0,
+            )
+            session.add(job_record)
+            session.commit()
+
+        self.logger.info(f"Enqueued job: {job.id}")
+        return job.id
+
+    def run_job_in_background(self, job: Job) -> asyncio.Task:
+        """Register a job in memory and run it in a background task
+
+        The job must already have a database record.
+
+        Args:
+            job: The job to run
+
+        Returns:
+            The task running the job
+        """
+        self._running_jobs[job.id] = job
+        self.logger.info(f"Registered job: {job.id}")
+
+        # Create background task for job
+        task = asyncio.create_task(self._run_job(job))
+        self._tasks[job.id] = task
+
+        # Add task cleanup callback
+        task.add_done_callback(self._create_task_done_callback(job.id))
+        return task
+
     def _create_task_done_callback(self, job_id: str):
         """Create a callback for task completion that properly handles the event loop
 
@@ -372,13 +676,24 @@ class JobManager(DBSessionMixin):
 
         return callback
 
+    def _get_job_record(self, session, job: Job) -> Optional[JobRecord]:
+        """Get the database record of a job owned by this process"""
+        query = session.query(JobRecord).filter(JobRecord.id == job.id)
+        worker_id = getattr(job, "worker_id", None)
+        if worker_id:
+            # Never overwrite a record that was requeued and claimed by another worker
+            query = query.filter(JobRecord.worker_id == worker_id)
+        return query.first()
+
     async def _run_job(self, job: Job) -> None:
         """Run a job and handle its lifecycle"""
+        usage = ResourceUsage()
         try:
-            # Start the job
-            job.status = JobStatus.RUNNING
-            job.started_at = datetime.utcnow()
-            await job.start()
+            # Start the job, attributing all resources used by it to this run
+            with track_usage(usage):
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.utcnow()
+                await job.start()
 
             # Job completed successfully
             job.status = JobStatus.COMPLETED
@@ -386,7 +701,7 @@ class JobManager(DBSessionMixin):
 
             # Store completed job in database
             with self.get_session() as session:
-                job_record = session.query(JobRecord).filter(JobRecord.id == job.id).first()
+                job_record = self._get_job_record(session, job)
                 if job_record:
                     job_record.status = job.status.value
                     job_record.started_at = job.started_at
@@ -395,6 +710,7 @@ class JobManager(DBSessionMixin):
                     job_record.message = job.result.message if job.result else None
                     job_record.data = job.result.data if job.result else None
                     job_record.outputs = job.result.outputs if job.result else []
+                    job_record.resource_usage = usage.to_dict()
                     session.commit()
 
             # Send completion notification
@@ -416,16 +732,22 @@ class JobManager(DBSessionMixin):
                 self.logger.error(f"Failed to send completion notification: {e}")
 
         except asyncio.CancelledError:
-            job.status = JobStatus.CANCELLED
-            job.completed_at = datetime.utcnow()
+            if self._shutting_down and job.resumable:
+                # Leave the job pending so that it resumes from its checkpoint on the next start
+                job.status = JobStatus.PENDING
+                job.completed_at = None
+            else:
+                job.status = JobStatus.CANCELLED
+                job.completed_at = datetime.utcnow()
 
             # Store cancelled job
             with self.get_session() as session:
-                job_record = session.query(JobRecord).filter(JobRecord.id == job.id).first()
+                job_record = self._get_job_record(session, job)
                 if job_record:
                     job_record.status = job.status.value
                     job_record.started_at = job.started_at
                     job_record.completed_at = job.completed_at
+                    job_record.resource_usage = usage.to_dict()
                     session.commit()
             raise
 
@@ -436,13 +758,14 @@ class JobManager(DBSessionMixin):
 
             # Store failed job
             with self.get_session() as session:
-                job_record = session.query(JobRecord).filter(JobRecord.id == job.id).first()
+                job_record = self._get_job_record(session, job)
                 if job_record:
                     job_record.status = job.status.value
                     job_record.started_at = job.started_at
                     job_record.completed_at = job.completed_at
                     job_record.success = False
                     job_record.message = error_msg
+                    job_record.resource_usage = usage.to_dict()
                     session.commit()
 
             # Send failure notification
@@ -465,6 +788,9 @@ class JobManager(DBSessionMixin):
             # Clean up memory
             if job.id in self._running_jobs:
                 del self._running_jobs[job.id]
+            for fingerprint, job_id in list(self._fingerprints.items()):
+                if job_id == job.id:
+                    del self._fingerprints[fingerprint]
 
     async def _notify_completion(self, job) -> None:
         """Send notification about job completion"""
@@ -489,6 +815,47 @@ class JobManager(DBSessionMixin):
         except Exception as e:
             self.logger.error(f"Failed to send job completion notification: {e}")
 
+    def get_resource_summary(self, hours: int = 24) -> Dict[str, Dict]:
+        """Summarize the resources used by finished jobs, grouped by job type
+
+        Args:
+            hours: Only include jobs that finished within this many hours
+
+        Returns:
+            Dictionary mapping job type to run count, totals and the largest peak RSS delta
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        summary: Dict[str, Dict] = {}
+
+        with self.get_session() as session:
+            records = (
+                session.query(JobRecord).filter(JobRecord.completed_at >= cutoff, JobRecord.resource_usage.isnot(None)).all()
+            )
+
+            for record in records:
+                usage = record.resource_usage or {}
+                totals = summary.setdefault(
+                    record.type,
+                    {
+                        "runs": 0,
+                        "wall_time": 0.0,
+                        "cpu_time": 0.0,
+                        "peak_rss_delta_kb": 0,
+                        "db_queries": 0,
+                        "db_time": 0.0,
+                        "http_requests": 0,
+                        "http_bytes": 0,
+                        "llm_tokens": 0,
+                    },
+                )
+                totals["runs"] += 1
+                totals["peak_rss_delta_kb"] = max(totals["peak_rss_delta_kb"], usage.get("peak_rss_delta_kb", 0))
+                totals["llm_tokens"] += usage.get("llm_prompt_tokens", 0) + usage.get("llm_completion_tokens", 0)
+                for key in ("wall_time", "cpu_time", "db_queries", "db_time", "http_requests", "http_bytes"):
+                    totals[key] += usage.get(key, 0)
+
+        return summary
+
     async def wait_for_job_result(self, job_id: str, timeout: int = 300) -> Optional[JobResult]:
         """Wait for a job to complete and return its result
 
@@ -1,20 +1,43 @@
 """Job to monitor proxy contracts and their implementations"""
 
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from src.jobs.base import Job, JobResult
 from src.models.base import Asset, AssetType
+from src.models.proxy import ProxyUpgrade
 from src.backend.database import DBSessionMixin
-from src.util.etherscan import EVMExplorer, fetch_verified_sources
+from src.util.eip1967 import ProxySlots, detect_proxies
+from src.util.etherscan import EVMExplorer, ExplorerType, fetch_verified_sources
+from src.util.pipeline import Pipeline, Stage
 from src.handlers.base import HandlerTrigger
 from src.handlers.registry import HandlerRegistry
 from src.util.logging import Logger
+from src.util.rate_limit import RateLimiter
 import os
 from urllib.parse import urlparse
 from src.config.config import Config
 import json
 
 
+@dataclass
+class ProxyScan:
+    """Upgrade events of a contract found since its last scan"""
+
+    contract: Asset
+    explorer_type: ExplorerType
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    scanned_block: Optional[int] = None  # New value of the contract's cursor
+    confirmed: bool = True  # False if only the storage slots were read, the events are still to be fetched
+
+
 class ProxyMonitorJob(Job, DBSessionMixin):
-    """Job that monitors proxy contracts for implementation upgrades"""
+    """Job that monitors proxy contracts for implementation upgrades
+
+    Each contract keeps the last block searched for upgrade events, so a run only asks for the
+    logs of newer blocks. Contracts are scanned concurrently, paced by the explorer rate limiter,
+    and their updates are committed in batches.
+    """
 
     def __init__(self):
         super().__init__("proxy_monitor")
@@ -22,6 +45,15 @@ class ProxyMonitorJob(Job, DBSessionMixin):
         self.explorer = EVMExplorer()
         self.handler_registry = HandlerRegistry.get_instance()
         self.config = Config()
+        self.concurrency = self.config.get("proxy_monitor.concurrency", 8)
+        self.batch_size = self.config.get("proxy_monitor.batch_size", 100)
+        self.rpc_batch_size = self.config.get("proxy_monitor.rpc_batch_size", 100)
+        self._rpc_slots: Dict[str, ProxySlots] = {}  # EIP-1967 slots of unchecked contracts by identifier
+        self._heads: Dict[ExplorerType, asyncio.Task] = {}
+        self._run_session = None  # Session of the current run, shared by the pipeline stages
+        self._batch: List[Asset] = []
+        self._batch_upgrades: List[Dict[str, Any]] = []
+        self._counts = {"scanned": 0, "skipped": 0, "failed": 0, "upgraded": 0, "detected_by_rpc": 0}
 
     async def stop_handler(self) -> None:
         """Handle job stop request - nothing to clean up"""
@@ -44,130 +76,256 @@ class ProxyMonitorJob(Job, DBSessionMixin):
                 )
 
                 self.logger.info(f"Found {len(contracts)} deployed contracts to check")
+                await self._detect_with_rpc(contracts)
 
-                for contract in contracts:
-                    try:
-                        self.logger.info(f"Checking contract {contract.identifier}")
-
-                        # Check for proxy upgrade events
-                        events = await self.explorer.get_proxy_upgrade_events(contract.identifier)
-                        self.logger.info(f"Got events for {contract.identifier}: {json.dumps(events)}")
-
-                        # Initialize extra_data if None
-                        if contract.extra_data is None:
-                            contract.extra_data = {}
-
-                        # Update proxy status
-                        contract.checked_for_proxy = True
-                        contract.is_proxy = bool(events)
-                        self.logger.info(f"Set is_proxy={contract.is_proxy} for {contract.identifier}")
-
-                        # Always add and commit the contract after updating proxy status
-                        session.add(contract)
-                        session.commit()
-                        self.logger.info(
-                            f"Committed changes for {contract.identifier}: checked_for_proxy={contract.checked_for_proxy}, is_proxy={contract.is_proxy}"
-                        )
-
-                        if not events:
-                            self.logger.info(f"Marked {contract.identifier} as non-proxy")
-                            continue
-
-                        # Get latest implementation address
-                        latest_event = events[-1]
-                        impl_address = latest_event["implementation"]
-                        self.logger.info(f"Latest implementation for {contract.identifier}: {impl_address}")
-
-                        # Get explorer type from contract URL
-                        is_supported, explorer_type = self.explorer.is_supported_explorer(contract.identifier)
-                        if not is_supported:
-                            self.logger.error(f"Unsupported explorer URL: {contract.identifier}")
-                            continue
-
-                        # Get explorer domain from config
-                        explorer_domain = self.explorer.EXPLORERS[explorer_type]["domain"]
-                        impl_url = f"https://{explorer_domain}/address/{impl_address}"
-                        self.logger.info(f"Implementation URL: {impl_url}")
-
-                        # Check if implementation changed
-                        current_impl = contract.implementation
-                        if current_impl and current_impl.identifier == impl_url:
-                            self.logger.info(f"Implementation unchanged for {contract.identifier}")
-                            continue
-
-                        # Look for existing implementation asset
-                        impl_asset = session.query(Asset).filter(Asset.identifier == impl_url).first()
-                        self.logger.info(f"Found existing implementation asset: {impl_asset is not None}")
-
-                        # If implementation doesn't exist as an asset yet, create it
-                        if not impl_asset:
-                            self.logger.info(f"Creating new implementation asset for {impl_url}")
-                            # Use same directory structure as immunefi indexer
-                            base_dir = os.path.join(self.config.data_dir, str(contract.project_id))
-                            parsed_url = urlparse(impl_url)
-                            target_dir = os.path.join(base_dir, parsed_url.netloc, parsed_url.path.strip("/"))
-
-                            # Download implementation code
-                            self.logger.info(f"Downloading implementation code to {target_dir}")
-                            await fetch_verified_sources(impl_url, target_dir)
-
-                            # Create new implementation asset
-                            impl_asset = Asset(
-                                identifier=impl_url,
-                                project_id=contract.project_id,
-                                asset_type=AssetType.DEPLOYED_CONTRACT,
-                                source_url=impl_url,
-                                local_path=target_dir,
-                                extra_data={"is_implementation": True, "added_by_proxy_monitor": True},
-                            )
-                            session.add(impl_asset)
-                            self.logger.info(f"Created new implementation asset: {impl_url}")
-
-                        # Update proxy relationship
-                        old_impl = contract.implementation
-                        contract.implementation = impl_asset
-                        self.logger.info(
-                            f"Updated implementation for {contract.identifier}: {old_impl.identifier if old_impl else 'None'} -> {impl_asset.identifier}"
-                        )
-
-                        # Update implementation history in extra_data
-                        if "implementation_history" not in contract.extra_data:
-                            contract.extra_data["implementation_history"] = []
-                        contract.extra_data["implementation_history"].append(
-                            {
-                                "address": impl_address,
-                                "url": impl_url,
-                                "block_number": latest_event["blockNumber"],
-                                "timestamp": latest_event["timestamp"],
-                            }
-                        )
-                        self.logger.info(
-                            f"Updated implementation history for {contract.identifier}, now has {len(contract.extra_data['implementation_history'])} entries"
-                        )
-
-                        # Commit changes
-                        session.commit()
-                        self.logger.info(f"Committed implementation changes for {contract.identifier}")
-
-                        # Only trigger upgrade event if there was a previous implementation
-                        if old_impl:
-                            await self.handler_registry.trigger_event(
-                                HandlerTrigger.CONTRACT_UPGRADED,
-                                {
-                                    "proxy": contract,
-                                    "old_implementation": old_impl,
-                                    "new_implementation": impl_asset,
-                                    "event": latest_event,
-                                },
-                            )
-
-                    except Exception as e:
-                        self.logger.error(f"Error processing contract {contract.identifier}: {str(e)}")
-                        session.rollback()
-                        continue
-
-            await self.complete(JobResult(success=True, message="Proxy monitoring completed successfully"))
+                self._run_session = session
+                pipeline = Pipeline(
+                    [
+                        Stage("scan", self._scan_contract, concurrency=self.concurrency, queue_size=self.concurrency * 2),
+                        Stage("apply", self._apply_scan, queue_size=self.batch_size),
+                    ],
+                    name="ProxyMonitorPipeline",
+                )
+                try:
+                    await pipeline.run(contracts)
+                    await self._commit_batch()
+                finally:
+                    self._run_session = None
+
+            result = JobResult(success=True, message="Proxy monitoring completed successfully")
+            counts = self._counts
+            result.data["contracts"] = dict(counts)
+            result.add_output(
+                f"Checked {counts['scanned']} contracts: {counts['upgraded']} upgraded, "
+                f"{counts['skipped']} skipped, {counts['failed']} failed"
+            )
+            if counts["detected_by_rpc"]:
+                result.add_output(f"{counts['detected_by_rpc']} non-proxies detected through RPC storage reads")
+            rate_limits = RateLimiter().get_stats()
+            result.data["rate_limits"] = rate_limits
+            for name, bucket in rate_limits.items():
+                result.add_output(
+                    f"{name}: {bucket['requests']} calls, {bucket['utilization']:.0%} of rate limit used, "
+                    f"{bucket['throttled']} throttled"
+                )
+            await self.complete(result)
 
         except Exception as e:
             self.logger.error(f"Error in proxy monitoring job: {str(e)}")
             await self.fail(str(e))
+
+    @staticmethod
+    def _address(contract: Asset) -> str:
+        return contract.identifier.split("#")[0].split("?")[0].rstrip("/").split("/")[-1].lower()
+
+    async def _detect_with_rpc(self, contracts: List[Asset]) -> None:
+        """Read the EIP-1967 slots of unchecked contracts on chains with a configured node
+
+        Every contract is searched for upgrade events once, as older proxies emit the same event but
+        keep their implementation in another slot. On chains with a node, contracts without events
+        stay unchecked, and on later runs only their slots are read: without an implementation or
+        beacon, their cursor moves to the chain head read before the slots, otherwise their events
+        are fetched from the cursor.
+        """
+        by_chain: Dict[ExplorerType, List[Asset]] = {}
+        for contract in contracts:
+            if contract.checked_for_proxy or contract.proxy_scanned_block is None:
+                continue
+            is_supported, explorer_type = self.explorer.is_supported_explorer(contract.identifier)
+            if is_supported and self.explorer.get_rpc_url(explorer_type):
+                by_chain.setdefault(explorer_type, []).append(contract)
+
+        for explorer_type, chain_contracts in by_chain.items():
+            rpc_url = self.explorer.get_rpc_url(explorer_type)
+            # Slots read at a later block are empty at the head as well
+            await self._get_head(explorer_type)
+            slots = await detect_proxies(rpc_url, [self._address(c) for c in chain_contracts], self.rpc_batch_size)
+            for contract in chain_contracts:
+                if self._address(contract) in slots:
+                    self._rpc_slots[contract.identifier] = slots[self._address(contract)]
+            self.logger.info(f"Read proxy slots of {len(slots)} of {len(chain_contracts)} contracts through RPC")
+
+    async def _get_head(self, explorer_type: ExplorerType) -> Optional[int]:
+        """Get the latest block of a chain, looked up once per run"""
+        if explorer_type not in self._heads:
+            self._heads[explorer_type] = asyncio.create_task(self.explorer.get_block_number(explorer_type))
+        return await self._heads[explorer_type]
+
+    async def _scan_contract(self, contract: Asset) -> Optional[ProxyScan]:
+        """Pipeline stage: fetch the upgrade events of a contract since its last scan"""
+        # Get explorer type from contract URL
+        is_supported, explorer_type = self.explorer.is_supported_explorer(contract.identifier)
+        if not is_supported:
+            self.logger.warning(f"Skipping {contract.identifier}: unsupported explorer or no API key")
+            self._counts["skipped"] += 1
+            return None
+
+        # Only contracts searched for upgrade events before have their slots read
+        slots = self._rpc_slots.get(contract.identifier)
+        if slots is not None and not slots.is_proxy:
+            self._counts["detected_by_rpc"] += 1
+            head = await self._get_head(explorer_type)
+            scanned_block = head if head is not None else contract.proxy_scanned_block
+            return ProxyScan(contract, explorer_type, scanned_block=scanned_block, confirmed=False)
+
+        try:
+            head = await self._get_head(explorer_type)
+            cursor = contract.proxy_scanned_block
+            from_block = cursor + 1 if cursor is not None else None
+            if head is not None and cursor is not None and cursor >= head:
+                return ProxyScan(contract, explorer_type, scanned_block=cursor)
+
+            self.logger.info(f"Checking contract {contract.identifier} from block {from_block or 0}")
+            events = await self.explorer.get_proxy_upgrade_events(contract.identifier, from_block=from_block, to_block=head)
+            self.logger.info(f"Got events for {contract.identifier}: {json.dumps(events)}")
+        except Exception as e:
+            self.logger.error(f"Error processing contract {contract.identifier}: {str(e)}")
+            self._counts["failed"] += 1
+            return None
+
+        # Without the chain head, the blocks up to the latest event are known to be scanned
+        scanned_block = head if head is not None else max([cursor or 0] + [event["blockNumber"] for event in events])
+        # On chains with a node, contracts without events keep being checked through their slots
+        confirmed = bool(events) or bool(contract.is_proxy) or not self.explorer.get_rpc_url(explorer_type)
+        return ProxyScan(contract, explorer_type, events, scanned_block, confirmed)
+
+    async def _apply_scan(self, scan: ProxyScan) -> None:
+        """Pipeline stage: update a contract from its scan, committing every batch_size contracts"""
+        try:
+            await self._update_contract(scan)
+        except Exception as e:
+            # The batch is rolled back, its contracts are scanned again on the next run
+            self.logger.error(f"Error processing contract {scan.contract.identifier}: {str(e)}")
+            self._counts["failed"] += 1 + len(self._batch)
+            self._counts["scanned"] -= len(self._batch)
+            self._run_session.rollback()
+            self._batch.clear()
+            self._batch_upgrades.clear()
+            return
+
+        self._counts["scanned"] += 1
+        self._batch.append(scan.contract)
+        if len(self._batch) >= self.batch_size:
+            await self._commit_batch()
+
+    async def _commit_batch(self) -> None:
+        """Commit the updated contracts and trigger the upgrade events of the batch"""
+        if not self._batch:
+            return
+        self._run_session.commit()
+        self.logger.info(f"Committed changes for {len(self._batch)} contracts")
+        upgrades = list(self._batch_upgrades)
+        self._counts["upgraded"] += len(upgrades)
+        self._batch.clear()
+        self._batch_upgrades.clear()
+
+        for upgrade in upgrades:
+            await self.handler_registry.trigger_event(HandlerTrigger.CONTRACT_UPGRADED, upgrade)
+
+    async def _update_contract(self, scan: ProxyScan) -> None:
+        """Apply the events of a scan to the contract, without committing"""
+        session = self._run_session
+        contract, events = scan.contract, scan.events
+
+        # Initialize extra_data if None
+        if contract.extra_data is None:
+            contract.extra_data = {}
+
+        # Update proxy status. Earlier upgrades are not fetched again, so a known proxy stays one.
+        contract.checked_for_proxy = scan.confirmed
+        contract.is_proxy = bool(contract.is_proxy) or bool(events)
+        contract.proxy_scanned_block = scan.scanned_block
+        session.add(contract)
+
+        if not events:
+            if not contract.is_proxy and scan.confirmed:
+                self.logger.info(f"Marked {contract.identifier} as non-proxy")
+            return
+
+        # Get latest implementation address
+        latest_event = events[-1]
+        impl_address = latest_event["implementation"]
+        self.logger.info(f"Latest implementation for {contract.identifier}: {impl_address}")
+
+        # Get explorer domain from config
+        explorer_domain = self.explorer.EXPLORERS[scan.explorer_type]["domain"]
+        impl_url = f"https://{explorer_domain}/address/{impl_address}"
+        self.logger.info(f"Implementation URL: {impl_url}")
+
+        # Check if implementation changed
+        current_impl = contract.implementation
+        if current_impl and current_impl.identifier == impl_url:
+            self._record_upgrades(contract, events, current_impl)
+            self.logger.info(f"Implementation unchanged for {contract.identifier}")
+            return
+
+        # Look for existing implementation asset
+        impl_asset = session.query(Asset).filter(Asset.identifier == impl_url).first()
+        self.logger.info(f"Found existing implementation asset: {impl_asset is not None}")
+
+        # If implementation doesn't exist as an asset yet, create it
+        if not impl_asset:
+            self.logger.info(f"Creating new implementation asset for {impl_url}")
+            # Use same directory structure as immunefi indexer
+            base_dir = os.path.join(self.config.data_dir, str(contract.project_id))
+            parsed_url = urlparse(impl_url)
+            target_dir = os.path.join(base_dir, parsed_url.netloc, parsed_url.path.strip("/"))
+
+            # Download implementation code, or link it from the source cache if any project has it already.
+            # The files are stored in the blob store either way.
+            self.logger.info(f"Downloading implementation code to {target_dir}")
+            if not await fetch_verified_sources(impl_url, target_dir):
+                self.logger.warning(f"Failed to fetch implementation sources: {impl_url}")
+
+            # Create new implementation asset
+            impl_asset = Asset(
+                identifier=impl_url,
+                project_id=contract.project_id,
+                asset_type=AssetType.DEPLOYED_CONTRACT,
+                source_url=impl_url,
+                local_path=target_dir,
+                extra_data={"is_implementation": True, "added_by_proxy_monitor": True},
+            )
+            session.add(impl_asset)
+            self.logger.info(f"Created new implementation asset: {impl_url}")
+
+        # Update proxy relationship
+        old_impl = contract.implementation
+        contract.implementation = impl_asset
+        self.logger.info(
+            f"Updated implementation for {contract.identifier}: {old_impl.identifier if old_impl else 'None'} -> {impl_asset.identifier}"
+        )
+
+        self._record_upgrades(contract, events, impl_asset)
+
+        # Only trigger upgrade event if there was a previous implementation
+        if old_impl:
+            self._batch_upgrades.append(
+                {
+                    "proxy": contract,
+                    "old_implementation": old_impl,
+                    "new_implementation": impl_asset,
+                    "event": latest_event,
+                }
+            )
+
+    def _record_upgrades(self, contract: Asset, events: List[Dict[str, Any]], latest_impl: Asset) -> None:
+        """Append the upgrade events of a scan to the proxy's history
+
+        Events that are already stored, e.g. migrated history found again by a full scan, are skipped.
+        """
+        session = self._run_session
+        known = set()
+        if contract.id is not None:
+            known = set(
+                session.query(ProxyUpgrade.block_number, ProxyUpgrade.implementation_address)
+                .filter(ProxyUpgrade.proxy_id == contract.id)
+                .all()
+            )
+
+        latest_address = events[-1]["implementation"]
+        new_events = [event for event in events if (event["blockNumber"], event["implementation"]) not in known]
+        for event in new_events:
+            implementation = latest_impl if event["implementation"] == latest_address else None
+            session.add(ProxyUpgrade.from_event(contract, event, implementation))
+        self.logger.info(f"Recorded {len(new_events)} upgrade events of {contract.identifier}")
@@ -1,31 +1,90 @@
 """Scheduler for recurring actions"""
 
 import asyncio
+import os
+import random
+import socket
+import uuid
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 from src.util.logging import Logger
+from src.util.cron import CronExpression
 from src.config.config import Config
 from src.backend.database import DBSessionMixin
+from src.models.scheduler import ScheduledActionState, SchedulerLease
+from sqlalchemy.exc import IntegrityError
 
 
 class ScheduledAction:
     """Configuration for a scheduled action"""
 
-    def __init__(self, name: str, command: str, interval_minutes: int, enabled: bool = True):
+    def __init__(
+        self,
+        name: str,
+        command: str,
+        interval_minutes: Optional[int] = None,
+        enabled: bool = True,
+        cron: Optional[str] = None,
+        jitter_minutes: int = 0,
+        catch_up: bool = True,
+    ):
+        if interval_minutes is None and cron is None:
+            raise ValueError(f"Scheduled action {name} needs either interval_minutes or cron")
+
         self.name = name
         self.command = command  # The action command to execute (e.g. "immunefi")
         self.interval_minutes = interval_minutes
         self.enabled = enabled
+        self.cron = CronExpression(cron) if cron else None
+        if self.cron:
+            # Rejects expressions that parse but never match, e.g. "0 0 31 2 *"
+            self.cron.next_after(datetime.utcnow())
+        self.jitter_minutes = jitter_minutes  # Random delay added to each run
+        self.catch_up = catch_up  # Run once on startup if a run was missed while down
         self.last_run: Optional[datetime] = None
+        self.next_run: Optional[datetime] = None
+        self.last_job_id: Optional[str] = None
         self._task: Optional[asyncio.Task] = None
 
+    def jitter(self) -> timedelta:
+        """Get a random delay of up to jitter_minutes"""
+        return timedelta(seconds=random.uniform(0, self.jitter_minutes * 60))
+
+    def compute_next_run(self, after: datetime) -> datetime:
+        """Get the next run time after the given time, including jitter"""
+        if self.cron:
+            return self.cron.next_after(after) + self.jitter()
+        return after + timedelta(minutes=self.interval_minutes) + self.jitter()
+
+    def describe_schedule(self) -> str:
+        """Get a human readable description of the schedule"""
+        schedule = f"cron '{self.cron.expression}'" if self.cron else f"every {self.interval_minutes} minutes"
+        if self.jitter_minutes:
+            schedule += f" (jitter {self.jitter_minutes} minutes)"
+        return schedule
+
 
 class Scheduler(DBSessionMixin):
-    """Manages scheduled actions"""
+    """Manages scheduled actions
+
+    Last and next run times are persisted in the database. After a restart each action continues
+    its schedule; a run missed while the server was down is made up once rather than repeated.
+    A run is skipped while the job started by the previous run of the same action is still going.
+
+    When several replicas share a database, only the replica holding the leader lease runs
+    scheduled actions. The leader renews the lease every third of scheduler.lease_timeout; if it
+    dies, another replica takes over once the lease has expired and continues from the persisted
+    state.
+    """
 
     _instance = None
     _lock = asyncio.Lock()
 
+    # Upper bound for a single sleep so that clock changes and state updates are picked up
+    MAX_SLEEP = 60
+
+    LEASE_NAME = "scheduler"
+
     def __init__(self):
         super().__init__()
         self.logger = Logger("Scheduler")
@@ -33,6 +92,10 @@ class Scheduler(DBSessionMixin):
         self.scheduled_actions: Dict[str, ScheduledAction] = {}
         self._running = False
         self._action_registry = None
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_timeout = self.config.get("scheduler.lease_timeout", 60)
+        self.is_leader = False
+        self._leader_task: Optional[asyncio.Task] = None
 
     @classmethod
     async def get_instance(cls) -> "Scheduler":
@@ -57,20 +120,38 @@ class Scheduler(DBSessionMixin):
             self.schedule_action(
                 name=name,
                 command=config["command"],
-                interval_minutes=config["interval_minutes"],
+                interval_minutes=config.get("interval_minutes"),
                 enabled=config.get("enabled", True),
+                cron=config.get("cron"),
+                jitter_minutes=config.get("jitter_minutes", 0),
+                catch_up=config.get("catch_up", True),
             )
 
-    def schedule_action(self, name: str, command: str, interval_minutes: int, enabled: bool = True) -> None:
-        """Schedule an action to run at regular intervals"""
+    def schedule_action(
+        self,
+        name: str,
+        command: str,
+        interval_minutes: Optional[int] = None,
+        enabled: bool = True,
+        cron: Optional[str] = None,
+        jitter_minutes: int = 0,
+        catch_up: bool = True,
+    ) -> None:
+        """Schedule an action to run at regular intervals or on a cron schedule"""
         # Verify the action exists
         action_name = command.split()[0]
         if not self._get_action_registry().get_action(action_name):
             self.logger.error(f"Cannot schedule unknown action: {command}")
             return
 
-        self.scheduled_actions[name] = ScheduledAction(name, command, interval_minutes, enabled)
-        self.logger.info(f"Scheduled action {name} ({command}) to run every {interval_minutes} minutes")
+        try:
+            action = ScheduledAction(name, command, interval_minutes, enabled, cron, jitter_minutes, catch_up)
+        except ValueError as e:
+            self.logger.error(f"Cannot schedule action {name}: {e}")
+            return
+
+        self.scheduled_actions[name] = action
+        self.logger.info(f"Scheduled action {name} ({command}) to run {action.describe_schedule()}")
 
     def enable_action(self, name: str) -> bool:
         """Enable a scheduled action"""
@@ -78,7 +159,7 @@ class Scheduler(DBSessionMixin):
             return False
         action = self.scheduled_actions[name]
         action.enabled = True
-        if not action._task and self._running:
+        if not action._task and self._running and self.is_leader:
             action._task = asyncio.create_task(self._schedule_loop(action))
         self.logger.info(f"Enabled scheduled action: {name}")
         return True
@@ -105,16 +186,71 @@ class Scheduler(DBSessionMixin):
             "command": action.command,
             "enabled": action.enabled,
             "interval_minutes": action.interval_minutes,
+            "cron": action.cron.expression if action.cron else None,
+            "jitter_minutes": action.jitter_minutes,
             "last_run": action.last_run.isoformat() if action.last_run else None,
-            "next_run": (
-                (action.last_run + timedelta(minutes=action.interval_minutes)).isoformat() if action.last_run else None
-            ),
+            "next_run": action.next_run.isoformat() if action.next_run else None,
         }
 
     def list_actions(self) -> Dict[str, dict]:
         """List all scheduled actions and their status"""
         return {name: self.get_action_status(name) for name in self.scheduled_actions}
 
+    def _load_state(self) -> None:
+        """Restore last and next run times of scheduled actions from the database"""
+        now = datetime.utcnow()
+        try:
+            with self.get_session() as session:
+                states = session.query(ScheduledActionState).all()
+                states = {state.name: state for state in states}
+        except Exception as e:
+            self.logger.error(f"Failed to load scheduler state: {e}")
+            return
+
+        for action in self.scheduled_actions.values():
+            state = states.get(action.name)
+            if not state:
+                continue
+            action.last_run = state.last_run
+            action.last_job_id = state.last_job_id
+            action.next_run = state.next_run
+            if action.next_run and action.next_run < now:
+                if action.catch_up:
+                    # Missed while down: run once, spread out by the jitter
+                    self.logger.info(f"Scheduled action {action.name} missed its run at {action.next_run}, catching up")
+                    action.next_run = now + action.jitter()
+                else:
+                    action.next_run = action.compute_next_run(now)
+
+    def _save_state(self, action: ScheduledAction) -> None:
+        """Persist last and next run time of a scheduled action"""
+        try:
+            with self.get_session() as session:
+                session.merge(
+                    ScheduledActionState(
+                        name=action.name,
+                        last_run=action.last_run,
+                        next_run=action.next_run,
+                        last_job_id=action.last_job_id,
+                    )
+                )
+                session.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to save state of scheduled action {action.name}: {e}")
+
+    def _is_previous_run_active(self, action: ScheduledAction) -> bool:
+        """Check whether the job started by the previous run of an action is still going"""
+        if not action.last_job_id:
+            return False
+
+        from src.jobs.manager import JobManager
+
+        try:
+            return JobManager().is_job_active(action.last_job_id)
+        except Exception as e:
+            self.logger.error(f"Failed to check previous run of {action.name}: {e}")
+            return False
+
     async def _run_action(self, action: ScheduledAction) -> None:
         """Run a scheduled action"""
         try:
@@ -133,45 +269,157 @@ class Scheduler(DBSessionMixin):
             result = await handler(*action_args)
             self.logger.info(f"Executed scheduled action {action.name}: {result}")
 
-            # Update last run time
+            # Update last run time and remember the job it started, if any
             action.last_run = datetime.utcnow()
+            job_id = getattr(result, "job_id", None)
+            action.last_job_id = job_id if isinstance(job_id, str) else None
 
         except Exception as e:
             self.logger.error(f"Error running scheduled action {action.name}: {str(e)}")
 
     async def _schedule_loop(self, action: ScheduledAction) -> None:
         """Main loop for a scheduled action"""
-        while self._running and action.enabled:
+        if action.next_run is None:
+            # Never ran before
+            action.next_run = datetime.utcnow() + action.jitter()
+
+        while self._running and action.enabled and self.is_leader:
             try:
-                await self._run_action(action)
                 # Sleep until next run
-                await asyncio.sleep(action.interval_minutes * 60)
+                delay = (action.next_run - datetime.utcnow()).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(min(delay, self.MAX_SLEEP))
+                    continue
+
+                if self._is_previous_run_active(action):
+                    self.logger.info(
+                        f"Skipping scheduled action {action.name}, job {action.last_job_id} from the previous run is still running"
+                    )
+                else:
+                    await self._run_action(action)
+
+                try:
+                    action.next_run = action.compute_next_run(datetime.utcnow())
+                except ValueError as e:
+                    # Retrying would repeat the run that just happened, so the action is stopped instead
+                    self.logger.error(f"Disabling scheduled action {action.name}, no next run: {str(e)}")
+                    action.enabled = False
+                    action.next_run = None
+                await asyncio.to_thread(self._save_state, action)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.logger.error(f"Error in schedule loop for {action.name}: {str(e)}")
                 await asyncio.sleep(60)  # Wait a bit before retrying
 
+    def _try_acquire_lease(self) -> bool:
+        """Acquire or renew the leader lease
+
+        Returns:
+            True if this replica holds the lease until now + lease_timeout
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_timeout)
+        try:
+            with self.get_session() as session:
+                lease = session.query(SchedulerLease).filter(SchedulerLease.name == self.LEASE_NAME).with_for_update().first()
+                if lease is None:
+                    session.add(
+                        SchedulerLease(name=self.LEASE_NAME, holder=self.instance_id, acquired_at=now, expires_at=expires_at)
+                    )
+                elif lease.holder == self.instance_id:
+                    lease.expires_at = expires_at
+                elif lease.expires_at < now:
+                    self.logger.info(f"Taking over expired scheduler lease from {lease.holder}")
+                    lease.holder = self.instance_id
+                    lease.acquired_at = now
+                    lease.expires_at = expires_at
+                else:
+                    return False
+                session.commit()
+                return True
+        except IntegrityError:
+            # Another replica created the lease at the same time
+            return False
+        except Exception as e:
+            self.logger.error(f"Failed to acquire scheduler lease: {e}")
+            return False
+
+    def _release_lease(self) -> None:
+        """Give up the leader lease so that another replica can take over immediately"""
+        try:
+            with self.get_session() as session:
+                lease = (
+                    session.query(SchedulerLease)
+                    .filter(SchedulerLease.name == self.LEASE_NAME, SchedulerLease.holder == self.instance_id)
+                    .first()
+                )
+                if lease:
+                    lease.expires_at = datetime.utcnow()
+                    session.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to release scheduler lease: {e}")
+
+    def _start_actions(self) -> None:
+        """Start the loops of all enabled actions"""
+        for action in self.scheduled_actions.values():
+            if action.enabled and not action._task:
+                action._task = asyncio.create_task(self._schedule_loop(action))
+
+    def _stop_actions(self) -> None:
+        """Cancel the loops of all actions"""
+        for action in self.scheduled_actions.values():
+            if action._task:
+                action._task.cancel()
+                action._task = None
+
+    async def _update_leadership(self) -> None:
+        """Acquire or renew the lease and start or stop actions when leadership changes"""
+        is_leader = await asyncio.to_thread(self._try_acquire_lease)
+        if is_leader and not self.is_leader:
+            self.logger.info(f"Scheduler {self.instance_id} became leader")
+            self.is_leader = True
+            # Continue from the state persisted by the previous leader
+            await asyncio.to_thread(self._load_state)
+            self._start_actions()
+        elif not is_leader and self.is_leader:
+            self.logger.warning(f"Scheduler {self.instance_id} lost the leader lease, stopping scheduled actions")
+            self.is_leader = False
+            self._stop_actions()
+
+    async def _leader_loop(self) -> None:
+        """Keep the leader lease renewed, or wait for it to become free"""
+        while self._running:
+            try:
+                await self._update_leadership()
+                await asyncio.sleep(self.lease_timeout / 3)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Error in scheduler leader loop: {str(e)}")
+                await asyncio.sleep(self.lease_timeout / 3)
+
     async def start(self) -> None:
         """Start the scheduler"""
         self._running = True
-        self.logger.info("Starting scheduler")
+        self.logger.info(f"Starting scheduler {self.instance_id}")
 
-        # Load scheduled actions from config
+        # Load scheduled actions from config; they start once this replica holds the lease
         self.load_config()
-
-        # Start enabled actions
-        for action in self.scheduled_actions.values():
-            if action.enabled:
-                action._task = asyncio.create_task(self._schedule_loop(action))
+        self._leader_task = asyncio.create_task(self._leader_loop())
 
     async def stop(self) -> None:
         """Stop the scheduler"""
         self._running = False
         self.logger.info("Stopping scheduler")
 
+        if self._leader_task:
+            self._leader_task.cancel()
+            self._leader_task = None
+
         # Cancel all running tasks
-        for action in self.scheduled_actions.values():
-            if action._task:
-                action._task.cancel()
-                action._task = None
+        self._stop_actions()
+
+        if self.is_leader:
+            self.is_leader = False
+            await asyncio.to_thread(self._release_lease)
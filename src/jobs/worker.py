@@ -0,0 +1,262 @@
+"""Worker process that executes jobs queued in the database"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from src.backend.database import DBSessionMixin
+from src.config.config import Config
+from src.jobs.base import Job, JobStatus
+from src.jobs.manager import JobManager
+from src.models.job import JobRecord
+from src.util.logging import Logger
+
+
+class JobWorker(DBSessionMixin):
+    """Claims pending jobs from the database and runs them
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED so that any number of workers can
+    poll the same table without handing out a job twice. Each worker refreshes the heartbeat of
+    the jobs it runs; jobs whose heartbeat is older than the heartbeat timeout belong to a crashed
+    worker and are put back into the queue by whichever worker notices first.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, concurrency: Optional[int] = None):
+        DBSessionMixin.__init__(self)
+        self.logger = Logger("JobWorker")
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        config = Config()
+        self.concurrency = concurrency or config.get("jobs.worker_concurrency", 2)
+        self.poll_interval = config.get("jobs.poll_interval", 2)
+        self.heartbeat_interval = config.get("jobs.heartbeat_interval", 15)
+        self.heartbeat_timeout = config.get("jobs.heartbeat_timeout", 90)
+        self.max_attempts = config.get("jobs.max_attempts", 3)
+
+        self.job_manager = JobManager()
+        self._active: Dict[str, asyncio.Task] = {}
+        self._running = False
+        self._last_heartbeat: Optional[datetime] = None
+
+    def claim_job(self) -> Optional[JobRecord]:
+        """Claim the oldest pending job
+
+        Returns:
+            The claimed job record, or None if the queue is empty
+        """
+        with self.get_session() as session:
+            job_record = (
+                session.query(JobRecord)
+                .filter(JobRecord.status == JobStatus.PENDING.value)
+                .order_by(JobRecord.created_at)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if not job_record:
+                return None
+
+            now = datetime.utcnow()
+            job_record.status = JobStatus.RUNNING.value
+            job_record.worker_id = self.worker_id
+            job_record.heartbeat_at = now
+            job_record.started_at = now
+            job_record.attempts = (job_record.attempts or 0) + 1
+            session.commit()
+
+            return job_record
+
+    def send_heartbeat(self) -> List[str]:
+        """Refresh the heartbeat of all jobs run by this worker
+
+        Returns:
+            IDs of jobs that were cancelled or reassigned and must be stopped locally
+        """
+        if not self._active:
+            return []
+
+        with self.get_session() as session:
+            job_records = session.query(JobRecord).filter(JobRecord.id.in_(list(self._active.keys()))).all()
+
+            lost = []
+            for job_record in job_records:
+                if job_record.status == JobStatus.RUNNING.value and job_record.worker_id == self.worker_id:
+                    job_record.heartbeat_at = datetime.utcnow()
+                else:
+                    lost.append(job_record.id)
+            session.commit()
+
+        return lost
+
+    def requeue_stale_jobs(self) -> List[str]:
+        """Put jobs of crashed workers back into the queue
+
+        Jobs that already used up their attempts are marked as failed instead.
+
+        Returns:
+            IDs of jobs that were requeued
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout)
+        requeued = []
+
+        with self.get_session() as session:
+            job_records = (
+                session.query(JobRecord)
+                .filter(
+                    JobRecord.status == JobStatus.RUNNING.value,
+                    JobRecord.worker_id.isnot(None),
+                    JobRecord.heartbeat_at < cutoff,
+                )
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            for job_record in job_records:
+                if (job_record.attempts or 0) >= self.max_attempts:
+                    self.logger.warning(f"Job {job_record.id} lost its worker {job_record.worker_id} too often, giving up")
+                    job_record.status = JobStatus.FAILED.value
+                    job_record.success = False
+                    job_record.message = f"Worker {job_record.worker_id} stopped responding"
+                    job_record.completed_at = datetime.utcnow()
+                else:
+                    self.logger.warning(f"Requeueing job {job_record.id} from unresponsive worker {job_record.worker_id}")
+                    job_record.status = JobStatus.PENDING.value
+                    requeued.append(job_record.id)
+                job_record.worker_id = None
+            session.commit()
+
+        return requeued
+
+    def _release_jobs(self, job_ids: List[str]) -> None:
+        """Put jobs interrupted by a worker shutdown back into the queue"""
+        with self.get_session() as session:
+            job_records = (
+                session.query(JobRecord).filter(JobRecord.id.in_(job_ids), JobRecord.worker_id == self.worker_id).all()
+            )
+            for job_record in job_records:
+                job_record.status = JobStatus.PENDING.value
+                job_record.worker_id = None
+                job_record.completed_at = None
+            session.commit()
+
+    def _start_job(self, job_record: JobRecord) -> None:
+        """Recreate a claimed job and run it in the background"""
+        try:
+            job = Job.from_record(job_record)
+        except Exception as e:
+            self.logger.error(f"Failed to restore job {job_record.id}: {e}")
+            with self.get_session() as session:
+                record = session.query(JobRecord).filter(JobRecord.id == job_record.id).first()
+                if record:
+                    record.status = JobStatus.FAILED.value
+                    record.success = False
+                    record.message = f"Failed to restore job: {e}"
+                    record.completed_at = datetime.utcnow()
+                    session.commit()
+            return
+
+        job.worker_id = self.worker_id
+        self.logger.info(f"Claimed job {job.id} ({job.type}), attempt {job_record.attempts}")
+        task = self.job_manager.run_job_in_background(job)
+        self._active[job.id] = task
+        task.add_done_callback(lambda _: self._active.pop(job.id, None))
+
+    async def _cancel_jobs(self, job_ids: List[str], shutdown: bool = False) -> List[str]:
+        """Cancel running jobs and wait for the executor work they started to return
+
+        Args:
+            job_ids: IDs of the jobs to cancel
+            shutdown: Whether the jobs are stopped because the worker shuts down
+
+        Returns:
+            IDs of jobs whose executor work was still running after the cancel timeout
+        """
+        # Tell executor work to stop before cancelling the tasks waiting for it
+        jobs = [job for job in map(self.job_manager.get_job, job_ids) if job]
+        for job in jobs:
+            job.request_cancellation(shutdown=shutdown)
+
+        for job_id in job_ids:
+            task = self._active.pop(job_id, None)
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    self.logger.error(f"Error stopping job {job_id}: {e}")
+
+        stuck = []
+        for job in jobs:
+            if not await job.wait_for_release(self.job_manager.cancel_timeout):
+                self.logger.warning(
+                    f"Job {job.id} did not release its executor threads within {self.job_manager.cancel_timeout}s"
+                )
+                stuck.append(job.id)
+        return stuck
+
+    async def _stop_lost_jobs(self, job_ids: List[str]) -> None:
+        """Stop jobs that were cancelled or reassigned"""
+        if job_ids:
+            self.logger.info(f"Stopping jobs {', '.join(job_ids)}, they were cancelled or reassigned")
+            await self._cancel_jobs(job_ids)
+
+    async def run_once(self) -> int:
+        """Run a single poll cycle
+
+        Returns:
+            Number of jobs claimed in this cycle
+        """
+        now = datetime.utcnow()
+        if self._last_heartbeat is None or (now - self._last_heartbeat).total_seconds() >= self.heartbeat_interval:
+            self._last_heartbeat = now
+            await self._stop_lost_jobs(await asyncio.to_thread(self.send_heartbeat))
+            await asyncio.to_thread(self.requeue_stale_jobs)
+
+        claimed = 0
+        while len(self._active) < self.concurrency:
+            job_record = await asyncio.to_thread(self.claim_job)
+            if not job_record:
+                break
+            self._start_job(job_record)
+            claimed += 1
+
+        return claimed
+
+    async def run(self) -> None:
+        """Poll for jobs until stopped"""
+        self.logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        self._running = True
+        await self.job_manager.start()
+
+        try:
+            while self._running:
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    self.logger.error(f"Worker poll failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Stop the worker and return unfinished jobs to the queue"""
+        self._running = False
+        interrupted = list(self._active.keys())
+
+        stuck = await self._cancel_jobs(interrupted, shutdown=True)
+        self._active.clear()
+
+        # Jobs whose executor work is still running are left to the stale heartbeat check, so no
+        # other worker runs them while this one is still busy with them
+        interrupted = [job_id for job_id in interrupted if job_id not in stuck]
+        if interrupted:
+            try:
+                self._release_jobs(interrupted)
+                self.logger.info(f"Returned {len(interrupted)} unfinished jobs to the queue")
+            except Exception as e:
+                self.logger.error(f"Failed to release jobs: {e}")
+
+        self.logger.info(f"Worker {self.worker_id} stopped")
@@ -1,6 +1,20 @@
 from src.models.base import Asset, Project
 from src.models.job import JobRecord
 from src.models.github import GitHubRepoState
+from src.models.scheduler import ScheduledActionState, SchedulerLease
+from src.models.indexer import IndexerState
+from src.models.chain import BlockTimestamp
+from src.models.proxy import ProxyUpgrade
 
 # Import all models here so SQLAlchemy can discover them
-__all__ = ["Asset", "Project", "JobRecord", "GitHubRepoState"]
+__all__ = [
+    "Asset",
+    "Project",
+    "JobRecord",
+    "GitHubRepoState",
+    "ScheduledActionState",
+    "SchedulerLease",
+    "IndexerState",
+    "BlockTimestamp",
+    "ProxyUpgrade",
+]
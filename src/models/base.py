@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, ForeignKey, JSON, Boolean
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.types import UserDefinedType
 from src.backend.database import Base
@@ -59,6 +59,7 @@ class Project(Base):
     source_url = Column(String)  # URL to project source/listing
     keywords = Column(JSON)  # Project keywords/tags
     extra_data = Column(JSON)  # Additional platform-specific data
+    source_hash = Column(String)  # Hash of the listing payload the project was last indexed from
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -110,6 +111,7 @@ class Asset(Base):
     # Proxy status flags
     is_proxy = Column(Boolean, default=False)
     checked_for_proxy = Column(Boolean, default=False)
+    proxy_scanned_block = Column(BigInteger, nullable=True)  # Last block searched for upgrade events
 
     # Many-to-one relationship
     project = relationship("Project", back_populates="assets")
@@ -128,6 +130,7 @@ class Asset(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "is_proxy": self.is_proxy,
             "checked_for_proxy": self.checked_for_proxy,
+            "proxy_scanned_block": self.proxy_scanned_block,
         }
 
     def generate_embedding_text(self) -> Optional[str]:
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, String
+from src.backend.database import Base
+
+
+class BlockTimestamp(Base):
+    """Model caching the timestamps of blocks looked up from block explorers.
+
+    Blocks never change their timestamp, so rows are written once and kept.
+    """
+
+    __tablename__ = "block_timestamps"
+
+    chain = Column(String, primary_key=True)  # Explorer of the chain, e.g. "etherscan"
+    block_number = Column(BigInteger, primary_key=True)
+    timestamp = Column(BigInteger, nullable=False)  # Unix time
+
+    def to_dict(self):
+        """Convert model instance to dictionary representation.
+
+        Returns:
+            dict: Dictionary containing model data
+        """
+        return {"chain": self.chain, "block_number": self.block_number, "timestamp": self.timestamp}
@@ -16,6 +16,9 @@ class GitHubRepoState(Base):
     last_commit_sha = Column(String)  # Last processed commit SHA
     last_pr_number = Column(Integer)  # Last processed PR number
     last_check = Column(DateTime, default=datetime.utcnow)  # Last time we checked this repo
+    # ETags of the last commits and pulls responses, sent as If-None-Match to skip unchanged repos
+    commits_etag = Column(String)
+    pulls_etag = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -30,6 +33,8 @@ class GitHubRepoState(Base):
             "last_commit_sha": self.last_commit_sha,
             "last_pr_number": self.last_pr_number,
             "last_check": self.last_check.isoformat() if self.last_check else None,
+            "commits_etag": self.commits_etag,
+            "pulls_etag": self.pulls_etag,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from src.backend.database import Base
+
+
+class IndexerState(Base):
+    """Model for tracking the state of platform indexers.
+
+    Stores the HTTP validators of the last complete sync of a platform listing so that the next
+    sync can ask the server whether the listing changed at all.
+    """
+
+    __tablename__ = "indexer_state"
+
+    platform = Column(String, primary_key=True)  # e.g. "immunefi"
+    etag = Column(String)  # ETag of the listing at the last complete sync
+    last_modified = Column(String)  # Last-Modified header of the listing at the last complete sync
+    last_sync = Column(DateTime)  # Time of the last complete sync
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert model instance to dictionary representation.
+
+        Returns:
+            dict: Dictionary containing model data with datetime fields converted to ISO format
+        """
+        return {
+            "platform": self.platform,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
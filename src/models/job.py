@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON, Boolean
+from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer
 from datetime import datetime
 from src.backend.database import Base
 
@@ -10,13 +10,20 @@ class JobRecord(Base):
 
     id = Column(String, primary_key=True)
     type = Column(String, nullable=False)
-    status = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     success = Column(Boolean, nullable=True)
     message = Column(String, nullable=True)
     data = Column(JSON, nullable=True)
     outputs = Column(JSON, nullable=True)  # List of string outputs
+    params = Column(JSON, nullable=True)  # Constructor arguments used to recreate the job
+    worker_id = Column(String, nullable=True, index=True)  # Worker that claimed the job
+    heartbeat_at = Column(DateTime, nullable=True)  # Last liveness signal from the worker
+    attempts = Column(Integer, nullable=False, default=0)  # Number of times the job was claimed
+    fingerprint = Column(String, nullable=True, index=True)  # Hash of job type and params for deduplication
+    checkpoint = Column(JSON, nullable=True)  # Progress saved by resumable jobs
+    resource_usage = Column(JSON, nullable=True)  # Wall/CPU time, RSS, DB, HTTP and LLM usage of the run
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
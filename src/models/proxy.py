@@ -0,0 +1,69 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import backref, relationship
+from datetime import datetime
+from typing import Any, Dict, Optional
+from src.backend.database import Base
+
+
+def to_datetime(timestamp: Optional[Any]) -> Optional[datetime]:
+    """Convert a unix timestamp as reported by block explorers, e.g. "1700000000", to a UTC datetime"""
+    if timestamp in (None, ""):
+        return None
+    return datetime.utcfromtimestamp(int(timestamp))
+
+
+class ProxyUpgrade(Base):
+    """Model for the implementation history of proxy contracts.
+
+    One row per upgrade event, appended by the proxy monitor and never rewritten. Proxies list
+    their upgrades through Asset.upgrades, which is only queried when used.
+    """
+
+    __tablename__ = "proxy_upgrades"
+    __table_args__ = (Index("ix_proxy_upgrades_proxy_block", "proxy_id", "block_number"),)
+
+    id = Column(Integer, primary_key=True)
+    proxy_id = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
+    # Implementation asset, if the monitor created one for it
+    implementation_id = Column(Integer, ForeignKey("assets.id", ondelete="SET NULL"), nullable=True, index=True)
+    implementation_address = Column(String, nullable=False)
+    block_number = Column(BigInteger)
+    transaction_hash = Column(String)
+    timestamp = Column(DateTime)  # Time of the block of the upgrade
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    proxy = relationship(
+        "Asset",
+        foreign_keys=[proxy_id],
+        backref=backref("upgrades", lazy="dynamic", order_by="ProxyUpgrade.block_number", passive_deletes=True),
+    )
+    implementation = relationship("Asset", foreign_keys=[implementation_id])
+
+    @classmethod
+    def from_event(cls, proxy, event: Dict[str, Any], implementation=None) -> "ProxyUpgrade":
+        """Create a row from an upgrade event of EVMExplorer.get_proxy_upgrade_events"""
+        return cls(
+            proxy=proxy,
+            implementation=implementation,
+            implementation_address=event["implementation"],
+            block_number=event.get("blockNumber"),
+            transaction_hash=event.get("transactionHash"),
+            timestamp=to_datetime(event.get("timestamp")),
+        )
+
+    def to_dict(self):
+        """Convert model instance to dictionary representation.
+
+        Returns:
+            dict: Dictionary containing model data with datetime fields converted to ISO format
+        """
+        return {
+            "id": self.id,
+            "proxy_id": self.proxy_id,
+            "implementation_id": self.implementation_id,
+            "implementation_address": self.implementation_address,
+            "block_number": self.block_number,
+            "transaction_hash": self.transaction_hash,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
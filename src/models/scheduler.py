@@ -0,0 +1,61 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from src.backend.database import Base
+
+
+class ScheduledActionState(Base):
+    """Model for persisting the state of scheduled actions.
+
+    Keeps the last and next run time of each scheduled action so that a restart continues
+    the schedule instead of running every action immediately.
+    """
+
+    __tablename__ = "scheduled_action_state"
+
+    name = Column(String, primary_key=True)  # Name of the scheduled action
+    last_run = Column(DateTime)  # Time the action last ran
+    next_run = Column(DateTime)  # Time the action is due next
+    last_job_id = Column(String)  # Job started by the last run, if any
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert model instance to dictionary representation.
+
+        Returns:
+            dict: Dictionary containing model data with datetime fields converted to ISO format
+        """
+        return {
+            "name": self.name,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_job_id": self.last_job_id,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class SchedulerLease(Base):
+    """Model for the scheduler leader lease.
+
+    Only the replica holding an unexpired lease runs scheduled actions. The holder renews the
+    lease periodically; if it stops doing so, another replica takes over once the lease expires.
+    """
+
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)  # Name of the lease
+    holder = Column(String, nullable=False)  # ID of the replica holding the lease
+    acquired_at = Column(DateTime, default=datetime.utcnow)  # Time the current holder took over
+    expires_at = Column(DateTime, nullable=False)  # Lease is free after this time
+
+    def to_dict(self):
+        """Convert model instance to dictionary representation.
+
+        Returns:
+            dict: Dictionary containing model data with datetime fields converted to ISO format
+        """
+        return {
+            "name": self.name,
+            "holder": self.holder,
+            "acquired_at": self.acquired_at.isoformat() if self.acquired_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
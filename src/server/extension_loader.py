@@ -3,6 +3,8 @@ import os
 import sys
 from src.actions.base import BaseAction
 from src.handlers.base import Handler
+from src.jobs.base import Job
+from src.jobs.manager import JobManager
 from src.util.logging import Logger
 from src.actions.registry import ActionRegistry
 from src.handlers.registry import HandlerRegistry
@@ -127,6 +129,12 @@ class ExtensionLoader:
                                 self.logger.info(f"Registered action: {item.spec.name}")
                             else:
                                 self.logger.debug(f"Action {item_name} has no spec!")
+                        elif issubclass(item, Job) and item != Job:
+                            if item.job_type:
+                                JobManager.register_job_class(item.job_type, item)
+                                self.logger.info(f"Registered job: {item.job_type}")
+                            else:
+                                self.logger.debug(f"Job {item_name} has no job_type, workers can't run it")
                         elif issubclass(item, WebhookHandler) and item != WebhookHandler:
                             webhook_server = await WebhookServer.get_instance()
                             webhook_server.register_handler(f"/{item_name.lower()}", item())
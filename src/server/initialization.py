@@ -2,6 +2,28 @@ from sqlalchemy import text
 from src.backend.database import db, Base, DBSessionMixin
 from src.util.logging import Logger
 from src.indexers.immunefi import ImmunefiIndexer
+import src.models  # noqa: F401 - register all models with Base.metadata
+from src.models.base import Asset
+from src.models.proxy import ProxyUpgrade, to_datetime
+
+# Columns added after the initial release. create_all() only creates missing tables,
+# so these are applied to existing databases on every start.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS params JSON",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS fingerprint VARCHAR",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS resource_usage JSON",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS checkpoint JSON",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_worker_id ON jobs (worker_id)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_fingerprint ON jobs (fingerprint)",
+    "ALTER TABLE projects ADD COLUMN IF NOT EXISTS source_hash VARCHAR",
+    "ALTER TABLE assets ADD COLUMN IF NOT EXISTS proxy_scanned_block BIGINT",
+    "ALTER TABLE github_repo_state ADD COLUMN IF NOT EXISTS commits_etag VARCHAR",
+    "ALTER TABLE github_repo_state ADD COLUMN IF NOT EXISTS pulls_etag VARCHAR",
+]
 
 
 class Initializer(DBSessionMixin):
@@ -15,6 +37,7 @@ class Initializer(DBSessionMixin):
         """Initialize database schema and required extensions"""
         try:
             if db.is_initialized():
+                self.upgrade_schema()
                 return "Database already initialized"
 
             # First check if vector extension is available
@@ -72,6 +95,51 @@ class Initializer(DBSessionMixin):
             self.logger.error(f"Failed to initialize database: {str(e)}")
             raise
 
+    def upgrade_schema(self) -> None:
+        """Create tables and columns that were added since the database was initialized"""
+        Base.metadata.create_all(db.get_engine())
+        with self.get_session() as session:
+            for statement in SCHEMA_UPGRADES:
+                session.execute(text(statement))
+            session.commit()
+            self.migrate_implementation_history(session)
+
+    def migrate_implementation_history(self, session) -> int:
+        """Move implementation histories kept in the extra_data of proxies to the proxy_upgrades table
+
+        Returns:
+            Number of migrated upgrades
+        """
+        proxies = [
+            asset
+            for asset in session.query(Asset).filter(Asset.is_proxy == True).all()  # noqa: E712
+            if isinstance(asset.extra_data, dict) and "implementation_history" in asset.extra_data
+        ]
+        if not proxies:
+            return 0
+
+        urls = {entry.get("url") for proxy in proxies for entry in proxy.extra_data["implementation_history"]}
+        implementation_ids = dict(session.query(Asset.identifier, Asset.id).filter(Asset.identifier.in_(urls)).all())
+
+        migrated = 0
+        for proxy in proxies:
+            for entry in proxy.extra_data["implementation_history"]:
+                session.add(
+                    ProxyUpgrade(
+                        proxy_id=proxy.id,
+                        implementation_id=implementation_ids.get(entry.get("url")),
+                        implementation_address=entry["address"],
+                        block_number=entry.get("block_number"),
+                        timestamp=to_datetime(entry.get("timestamp")),
+                    )
+                )
+                migrated += 1
+            # Assign a new dict, in-place changes of JSON columns are not tracked
+            proxy.extra_data = {key: value for key, value in proxy.extra_data.items() if key != "implementation_history"}
+        session.commit()
+        self.logger.info(f"Migrated {migrated} implementation upgrades of {len(proxies)} proxies to proxy_upgrades")
+        return migrated
+
     async def initial_sync(self) -> str:
         """Perform initial data sync without triggering events"""
         try:
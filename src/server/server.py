@@ -6,11 +6,13 @@ from src.util.logging import Logger
 from src.server.initialization import Initializer
 from src.actions.registry import ActionRegistry
 from src.jobs.manager import JobManager
+from src.jobs.worker import JobWorker
 from src.server.extension_loader import ExtensionLoader
 from src.webhooks.server import WebhookServer
 from src.jobs.scheduler import Scheduler
 from src.config.config import Config
 from src.webhooks.handlers import QuicknodeWebhookHandler
+from src.util.http import HttpClient
 
 
 class Server:
@@ -33,6 +35,9 @@ class Server:
             # Initialize database
             await initializer.init_db()
 
+            # Open the shared HTTP connection pool
+            await HttpClient().start()
+
             # Start webhook server if enabled
             webhook_enabled = config.get("webhook_server.enabled", True)
             if webhook_enabled:
@@ -56,6 +61,11 @@ class Server:
             logger.info("Starting job manager...")
             await job_manager.start()
 
+            # Resume jobs interrupted by the previous shutdown
+            resumed = await job_manager.resume_interrupted_jobs()
+            if resumed:
+                logger.info(f"Resumed {len(resumed)} interrupted jobs")
+
             # Initialize and start scheduler
             logger.info("Starting scheduler...")
             scheduler = await Scheduler.get_instance()
@@ -121,5 +131,67 @@ class Server:
                 except Exception as e:
                     logger.error(f"Error stopping webhook server: {e}")
 
+            # Close pooled HTTP connections
+            try:
+                await HttpClient().close()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {e}")
+
             logger.info("Server shutdown complete")
             print("Server shutdown complete")  # Direct console output
+
+    @classmethod
+    async def run_worker(cls, concurrency: int = None) -> None:
+        """Run a worker process that executes jobs queued by the server"""
+        logger = Logger("Worker")
+        initializer = Initializer()
+        job_manager = JobManager()
+        worker = None
+
+        try:
+            print("Starting worker...")  # Direct console output
+
+            # Initialize database
+            await initializer.init_db()
+
+            # Open the shared HTTP connection pool
+            await HttpClient().start()
+
+            # Load extensions so that extension jobs and handlers are available
+            logger.info("Loading extensions...")
+            extension_loader = ExtensionLoader()
+            extension_loader.load_extensions()
+            await extension_loader.register_components()
+
+            worker = JobWorker(concurrency=concurrency)
+            print(f"Worker {worker.worker_id} is running...")  # Direct console output
+            await worker.run()
+
+        except asyncio.CancelledError:
+            logger.info("Worker shutdown initiated")
+            raise
+
+        except Exception as e:
+            logger.error(f"Worker error: {str(e)}")
+            print(f"Worker error: {str(e)}")  # Direct console output
+            raise
+
+        finally:
+            if worker:
+                try:
+                    await worker.stop()
+                except Exception as e:
+                    logger.error(f"Error stopping worker: {e}")
+
+            try:
+                await job_manager.stop()
+            except Exception as e:
+                logger.error(f"Error stopping job manager: {e}")
+
+            try:
+                await HttpClient().close()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {e}")
+
+            logger.info("Worker shutdown complete")
+            print("Worker shutdown complete")  # Direct console output
@@ -0,0 +1,63 @@
+"""Block timestamps cached per chain in memory and in the database"""
+
+from typing import Dict, Iterable
+from src.backend.database import DBSessionMixin
+from src.models.chain import BlockTimestamp
+from src.util.logging import Logger
+
+
+class BlockTimestampCache(DBSessionMixin):
+    """Timestamps of blocks by chain, shared by all explorers and jobs
+
+    Lookups are served from memory first, then from the block_timestamps table, so each block
+    is fetched from an explorer at most once. Database errors only cost a lookup, they are
+    never raised.
+    """
+
+    # Shared by all instances, keyed by chain and block number
+    _memory: Dict[str, Dict[int, int]] = {}
+
+    def __init__(self, session=None):
+        DBSessionMixin.__init__(self, session)
+        self.logger = Logger("BlockTimestampCache")
+
+    def get_many(self, chain: str, block_numbers: Iterable[int]) -> Dict[int, int]:
+        """Get the known timestamps of blocks
+
+        Returns:
+            Unix timestamps by block number, without the blocks that are not cached
+        """
+        memory = self._memory.setdefault(chain, {})
+        wanted = set(block_numbers)
+        found = {block: memory[block] for block in wanted if block in memory}
+        missing = wanted - found.keys()
+        if not missing:
+            return found
+
+        try:
+            with self.get_session() as session:
+                rows = (
+                    session.query(BlockTimestamp)
+                    .filter(BlockTimestamp.chain == chain, BlockTimestamp.block_number.in_(missing))
+                    .all()
+                )
+                for row in rows:
+                    memory[row.block_number] = found[row.block_number] = row.timestamp
+        except Exception as e:
+            self.logger.warning(f"Failed to load block timestamps for {chain}: {str(e)}")
+        return found
+
+    def put(self, chain: str, block_number: int, timestamp: int) -> None:
+        """Store the timestamp of a block"""
+        self._memory.setdefault(chain, {})[block_number] = timestamp
+        try:
+            with self.get_session() as session:
+                session.merge(BlockTimestamp(chain=chain, block_number=block_number, timestamp=timestamp))
+                session.commit()
+        except Exception as e:
+            self.logger.warning(f"Failed to store timestamp of block {block_number} on {chain}: {str(e)}")
+
+    @classmethod
+    def clear_memory(cls) -> None:
+        """Forget the timestamps held in memory, the database keeps them"""
+        cls._memory.clear()
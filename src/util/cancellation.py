@@ -0,0 +1,24 @@
+"""Cooperative cancellation for blocking work running outside the event loop"""
+
+import threading
+
+
+class CancellationToken:
+    """Thread-safe flag that tells blocking work to stop
+
+    Cancelling an asyncio task does not interrupt code running in an executor thread. Work
+    submitted to an executor receives the token of its job and checks it between units of work,
+    e.g. between files, so that it returns shortly after the job is cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation"""
+        self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Whether cancellation was requested"""
+        return self._event.is_set()
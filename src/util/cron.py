@@ -0,0 +1,99 @@
+"""Minimal cron expression support for scheduled actions"""
+
+from datetime import datetime, timedelta
+from typing import Set
+
+# (name, minimum, maximum) of the five cron fields
+FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6)]
+
+# Give up looking for a matching time after this many years (e.g. "0 0 31 2 *" never matches)
+MAX_YEARS = 5
+
+
+class CronExpression:
+    """Standard five-field cron expression: minute hour day-of-month month day-of-week
+
+    Supports "*", single values, ranges ("1-5"), lists ("1,15") and steps ("*/15", "0-30/10").
+    Day of week is 0-6 with 0 = Sunday; 7 is accepted as Sunday as well. As in cron, when both
+    day of month and day of week are restricted, a time matches if either of them matches.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression must have 5 fields, got {len(parts)}: {expression}")
+
+        values = []
+        for part, (name, minimum, maximum) in zip(parts, FIELDS):
+            upper = 7 if name == "weekday" else maximum
+            values.append(self._parse_field(part, name, minimum, upper))
+
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self._day_restricted = parts[2] != "*"
+        self._weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, name: str, minimum: int, maximum: int) -> Set[int]:
+        """Parse a single cron field into the set of values it matches"""
+        values = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step_str = item.split("/", 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid step in {name} field: {field}")
+
+            if item == "*":
+                start, end = minimum, maximum
+            elif "-" in item:
+                start_str, end_str = item.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(item)
+                end = maximum if step > 1 else start
+
+            if start < minimum or end > maximum or start > end:
+                raise ValueError(f"Value out of range in {name} field: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_match = dt.day in self.days
+        # Python: Monday = 0, cron: Sunday = 0
+        weekday_match = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, after: datetime) -> datetime:
+        """Get the first matching time strictly after the given time
+
+        Args:
+            after: Reference time
+
+        Returns:
+            The next time matching the expression
+        """
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366 * MAX_YEARS)
+
+        while dt <= limit:
+            if dt.month not in self.months:
+                # Jump to the first day of the next month
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+
+        raise ValueError(f"Cron expression never matches: {self.expression}")
@@ -2,7 +2,7 @@ from sqlalchemy import inspect
 from src.backend.database import db
 
 # Define allowed tables
-ALLOWED_TABLES = {"projects", "assets"}
+ALLOWED_TABLES = {"projects", "assets", "proxy_upgrades"}
 
 
 def get_table_schema() -> str:
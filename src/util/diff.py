@@ -0,0 +1,320 @@
+"""Line diffs with bounded time and output size
+
+Lines are hashed to integers once, so comparisons are cheap. Lines that occur exactly once in
+both versions are matched first (patience diff), which splits a file into small regions around
+unchanged declarations. Only these regions are diffed with Myers' O(ND) algorithm. If a region
+is too costly or the time limit is reached, it is reported as replaced instead, so a diff always
+finishes, at worst with coarser hunks.
+"""
+
+import html
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# (tag, i1, i2, j1, j2) like difflib.SequenceMatcher.get_opcodes(), tags are equal, replace, delete and insert
+Opcode = Tuple[str, int, int, int, int]
+
+DEFAULT_TIMEOUT = 2.0  # Seconds
+DEFAULT_CONTEXT = 3  # Unchanged lines shown around changes
+
+# Edit distance up to which a region without unique lines is diffed exactly. Myers' trace needs
+# memory quadratic in it, beyond it the region is shown as replaced.
+MAX_MYERS_COST = 1000
+
+
+@dataclass
+class DiffResult:
+    """Opcodes transforming the old into the new lines"""
+
+    opcodes: List[Opcode] = field(default_factory=list)
+    exact: bool = True  # False if some region was shown as replaced to stay within the limits
+
+    @property
+    def changed(self) -> bool:
+        return any(tag != "equal" for tag, *_ in self.opcodes)
+
+
+class _Differ:
+    def __init__(self, a: Sequence[str], b: Sequence[str], deadline: Optional[float]):
+        ids: Dict[str, int] = {}
+        self.a = [ids.setdefault(line, len(ids)) for line in a]
+        self.b = [ids.setdefault(line, len(ids)) for line in b]
+        self.deadline = deadline
+        self.exact = True
+
+    def matches(self) -> List[Tuple[int, int]]:
+        """Get the pairs of matching line numbers"""
+        matches = []
+        regions = [(0, len(self.a), 0, len(self.b))]
+        while regions:
+            alo, ahi, blo, bhi = regions.pop()
+            a, b = self.a, self.b
+
+            # Common prefix and suffix
+            while alo < ahi and blo < bhi and a[alo] == b[blo]:
+                matches.append((alo, blo))
+                alo += 1
+                blo += 1
+            while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+                ahi -= 1
+                bhi -= 1
+                matches.append((ahi, bhi))
+            if alo == ahi or blo == bhi:
+                continue
+
+            anchors = self._unique_anchors(alo, ahi, blo, bhi)
+            if anchors:
+                matches.extend(anchors)
+                starts = [(alo, blo)] + [(i + 1, j + 1) for i, j in anchors]
+                ends = anchors + [(ahi, bhi)]
+                regions.extend((i1, i2, j1, j2) for (i1, j1), (i2, j2) in zip(starts, ends))
+            else:
+                matches.extend(self._myers(alo, ahi, blo, bhi))
+
+        matches.sort()
+        return matches
+
+    def _unique_anchors(self, alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+        """Match the lines that occur once in both regions, keeping the longest run in order"""
+        counts: Dict[int, List[int]] = {}
+        for i in range(alo, ahi):
+            entry = counts.setdefault(self.a[i], [0, i, 0, 0])
+            entry[0] += 1
+        for j in range(blo, bhi):
+            entry = counts.get(self.b[j])
+            if entry is not None:
+                entry[2] += 1
+                entry[3] = j
+        pairs = sorted((entry[1], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[2] == 1)
+        if not pairs:
+            return []
+
+        # Longest increasing subsequence of the positions in b (patience sorting)
+        tails: List[int] = []
+        tail_indexes: List[int] = []
+        previous = [-1] * len(pairs)
+        for index, (_, j) in enumerate(pairs):
+            position = bisect_left(tails, j)
+            if position == len(tails):
+                tails.append(j)
+                tail_indexes.append(index)
+            else:
+                tails[position] = j
+                tail_indexes[position] = index
+            previous[index] = tail_indexes[position - 1] if position else -1
+
+        anchors = []
+        index = tail_indexes[-1]
+        while index != -1:
+            anchors.append(pairs[index])
+            index = previous[index]
+        anchors.reverse()
+        return anchors
+
+    def _timed_out(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def _myers(self, alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+        """Find a longest common subsequence of a region with Myers' greedy algorithm"""
+        a, b = self.a, self.b
+        n, m = ahi - alo, bhi - blo
+        max_cost = min(n + m, MAX_MYERS_COST)
+        offset = max_cost + 1
+        v = [0] * (2 * max_cost + 3)
+        trace = []
+
+        for d in range(max_cost + 1):
+            if d % 64 == 0 and self._timed_out():
+                break
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                    x = v[offset + k + 1]
+                else:
+                    x = v[offset + k - 1] + 1
+                y = x - k
+                while x < n and y < m and a[alo + x] == b[blo + y]:
+                    x += 1
+                    y += 1
+                v[offset + k] = x
+                if x >= n and y >= m:
+                    trace.append(v[offset - d : offset + d + 1])
+                    return self._backtrack(trace, n, m, alo, blo)
+            trace.append(v[offset - d : offset + d + 1])
+
+        # Too costly or out of time, treat the whole region as replaced
+        self.exact = False
+        return []
+
+    @staticmethod
+    def _backtrack(trace: List[List[int]], n: int, m: int, alo: int, blo: int) -> List[Tuple[int, int]]:
+        matches = []
+        x, y = n, m
+        for d in range(len(trace) - 1, 0, -1):
+            previous = trace[d - 1]
+            k = x - y
+            if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+                previous_k = k + 1
+            else:
+                previous_k = k - 1
+            previous_x = previous[previous_k + d - 1]
+            previous_y = previous_x - previous_k
+            while x > previous_x and y > previous_y:
+                x -= 1
+                y -= 1
+                matches.append((alo + x, blo + y))
+            x, y = previous_x, previous_y
+        while x > 0 and y > 0:
+            x -= 1
+            y -= 1
+            matches.append((alo + x, blo + y))
+        return matches
+
+
+def diff_lines(a: Sequence[str], b: Sequence[str], timeout: Optional[float] = DEFAULT_TIMEOUT) -> DiffResult:
+    """Diff two sequences of lines
+
+    Args:
+        a: Old lines
+        b: New lines
+        timeout: Seconds after which remaining regions are shown as replaced, None for no limit
+    """
+    differ = _Differ(a, b, time.monotonic() + timeout if timeout is not None else None)
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for mi, mj in differ.matches() + [(len(a), len(b))]:
+        if i < mi and j < mj:
+            opcodes.append(("replace", i, mi, j, mj))
+        elif i < mi:
+            opcodes.append(("delete", i, mi, j, j))
+        elif j < mj:
+            opcodes.append(("insert", i, i, j, mj))
+        if mi < len(a):
+            # Extend the previous equal opcode or start a new one
+            if opcodes and opcodes[-1][0] == "equal" and opcodes[-1][2] == mi:
+                tag, i1, _, j1, _ = opcodes[-1]
+                opcodes[-1] = (tag, i1, mi + 1, j1, mj + 1)
+            else:
+                opcodes.append(("equal", mi, mi + 1, mj, mj + 1))
+        i, j = mi + 1, mj + 1
+    return DiffResult(opcodes=opcodes, exact=differ.exact)
+
+
+def group_hunks(opcodes: List[Opcode], context: int = DEFAULT_CONTEXT) -> List[List[Opcode]]:
+    """Group changes with up to context unchanged lines around them, like unified diffs"""
+    codes = list(opcodes)
+    if not codes:
+        return []
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    hunks = []
+    hunk: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Unchanged runs longer than twice the context separate hunks
+        if tag == "equal" and i2 - i1 > 2 * context:
+            hunk.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            hunks.append(hunk)
+            hunk = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        hunk.append((tag, i1, i2, j1, j2))
+    hunks.append(hunk)
+    return [hunk for hunk in hunks if any(tag != "equal" for tag, *_ in hunk)]
+
+
+def _hunk_header(hunk: List[Opcode]) -> str:
+    i1, i2, j1, j2 = hunk[0][1], hunk[-1][2], hunk[0][3], hunk[-1][4]
+    return f"@@ -{i1 + 1},{i2 - i1} +{j1 + 1},{j2 - j1} @@"
+
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    fromfile: str = "",
+    tofile: str = "",
+    context: int = DEFAULT_CONTEXT,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> Iterator[str]:
+    """Generate the lines of a unified diff, without line endings"""
+    hunks = group_hunks(diff_lines(a, b, timeout).opcodes, context)
+    if not hunks:
+        return
+    yield f"--- {fromfile}"
+    yield f"+++ {tofile}"
+    for hunk in hunks:
+        yield _hunk_header(hunk)
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal":
+                yield from (f" {line}" for line in a[i1:i2])
+                continue
+            yield from (f"-{line}" for line in a[i1:i2])
+            yield from (f"+{line}" for line in b[j1:j2])
+
+
+def _cell(number: Optional[int], line: Optional[str], css: str) -> str:
+    if line is None:
+        return '<td class="diff_header"></td><td></td>'
+    return f'<td class="diff_header">{number}</td><td class="{css}">{html.escape(line)}</td>'
+
+
+def _unified_row(old_number: Optional[int], new_number: Optional[int], line: str, css: str) -> str:
+    return (
+        f'<tr><td class="diff_header">{old_number or ""}</td><td class="diff_header">{new_number or ""}</td>'
+        f'<td class="{css}">{html.escape(line)}</td></tr>'
+    )
+
+
+def render_html(
+    a: Sequence[str],
+    b: Sequence[str],
+    layout: str = "side_by_side",
+    context: int = DEFAULT_CONTEXT,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> Iterator[str]:
+    """Render a diff as HTML tables, one per hunk
+
+    Each hunk is a <details> element that can be folded, and the unchanged lines between hunks
+    are summarized. Chunks are generated one hunk at a time so callers can stop at a size limit.
+
+    Args:
+        layout: "side_by_side" for old and new lines next to each other, or "unified"
+    """
+    result = diff_lines(a, b, timeout)
+    if not result.exact:
+        yield '<p class="diff_note">Parts of this diff were too large to compare line by line and are shown as replaced.</p>'
+
+    previous_end = 0
+    for hunk in group_hunks(result.opcodes, context):
+        skipped = hunk[0][1] - previous_end
+        if skipped:
+            yield f'<p class="diff_fold">⋯ {skipped} unchanged lines</p>'
+        previous_end = hunk[-1][2]
+
+        rows = []
+        for tag, i1, i2, j1, j2 in hunk:
+            if layout == "unified":
+                if tag == "equal":
+                    rows.extend(_unified_row(i + 1, j + 1, a[i], "") for i, j in zip(range(i1, i2), range(j1, j2)))
+                    continue
+                rows.extend(_unified_row(i + 1, None, a[i], "diff_sub") for i in range(i1, i2))
+                rows.extend(_unified_row(None, j + 1, b[j], "diff_add") for j in range(j1, j2))
+                continue
+
+            css = {"equal": "", "replace": "diff_chg", "delete": "diff_sub", "insert": "diff_add"}[tag]
+            for i, j in zip_longest(range(i1, i2), range(j1, j2)):
+                old = _cell(i + 1, a[i], css) if i is not None else _cell(None, None, css)
+                new = _cell(j + 1, b[j], css) if j is not None else _cell(None, None, css)
+                rows.append(f"<tr>{old}{new}</tr>")
+
+        yield (
+            f"<details open><summary>{_hunk_header(hunk)}</summary>" f'<table class="diff">{"".join(rows)}</table></details>\n'
+        )
+
+    if previous_end and previous_end < len(a):
+        yield f'<p class="diff_fold">⋯ {len(a) - previous_end} unchanged lines</p>'
@@ -0,0 +1,101 @@
+"""EIP-1967 proxy detection through storage slot reads
+
+EIP-1967 proxies keep the address of their implementation, admin and beacon in fixed storage
+slots. Reading the slots with batched eth_getStorageAt calls classifies many contracts per
+request to a node, without using block explorer quota.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from src.util.logging import Logger
+from src.util.rpc import RpcError, rpc_batch
+
+logger = Logger("EIP1967")
+
+# bytes32(uint256(keccak256("eip1967.proxy.implementation")) - 1)
+IMPLEMENTATION_SLOT = "0x360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc"
+# bytes32(uint256(keccak256("eip1967.proxy.admin")) - 1)
+ADMIN_SLOT = "0xb53127684a568b3173ae13b9f8a6016e243e63b6e8ee1178d6a717850b5d6103"
+# bytes32(uint256(keccak256("eip1967.proxy.beacon")) - 1)
+BEACON_SLOT = "0xa3f0ad74e5423aebfd80d3ef4346578335a9a72aeaee59ff6cb3582b35133d50"
+# implementation() of a beacon
+BEACON_IMPLEMENTATION_SELECTOR = "0x5c60da1b"
+
+SLOTS = (IMPLEMENTATION_SLOT, ADMIN_SLOT, BEACON_SLOT)
+
+# Contracts whose slots are read per request, three calls each
+DEFAULT_BATCH_SIZE = 100
+
+
+@dataclass
+class ProxySlots:
+    """Addresses stored in the EIP-1967 slots of a contract, None where a slot is empty"""
+
+    implementation: Optional[str] = None
+    admin: Optional[str] = None
+    beacon: Optional[str] = None
+
+    @property
+    def is_proxy(self) -> bool:
+        return self.implementation is not None or self.beacon is not None
+
+
+def _to_address(word: Optional[str]) -> Optional[str]:
+    """Get the address in the low 20 bytes of a 32-byte word, None if it is zero"""
+    if not word or len(word) < 42:
+        return None
+    address = "0x" + word[-40:].lower()
+    return None if int(address, 16) == 0 else address
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def detect_proxies(
+    rpc_url: str, addresses: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, ProxySlots]:
+    """Read the EIP-1967 slots of contracts
+
+    The implementation of a beacon proxy is taken from its beacon's implementation().
+
+    Args:
+        rpc_url: JSON-RPC endpoint of a node of the contracts' chain
+        addresses: Contract addresses
+        batch_size: Contracts per request
+
+    Returns:
+        Slots by lowercase address. Contracts whose slots could not be read are left out.
+    """
+    addresses = list(dict.fromkeys(address.lower() for address in addresses))
+    found: Dict[str, ProxySlots] = {}
+
+    for chunk in _chunks(addresses, batch_size):
+        calls = [("eth_getStorageAt", [address, slot, "latest"]) for address in chunk for slot in SLOTS]
+        try:
+            results = await rpc_batch(rpc_url, calls)
+        except RpcError as e:
+            logger.warning(f"Failed to read proxy slots of {len(chunk)} contracts: {str(e)}")
+            continue
+        for i, address in enumerate(chunk):
+            words = results[i * len(SLOTS) : (i + 1) * len(SLOTS)]
+            if any(word is None for word in words):
+                continue
+            found[address] = ProxySlots(*(_to_address(word) for word in words))
+
+    beacon_proxies = [address for address, slots in found.items() if slots.beacon and not slots.implementation]
+    for chunk in _chunks(beacon_proxies, batch_size * len(SLOTS)):
+        calls = [
+            ("eth_call", [{"to": found[address].beacon, "data": BEACON_IMPLEMENTATION_SELECTOR}, "latest"])
+            for address in chunk
+        ]
+        try:
+            results = await rpc_batch(rpc_url, calls)
+        except RpcError as e:
+            logger.warning(f"Failed to read beacon implementations of {len(chunk)} contracts: {str(e)}")
+            continue
+        for address, word in zip(chunk, results):
+            found[address].implementation = _to_address(word)
+
+    return found
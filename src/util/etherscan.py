@@ -1,8 +1,13 @@
+import asyncio
 import os
-import aiohttp
 import json
 import aiofiles
+from src.backend.source_cache import SourceCache
 from src.config.config import Config
+from src.util.http import HttpClient
+from src.util.logging import Logger
+from src.util.rate_limit import RateLimiter
+from src.util.block_timestamps import BlockTimestampCache
 from typing import Optional, Tuple, List, Dict
 from urllib.parse import urlparse
 from enum import Enum
@@ -18,6 +23,42 @@ class ExplorerType(Enum):
     BSCSCAN = "bscscan"
 
 
+# Retries of calls the explorer answered with a rate-limit reply, waiting twice as long each time
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 1.0
+
+
+def _parse_quantity(value: str) -> int:
+    """Parse a number from an explorer reply, which may be hex ("0x65a1b2c3") or decimal"""
+    return int(value, 16) if str(value).lower().startswith("0x") else int(value)
+
+
+def _is_rate_limited(data: dict) -> bool:
+    """Check for replies like {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}"""
+    return data.get("status") == "0" and "rate limit" in str(data.get("result", "")).lower()
+
+
+async def explorer_request(explorer_type: ExplorerType, api_key: Optional[str], url: str) -> dict:
+    """Call an explorer API, paced by the rate limiter of the explorer and key
+
+    Calls answered with a rate-limit reply pause the key's bucket and are retried.
+
+    Returns:
+        The JSON reply
+    """
+    limiter = RateLimiter()
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        bucket = await limiter.acquire(explorer_type.value, api_key)
+        async with HttpClient().get(url) as response:
+            data = await response.json()
+        if not _is_rate_limited(data) or attempt == RATE_LIMIT_RETRIES:
+            return data
+        delay = RATE_LIMIT_BACKOFF * 2**attempt
+        Logger("EVMExplorer").warning(f"{explorer_type.value} rate limit reached, retrying in {delay:.0f}s")
+        bucket.pause(delay)
+    return data
+
+
 class EVMExplorer:
     """Handles interaction with various EVM blockchain explorers"""
 
@@ -43,6 +84,7 @@ class EVMExplorer:
 
         self.config = Config()
         self.logger = logging.getLogger("EVMExplorer")  # pylint: disable=no-member
+        self.block_timestamps = BlockTimestampCache()
 
     def is_supported_explorer(self, url: str) -> Tuple[bool, Optional[ExplorerType]]:
         """Check if a URL is from a supported explorer
@@ -91,84 +133,137 @@ class EVMExplorer:
         self.logger.debug(f"Getting API key for {config_key} from path {config_path}: {'present' if api_key else 'missing'}")
         return api_key if api_key else None
 
-    async def get_proxy_upgrade_events(self, source_url: str) -> List[Dict]:
-        """Get proxy implementation upgrade events for an address"""
+    def get_rpc_url(self, explorer_type: ExplorerType) -> Optional[str]:
+        """Get the JSON-RPC endpoint configured for an explorer's chain"""
+        config_key = self.EXPLORERS[explorer_type]["config_key"]
+        return self.config.get(f"block_explorers.{config_key}.rpc_url") or None
+
+    async def get_block_number(self, explorer_type: ExplorerType) -> Optional[int]:
+        """Get the number of the latest block of an explorer's chain"""
         try:
-            # Clean up URL first
-            source_url = source_url.split("#")[0]
-            self.logger.info(f"Getting proxy upgrade events for {source_url}")
-
-            # Check if this is a supported explorer URL
-            is_supported, explorer_type = self.is_supported_explorer(source_url)  # Pass the full URL
-            if not is_supported:
-                if explorer_type:
-                    raise ValueError(f"No API key configured for {explorer_type.value}")
-                else:
-                    raise ValueError("Unsupported explorer URL")
-
-            # Extract clean address after URL validation
-            address = source_url.split("/")[-1].lower()
-            # Remove any extra parts after the address (like #code)
-            address = address.split("#")[0]
-
-            # Get API key and URL
             api_key = self.get_api_key(explorer_type)
-            api_url = self.get_api_url(explorer_type)
+            full_api_url = f"{self.get_api_url(explorer_type)}?module=proxy&action=eth_blockNumber&apikey={api_key}"
+            data = await explorer_request(explorer_type, api_key, full_api_url)
+            return _parse_quantity(data["result"])
+        except Exception as e:
+            self.logger.error(f"Error getting latest block of {explorer_type.value}: {str(e)}")
+            return None
 
-            # ERC1967 Upgrade event topic
-            upgrade_topic = "0xbc7cd75a20ee27fd9adebab32041f755214dbc6bffa90cc0225b39da2e5c2d3b"
+    async def get_proxy_upgrade_events(
+        self, source_url: str, from_block: Optional[int] = None, to_block: Optional[int] = None
+    ) -> List[Dict]:
+        """Get proxy implementation upgrade events for an address
 
-            # Construct API URL for getLogs
-            full_api_url = (
-                f"{api_url}?module=logs&action=getLogs" f"&address={address}" f"&topic0={upgrade_topic}" f"&apikey={api_key}"
-            )
+        Args:
+            source_url: Explorer URL of the contract
+            from_block: First block to search, defaults to the first block of the chain
+            to_block: Last block to search, defaults to the latest block
 
-            # Fetch logs
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_api_url) as response:
-                    data = await response.json()
+        Raises:
+            ValueError: If the explorer is not supported or the logs cannot be fetched. A contract
+                without upgrade events returns an empty list instead.
+        """
+        # Clean up URL first
+        source_url = source_url.split("#")[0]
+        self.logger.info(f"Getting proxy upgrade events for {source_url}")
 
-            if data["status"] != "1":
-                self.logger.warning(f"No upgrade events found for {address}: {data.get('message', 'Unknown error')}")
-                return []
+        # Check if this is a supported explorer URL
+        is_supported, explorer_type = self.is_supported_explorer(source_url)  # Pass the full URL
+        if not is_supported:
+            if explorer_type:
+                raise ValueError(f"No API key configured for {explorer_type.value}")
+            else:
+                raise ValueError("Unsupported explorer URL")
 
-            # Process events
-            events = []
-            for log in data["result"]:
-                # Extract implementation address from topics[1]
-                impl_address = "0x" + log["topics"][1][-40:]
+        # Extract clean address after URL validation
+        address = source_url.split("/")[-1].lower()
+        # Remove any extra parts after the address (like #code)
+        address = address.split("#")[0]
 
-                # Get block timestamp
-                block_number = int(log["blockNumber"], 16)
-                timestamp = await self._get_block_timestamp(explorer_type, block_number, api_key)
+        # Get API key and URL
+        api_key = self.get_api_key(explorer_type)
+        api_url = self.get_api_url(explorer_type)
 
-                events.append(
-                    {
-                        "implementation": impl_address.lower(),
-                        "blockNumber": block_number,
-                        "timestamp": timestamp,
-                        "transactionHash": log["transactionHash"],
-                    }
-                )
+        # ERC1967 Upgrade event topic
+        upgrade_topic = "0xbc7cd75a20ee27fd9adebab32041f755214dbc6bffa90cc0225b39da2e5c2d3b"
 
-            return sorted(events, key=lambda x: x["blockNumber"])
+        # Construct API URL for getLogs
+        full_api_url = (
+            f"{api_url}?module=logs&action=getLogs" f"&address={address}" f"&topic0={upgrade_topic}" f"&apikey={api_key}"
+        )
+        if from_block is not None:
+            full_api_url += f"&fromBlock={from_block}"
+        if to_block is not None:
+            full_api_url += f"&toBlock={to_block}"
 
-        except Exception as e:
-            self.logger.error(f"Error getting proxy upgrade events: {str(e)}")
-            return []
+        # Fetch logs
+        data = await explorer_request(explorer_type, api_key, full_api_url)
 
-    async def _get_block_timestamp(self, explorer_type: ExplorerType, block_number: int, api_key: str) -> str:
+        if data["status"] != "1":
+            # Explorers answer {"status": "0", "message": "No records found", "result": []} if there are no logs
+            if data.get("result") == []:
+                self.logger.info(f"No upgrade events found for {address}")
+                return []
+            raise ValueError(
+                f"Failed to get logs for {address}: {data.get('message', 'Unknown error')} {data.get('result', '')}"
+            )
+
+        logs = data["result"]
+        timestamps = await self._get_log_timestamps(explorer_type, logs, api_key)
+
+        # Process events
+        events = []
+        for log in logs:
+            # Extract implementation address from topics[1]
+            impl_address = "0x" + log["topics"][1][-40:]
+            block_number = int(log["blockNumber"], 16)
+            timestamp = timestamps.get(block_number)
+
+            events.append(
+                {
+                    "implementation": impl_address.lower(),
+                    "blockNumber": block_number,
+                    "timestamp": str(timestamp) if timestamp is not None else None,
+                    "transactionHash": log["transactionHash"],
+                }
+            )
+
+        return sorted(events, key=lambda x: x["blockNumber"])
+
+    async def _get_log_timestamps(self, explorer_type: ExplorerType, logs: List[Dict], api_key: str) -> Dict[int, int]:
+        """Get the timestamps of the blocks of logs by block number
+
+        getLogs replies carry the block timestamp of each log. Only blocks of logs without one are
+        looked up, from the shared cache first and then from the explorer, once per block.
+        """
+        timestamps = {}
+        for log in logs:
+            if log.get("timeStamp"):
+                timestamps[int(log["blockNumber"], 16)] = _parse_quantity(log["timeStamp"])
+
+        missing = {int(log["blockNumber"], 16) for log in logs} - timestamps.keys()
+        if not missing:
+            return timestamps
+
+        chain = explorer_type.value
+        timestamps.update(self.block_timestamps.get_many(chain, missing))
+        for block_number in sorted(missing - timestamps.keys()):
+            timestamp = await self._get_block_timestamp(explorer_type, block_number, api_key)
+            if timestamp is not None:
+                timestamps[block_number] = timestamp
+                self.block_timestamps.put(chain, block_number, timestamp)
+        return timestamps
+
+    async def _get_block_timestamp(self, explorer_type: ExplorerType, block_number: int, api_key: str) -> Optional[int]:
         """Get timestamp for a block number"""
         try:
             api_url = self.get_api_url(explorer_type)
             full_api_url = f"{api_url}?module=block&action=getblockreward" f"&blockno={block_number}" f"&apikey={api_key}"
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_api_url) as response:
-                    data = await response.json()
+            data = await explorer_request(explorer_type, api_key, full_api_url)
 
             if data["status"] == "1" and "result" in data:
-                return data["result"]["timeStamp"]
+                return _parse_quantity(data["result"]["timeStamp"])
             return None
 
         except Exception as e:
@@ -176,9 +271,18 @@ class EVMExplorer:
             return None
 
 
-async def fetch_verified_sources(explorer_url: str, target_path: str) -> bool:
+def _unlink_existing(path: str) -> None:
+    """Remove an old source file, which may be a link shared through the blob store, before rewriting it"""
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+async def fetch_verified_sources(explorer_url: str, target_path: str, use_cache: bool = True) -> bool:
     """
     Fetch verified sources from an EVM explorer and store them locally.
+
+    Sources are cached by chain and address (see SourceCache), so an address is downloaded once
+    and later requests are linked from the cache. Pass use_cache=False to download them again.
     """
 
     explorer = EVMExplorer()
@@ -195,6 +299,13 @@ async def fetch_verified_sources(explorer_url: str, target_path: str) -> bool:
         is_supported, explorer_type = explorer.is_supported_explorer(clean_url)
         explorer.logger.debug(f"Explorer support check: supported={is_supported}, type={explorer_type}")
 
+        # Served from the cache without an explorer call, so no API key is needed
+        if explorer_type and use_cache:
+            cached = await asyncio.to_thread(SourceCache().materialize, explorer_type.value, address, target_path)
+            if cached:
+                explorer.logger.debug(f"Linked {len(cached)} cached source files of {address}")
+                return True
+
         if not is_supported:
             if explorer_type:
                 explorer.logger.error(f"No API key configured for {explorer_type.value}")
@@ -221,9 +332,7 @@ async def fetch_verified_sources(explorer_url: str, target_path: str) -> bool:
 
         # Fetch source code
         explorer.logger.debug("About to fetch source code")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(full_api_url) as response:
-                data = await response.json()
+        data = await explorer_request(explorer_type, api_key, full_api_url)
 
         if data["status"] != "1":
             explorer.logger.error(f"Explorer API error: {data.get('message', 'Unknown error')} for {address}")
@@ -249,6 +358,7 @@ async def fetch_verified_sources(explorer_url: str, target_path: str) -> bool:
             try:
                 source_data = json.loads(source_code)
                 sources = source_data.get("sources", {})
+                written = []
 
                 for filename, filedata in sources.items():
                     file_content = filedata.get("content", "")
@@ -265,15 +375,23 @@ async def fetch_verified_sources(explorer_url: str, target_path: str) -> bool:
 
                     # Only proceed if security check passes
                     os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                    _unlink_existing(file_path)
                     async with aiofiles.open(file_path, "w") as f:
                         await f.write(file_content)
+                    written.append(os.path.relpath(file_path, target_path))
 
             except json.JSONDecodeError:
                 # If not JSON, save as single file
                 file_path = os.path.join(target_path, f"{address}.sol")
+                _unlink_existing(file_path)
                 async with aiofiles.open(file_path, "w") as f:
                     await f.write(source_code)
+                written = [f"{address}.sol"]
 
+            try:
+                await asyncio.to_thread(SourceCache().store, explorer_type.value, address, target_path, written)
+            except Exception as e:
+                explorer.logger.warning(f"Failed to cache sources of {address}: {str(e)}")
             return True
 
         except Exception as e:
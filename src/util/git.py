@@ -0,0 +1,145 @@
+"""Shallow git checkouts that are updated incrementally
+
+A checkout only ever holds the latest revision. Updating it fetches that single commit and
+lets git rewrite the files that differ, so unchanged files are left alone on disk and the
+paths that changed are known without comparing trees ourselves.
+"""
+
+import asyncio
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import List, Optional
+from src.util.logging import Logger
+
+logger = Logger("GitUtil")
+
+# Seconds a single git command may take before it is killed
+DEFAULT_GIT_TIMEOUT = 300
+
+
+class GitError(Exception):
+    """A git command failed"""
+
+
+@dataclass
+class RepoSync:
+    """Result of syncing a checkout
+
+    Paths are relative to the checkout and limited to files in the working tree,
+    i.e. matching the sparse-checkout patterns if any.
+    """
+
+    old_commit: Optional[str]  # None for a fresh clone
+    new_commit: str
+    changed: List[str] = field(default_factory=list)  # Added or modified files
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def cloned(self) -> bool:
+        return self.old_commit is None
+
+
+def git_available() -> bool:
+    """Check whether the git executable can be found"""
+    return shutil.which("git") is not None
+
+
+async def run_git(*args: str, cwd: Optional[str] = None, timeout: float = DEFAULT_GIT_TIMEOUT) -> str:
+    """Run a git command and return its standard output
+
+    Raises:
+        GitError: If git exits with an error or does not finish in time
+    """
+    # Never wait for credentials on a terminal that is not there
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+    process = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=cwd, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise GitError(f"git {args[0]} timed out after {timeout}s")
+    if process.returncode != 0:
+        raise GitError(f"git {args[0]} failed: {stderr.decode(errors='replace').strip()}")
+    return stdout.decode(errors="replace")
+
+
+def _split_nul(output: str) -> List[str]:
+    return [entry for entry in output.split("\0") if entry]
+
+
+async def _clone(
+    url: str, target_path: str, sparse_patterns: Optional[List[str]], revision: Optional[str], timeout: float
+) -> RepoSync:
+    # Whatever was there before, e.g. files extracted from an archive, is replaced by the checkout
+    if os.path.isdir(target_path):
+        await asyncio.to_thread(shutil.rmtree, target_path)
+    elif os.path.lexists(target_path):
+        os.remove(target_path)
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+
+    clone_args = ["clone", "--depth", "1", "--no-tags", "--no-checkout"]
+    if revision:
+        clone_args += ["--branch", revision]
+    await run_git(*clone_args, url, target_path, timeout=timeout)
+    if sparse_patterns:
+        await run_git("sparse-checkout", "set", "--no-cone", *sparse_patterns, cwd=target_path, timeout=timeout)
+    await run_git("checkout", "--force", "--quiet", cwd=target_path, timeout=timeout)
+
+    new_commit = (await run_git("rev-parse", "HEAD", cwd=target_path, timeout=timeout)).strip()
+    tracked = _split_nul(await run_git("ls-files", "-z", cwd=target_path, timeout=timeout))
+    changed = [path for path in tracked if os.path.lexists(os.path.join(target_path, path))]
+    return RepoSync(old_commit=None, new_commit=new_commit, changed=changed)
+
+
+async def sync_repo(
+    url: str,
+    target_path: str,
+    sparse_patterns: Optional[List[str]] = None,
+    revision: Optional[str] = None,
+    timeout: float = DEFAULT_GIT_TIMEOUT,
+) -> RepoSync:
+    """Clone a repository with depth 1, or fetch and check out its new revision if already cloned
+
+    Args:
+        url: Anything git can clone from, including local paths and file:// URLs
+        target_path: Directory of the checkout
+        sparse_patterns: Non-cone sparse-checkout patterns limiting the files written to disk,
+            only applied when cloning
+        revision: Branch or tag to follow, defaults to the remote HEAD
+        timeout: Seconds each git command may take
+
+    Raises:
+        GitError: If a git command fails
+    """
+    if not os.path.isdir(os.path.join(target_path, ".git")):
+        return await _clone(url, target_path, sparse_patterns, revision, timeout)
+
+    old_commit = (await run_git("rev-parse", "HEAD", cwd=target_path, timeout=timeout)).strip()
+    await run_git("fetch", "--depth", "1", "--no-tags", "origin", revision or "HEAD", cwd=target_path, timeout=timeout)
+    new_commit = (await run_git("rev-parse", "FETCH_HEAD", cwd=target_path, timeout=timeout)).strip()
+    if new_commit == old_commit:
+        return RepoSync(old_commit=old_commit, new_commit=new_commit)
+
+    # Both commits are in the shallow clone, so their trees can be compared without any history
+    entries = _split_nul(
+        await run_git("diff", "--name-status", "--no-renames", "-z", old_commit, new_commit, cwd=target_path, timeout=timeout)
+    )
+    statuses = list(zip(entries[::2], entries[1::2]))
+
+    # Files outside the sparse-checkout patterns are never on disk, so check what is there before and after
+    removed = [path for status, path in statuses if status == "D" and os.path.lexists(os.path.join(target_path, path))]
+    # Files may have been replaced by identical copies, e.g. hardlinks into the blob store. Refresh their
+    # stat data, or the forced checkout would rewrite every file whose inode or timestamps changed.
+    try:
+        await run_git("update-index", "-q", "--refresh", cwd=target_path, timeout=timeout)
+    except GitError:
+        pass  # Files with other contents are overwritten by the checkout anyway
+    await run_git("checkout", "--force", "--quiet", "--detach", new_commit, cwd=target_path, timeout=timeout)
+    changed = [path for status, path in statuses if status != "D" and os.path.lexists(os.path.join(target_path, path))]
+
+    logger.debug(f"Synced {url} from {old_commit[:12]} to {new_commit[:12]}: {len(changed)} changed, {len(removed)} removed")
+    return RepoSync(old_commit=old_commit, new_commit=new_commit, changed=changed, removed=removed)
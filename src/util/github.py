@@ -1,11 +1,32 @@
+import asyncio
 import os
-import aiohttp
+import shutil
+import tempfile
+import zipfile
+from typing import List, Optional, Set
 import aiofiles
 from src.config.config import Config
+from src.util.git import RepoSync, sync_repo
+from src.util.http import HttpClient
 from src.util.logging import Logger
 
 logger = Logger("GitHubUtil")
 
+GITHUB_API_URL = "https://api.github.com"
+
+# Repository archives are kept in memory up to this size, then spooled to a temporary file
+SPOOL_MEMORY_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Used when neither github.repo_extensions nor file_search.allowed_extensions is configured
+DEFAULT_EXTENSIONS = [".sol", ".cairo", ".rs", ".vy", ".fe", ".move", ".yul"]
+
+# Directories never extracted from repository archives: dependencies, tests and build output
+SKIPPED_DIRS = {"node_modules", "test", "tests", "artifacts", "cache", "out", "build", "coverage", ".git", ".github"}
+
+# Test files that live next to the sources, e.g. Foundry tests
+TEST_FILE_SUFFIXES = (".t.sol",)
+
 
 async def get_headers():
     """Get headers for GitHub API requests.
@@ -46,16 +67,19 @@ async def fetch_github_file(url: str, target_path: str) -> bool:
 
         # Fetch file content
         headers = await get_headers()
-        async with aiohttp.ClientSession() as session:
-            async with session.get(raw_url, headers=headers) as response:
-                if response.status != 200:
-                    logger.error(f"GitHub fetch error: Status code {response.status} for URL {raw_url}")
-                    return False
-                content = await response.text()
+        async with HttpClient().get(raw_url, headers=headers) as response:
+            if response.status != 200:
+                logger.error(f"GitHub fetch error: Status code {response.status} for URL {raw_url}")
+                return False
+            content = await response.text()
 
         # Create target directory if it doesn't exist
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
 
+        # The old file may be a link shared through the blob store, replace it instead of writing into it
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+
         # Write the content to the file
         async with aiofiles.open(target_path, "w") as f:
             await f.write(content)
@@ -67,9 +91,59 @@ async def fetch_github_file(url: str, target_path: str) -> bool:
         return False
 
 
+def _is_source_file(name: str, extensions: Set[str]) -> bool:
+    """Check whether an archive member should be extracted
+
+    Args:
+        name: Member name, starting with the owner-repo-sha directory GitHub puts around the tree
+        extensions: Allowed file extensions
+    """
+    parts = name.split("/")
+    if any(part.lower() in SKIPPED_DIRS for part in parts[1:-1]):
+        return False
+    filename = parts[-1].lower()
+    if filename.endswith(TEST_FILE_SUFFIXES):
+        return False
+    return os.path.splitext(filename)[1] in extensions
+
+
+def _member_path(target_path: str, name: str) -> str:
+    """Path of an archive member below target_path, dropping absolute and parent directory parts"""
+    parts = [part for part in name.split("/") if part not in ("", ".", "..")]
+    return os.path.join(target_path, *parts)
+
+
+def _extract_sources(archive, target_path: str, extensions: Set[str], max_file_size: int) -> int:
+    """Extract the source files of a repository archive
+
+    Returns:
+        Number of extracted files
+    """
+    os.makedirs(target_path, exist_ok=True)
+    archive.seek(0)
+    extracted = 0
+    with zipfile.ZipFile(archive) as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or info.file_size > max_file_size or not _is_source_file(info.filename, extensions):
+                continue
+            member_path = _member_path(target_path, info.filename)
+            os.makedirs(os.path.dirname(member_path), exist_ok=True)
+            # The old file may be a link shared through the blob store, replace it instead of writing into it
+            if os.path.lexists(member_path):
+                os.remove(member_path)
+            with zip_ref.open(info) as source, open(member_path, "wb") as target:
+                shutil.copyfileobj(source, target)
+            extracted += 1
+    return extracted
+
+
 async def fetch_github_repo(url: str, target_path: str) -> bool:
     """
-    Fetch an entire GitHub repository and store it locally.
+    Fetch an entire GitHub repository and store its source files locally.
+
+    The zipball is streamed into a temporary file that stays in memory up to SPOOL_MEMORY_SIZE,
+    and the download is aborted beyond github.max_archive_size. Only files with an allowed
+    source extension are extracted, skipping dependency, test and build directories.
 
     Args:
         url: GitHub repository URL of the format https://github.com/owner/repo
@@ -88,44 +162,83 @@ async def fetch_github_repo(url: str, target_path: str) -> bool:
         repo = parts[-1]
 
         # Construct API URL
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball"
+        api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/zipball"
+
+        config = Config()
+        max_archive_size = config.get("github.max_archive_size", 512 * 1024 * 1024)
+        max_file_size = config.get("github.max_file_size", 5 * 1024 * 1024)
+        extensions = set(
+            config.get("github.repo_extensions") or config.get("file_search.allowed_extensions", DEFAULT_EXTENSIONS)
+        )
 
         # Fetch repository content
         headers = await get_headers()
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url, headers=headers) as response:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_SIZE) as archive:
+            async with HttpClient().get(api_url, headers=headers) as response:
                 if response.status != 200:
                     logger.error(f"GitHub fetch error: Status code {response.status}")
                     return False
-                content = await response.read()
+
+                size = 0
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_archive_size:
+                        logger.error(f"GitHub archive of {url} exceeds {max_archive_size} bytes, skipping")
+                        return False
+                    archive.write(chunk)
 
                 # Check rate limit info
                 rate_limit = response.headers.get("X-RateLimit-Remaining")
                 if rate_limit:
                     logger.info(f"GitHub API requests remaining: {rate_limit}")
 
-        # Create target directory if it doesn't exist
-        os.makedirs(target_path, exist_ok=True)
+            extracted = await asyncio.to_thread(_extract_sources, archive, target_path, extensions, max_file_size)
+
+        logger.debug(f"Extracted {extracted} source files of {url} from a {size} byte archive")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error fetching GitHub repo {url}: {str(e)}")
+        return False
 
-        # Save zip file temporarily
-        zip_path = os.path.join(target_path, "repo.zip")
-        with open(zip_path, "wb") as f:
-            f.write(content)
 
-        # Extract zip file
-        import zipfile
+def _sparse_patterns(extensions: Set[str]) -> List[str]:
+    """Sparse-checkout patterns matching the files fetch_github_repo extracts from archives"""
+    patterns = [f"*{extension}" for extension in sorted(extensions)]
+    patterns += [f"!*{suffix}" for suffix in TEST_FILE_SUFFIXES]
+    patterns += [f"!**/{directory}/**" for directory in sorted(SKIPPED_DIRS)]
+    return patterns
 
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(target_path)
 
-        # Remove temporary zip file
-        os.remove(zip_path)
+async def sync_github_repo(url: str, target_path: str) -> Optional[RepoSync]:
+    """
+    Keep a shallow git checkout of a GitHub repository up to date.
 
-        return True
+    The first call clones the repository with depth 1. Later calls fetch only the latest
+    commit and let git rewrite the files that differ, so unchanged files stay untouched.
+    A sparse checkout limits the working tree to the files fetch_github_repo would extract.
 
+    Args:
+        url: GitHub repository URL of the format https://github.com/owner/repo
+        target_path: Path of the checkout; an existing directory that is not a checkout is replaced
+
+    Returns:
+        The changed and removed source files, or None if the sync failed
+    """
+    logger.debug(f"Syncing GitHub repo: {url} to {target_path}")
+
+    config = Config()
+    extensions = set(config.get("github.repo_extensions") or config.get("file_search.allowed_extensions", DEFAULT_EXTENSIONS))
+    try:
+        sync = await sync_repo(
+            url, target_path, sparse_patterns=_sparse_patterns(extensions), timeout=config.get("github.git_timeout", 300)
+        )
     except Exception as e:
-        logger.error(f"Error fetching GitHub repo {url}: {str(e)}")
-        return False
+        logger.error(f"Error syncing GitHub repo {url}: {str(e)}")
+        return None
+
+    logger.debug(f"Synced {url} at {sync.new_commit}: {len(sync.changed)} changed, {len(sync.removed)} removed files")
+    return sync
 
 
 async def check_rate_limit() -> dict:
@@ -135,8 +248,7 @@ async def check_rate_limit() -> dict:
         dict: Rate limit information including remaining requests
     """
     headers = await get_headers()
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://api.github.com/rate_limit", headers=headers) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to check rate limit: {response.status}")
-            return await response.json()
+    async with HttpClient().get(f"{GITHUB_API_URL}/rate_limit", headers=headers) as response:
+        if response.status != 200:
+            raise Exception(f"Failed to check rate limit: {response.status}")
+        return await response.json()
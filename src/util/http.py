@@ -0,0 +1,221 @@
+"""Shared HTTP client for outbound integrations
+
+All requests to GitHub, block explorers and Immunefi go through one aiohttp session, so
+connections are kept alive and reused per host and DNS lookups are cached instead of paying
+for a new pool, DNS lookup and TLS handshake on every call.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+import aiohttp
+from src.config.config import Config
+from src.util.logging import Logger
+from src.util.resource_usage import http_trace_config
+
+# Idempotent methods that are safe to retry
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Responses worth retrying: rate limited or temporarily unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Never wait longer than this for a Retry-After header
+MAX_RETRY_AFTER = 60
+
+
+class HostMetrics:
+    """Request counters for a single host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_time": round(self.total_time / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class RequestContext:
+    """Result of HttpClient.request, used like the return value of aiohttp.ClientSession.get
+
+    Either await it to get the response, or use it as an async context manager to release the
+    connection back to the pool when done.
+    """
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._response: Optional[aiohttp.ClientResponse] = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._response.release()
+
+
+class HttpClient:
+    """Pooled HTTP client with timeouts, retries with backoff and per-host metrics
+
+    The session is created on first use and closed by Server on shutdown.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self.logger = Logger("HttpClient")
+
+        config = Config()
+        self.pool_size = config.get("http.pool_size", 100)
+        self.pool_size_per_host = config.get("http.pool_size_per_host", 10)
+        self.dns_cache_ttl = config.get("http.dns_cache_ttl", 300)
+        self.timeout = aiohttp.ClientTimeout(
+            total=config.get("http.timeout", 300),
+            connect=config.get("http.connect_timeout", 10),
+            sock_read=config.get("http.read_timeout", 60),
+        )
+        self.max_retries = config.get("http.max_retries", 3)
+        self.backoff = config.get("http.backoff", 0.5)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it for the running event loop if needed
+
+        A session left over from a previous event loop is closed once its replacement is in place.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            stale, stale_loop = self._session, self._loop
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, trace_configs=[http_trace_config()]
+            )
+            self._loop = loop
+            if stale is not None and not stale.closed:
+                await self._close_stale_session(stale, stale_loop)
+        return self._session
+
+    async def _close_stale_session(self, session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close the session of an event loop that is no longer used by this client"""
+        if loop is not None and loop.is_running():
+            # The loop still runs in another thread, so its connections are closed there
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        try:
+            # Connections of a closed loop are dropped without waiting for them
+            await session.close()
+        except Exception as e:
+            self.logger.debug(f"Failed to close the session of a previous event loop: {e!r}")
+
+    async def start(self) -> None:
+        """Create the shared session"""
+        await self._get_session()
+        self.logger.info(
+            f"HTTP client started (pool {self.pool_size}, {self.pool_size_per_host} per host, {self.max_retries} retries)"
+        )
+
+    async def close(self) -> None:
+        """Close the shared session and all pooled connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def _get_metrics(self, url: str) -> HostMetrics:
+        host = urlparse(str(url)).netloc
+        if host not in self._metrics:
+            self._metrics[host] = HostMetrics()
+        return self._metrics[host]
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get request counters per host"""
+        return {host: metrics.to_dict() for host, metrics in sorted(self._metrics.items())}
+
+    def _retry_delay(self, attempt: int, response: Optional[aiohttp.ClientResponse] = None) -> float:
+        """Get the delay before the next attempt, honoring Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(int(retry_after), MAX_RETRY_AFTER)
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff * 2 ** (attempt - 1))
+
+    async def _request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """Send a request, retrying idempotent requests on connection errors and retryable statuses"""
+        metrics = self._get_metrics(url)
+        max_retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+        attempt = 0
+
+        while True:
+            attempt += 1
+            metrics.requests += 1
+            started = time.perf_counter()
+            try:
+                response = await (await self._get_session()).request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                metrics.errors += 1
+                metrics.total_time += time.perf_counter() - started
+                if attempt > max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                self.logger.debug(f"{method} {urlparse(url).netloc} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                metrics.total_time += time.perf_counter() - started
+                if response.status not in RETRY_STATUSES or attempt > max_retries:
+                    if response.status >= 400:
+                        metrics.errors += 1
+                    return response
+                delay = self._retry_delay(attempt, response)
+                response.release()
+                self.logger.debug(f"{method} {urlparse(url).netloc} returned {response.status}, retrying in {delay:.1f}s")
+
+            metrics.retries += 1
+            await asyncio.sleep(delay)
+
+    def request(self, method: str, url: str, **kwargs) -> RequestContext:
+        """Send a request
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed to aiohttp.ClientSession.request, e.g. headers, params or timeout
+
+        Returns:
+            Awaitable async context manager yielding the response
+        """
+        return RequestContext(self._request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs) -> RequestContext:
+        """Send a GET request"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> RequestContext:
+        """Send a POST request, which is not retried"""
+        return self.request("POST", url, **kwargs)
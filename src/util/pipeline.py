@@ -0,0 +1,164 @@
+"""Staged async pipelines with bounded queues
+
+A Pipeline passes items through a sequence of stages. Each stage has its own number of
+workers and a bounded input queue. When a stage falls behind, its queue fills up and the
+stage before it waits to hand over more items (backpressure), instead of work piling up in
+memory or a slow stage holding up the others while it still has queue space.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from src.util.logging import Logger
+
+# Marks an item that was dropped by an earlier stage, passed on so that ordered stages do not wait for it
+_DROPPED = object()
+
+
+class StageMetrics:
+    """Counters for a single stage"""
+
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.busy_time = 0.0  # Seconds spent in the handler, summed over workers
+        self.blocked_time = 0.0  # Seconds the previous stage waited for queue space
+        self.max_queue_depth = 0
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.last_finished - self.first_started) if self.first_started and self.last_finished else 0.0
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput": round(self.processed / elapsed, 2) if elapsed > 0 else None,  # Items per second
+            "busy_seconds": round(self.busy_time, 3),
+            "blocked_seconds": round(self.blocked_time, 3),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class Stage:
+    """A pipeline stage
+
+    Args:
+        name: Name used in logs and metrics
+        handler: Coroutine function processing one item. It returns the item for the next stage,
+            or None to drop it. Exceptions are logged and drop the item as well.
+        concurrency: Number of workers running the handler
+        queue_size: Capacity of the input queue
+        ordered: Receive items in the order they entered the pipeline; requires a single worker
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        queue_size: int = 16,
+        ordered: bool = False,
+    ):
+        if ordered and concurrency != 1:
+            raise ValueError(f"Ordered stage {name} must have a single worker")
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.metrics = StageMetrics()
+        self.queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[int, Any] = {}  # Out-of-order items of an ordered stage by sequence number
+        self._next_seq = 0
+
+
+class Pipeline:
+    """Runs items through a sequence of stages joined by bounded queues"""
+
+    def __init__(self, stages: List[Stage], name: str = "Pipeline"):
+        self.stages = stages
+        self.logger = Logger(name)
+
+    async def run(self, items: Iterable) -> None:
+        """Feed items into the first stage and wait until every stage is done with them
+
+        The iterable is consumed lazily, so it may stop early, e.g. when a sync is cancelled.
+        """
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            stage._pending = {}
+            stage._next_seq = 0
+
+        workers = [
+            asyncio.create_task(self._work(index)) for index, stage in enumerate(self.stages) for _ in range(stage.concurrency)
+        ]
+        try:
+            for seq, item in enumerate(items):
+                await self._deliver(0, seq, item)
+            # A stage's output is handed over before its items are marked done, so draining in order drains everything
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _deliver(self, index: int, seq: int, item: Any) -> None:
+        """Hand an item to a stage, or past the last stage"""
+        if index == len(self.stages):
+            return
+        stage = self.stages[index]
+
+        if not stage.ordered:
+            await self._put(stage, seq, item)
+            return
+
+        stage._pending[seq] = item
+        while stage._next_seq in stage._pending:
+            next_item = stage._pending.pop(stage._next_seq)
+            await self._put(stage, stage._next_seq, next_item)
+            stage._next_seq += 1
+
+    async def _put(self, stage: Stage, seq: int, item: Any) -> None:
+        started = time.perf_counter()
+        await stage.queue.put((seq, item))
+        stage.metrics.blocked_time += time.perf_counter() - started
+        stage.metrics.max_queue_depth = max(stage.metrics.max_queue_depth, stage.queue.qsize())
+
+    async def _work(self, index: int) -> None:
+        """Process items of a stage until cancelled"""
+        stage = self.stages[index]
+        while True:
+            seq, item = await stage.queue.get()
+            try:
+                if item is not _DROPPED:
+                    item = await self._process(stage, item)
+                await self._deliver(index + 1, seq, item)
+            finally:
+                stage.queue.task_done()
+
+    async def _process(self, stage: Stage, item: Any) -> Any:
+        metrics = stage.metrics
+        started = time.perf_counter()
+        if metrics.first_started is None:
+            metrics.first_started = started
+        try:
+            result = await stage.handler(item)
+            metrics.processed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Stage {stage.name} failed: {str(e)}")
+            metrics.failed += 1
+            result = None
+        finished = time.perf_counter()
+        metrics.busy_time += finished - started
+        metrics.last_finished = finished
+        return _DROPPED if result is None else result
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get counters, throughput and queue depth per stage"""
+        return {
+            stage.name: {**stage.metrics.to_dict(), "concurrency": stage.concurrency, "queue_size": stage.queue_size}
+            for stage in self.stages
+        }
@@ -0,0 +1,270 @@
+"""Rate limiting for outbound APIs
+
+Block explorer keys allow a few calls per second. Requests for the same explorer and key take
+a token from a shared bucket first, so concurrent jobs queue up and are paced at the allowed
+rate instead of running into rate-limit replies. APIs that report their quota in response
+headers, like GitHub, are paced by a QuotaScheduler instead.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+from src.config.config import Config
+from src.util.logging import Logger
+
+# Etherscan's free tier allows 5 calls per second
+DEFAULT_RATE = 5.0
+
+
+class TokenBucket:
+    """Hands out up to rate tokens per second, with at most burst tokens saved up
+
+    Waiting callers are served in order.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.throttled = 0  # Rate-limit replies despite pacing
+        self.wait_time = 0.0
+        self.started: Optional[float] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a token"""
+        queued = time.monotonic()
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self._tokens -= 1
+
+        now = time.monotonic()
+        self.requests += 1
+        self.wait_time += now - queued
+        if self.started is None:
+            self.started = queued
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for a while, e.g. after the API replied that the limit was reached"""
+        self.throttled += 1
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        # Share of the allowed calls that was used since the first request
+        capacity = self.burst + elapsed * self.rate
+        return {
+            "rate": self.rate,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_time, 2),
+            "utilization": round(min(1.0, self.requests / capacity), 2) if self.requests else 0.0,
+        }
+
+
+class RateLimiter:
+    """Token buckets by API and key, shared by all jobs"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self.logger = Logger("RateLimiter")
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def get_bucket(self, api: str, key: Optional[str]) -> TokenBucket:
+        """Get the bucket of an API and key, e.g. ("etherscan", api_key)
+
+        The rate is read from block_explorers.<api>.rate_limit in calls per second. Buckets only
+        live in one process, so in distributed mode the rate and burst are split among the
+        jobs.workers worker processes sharing the key.
+        """
+        bucket_key = (api, key or "")
+        if bucket_key not in self._buckets:
+            config = Config()
+            rate = config.get(f"block_explorers.{api}.rate_limit", DEFAULT_RATE)
+            burst = config.get(f"block_explorers.{api}.burst", 1)
+            if config.get("jobs.distributed", False):
+                workers = max(1, config.get("jobs.workers", 1))
+                rate, burst = rate / workers, max(1, burst // workers)
+            self._buckets[bucket_key] = TokenBucket(rate, burst)
+        return self._buckets[bucket_key]
+
+    async def acquire(self, api: str, key: Optional[str]) -> TokenBucket:
+        """Wait until a call to an API with a key is allowed
+
+        Returns:
+            The bucket, to pause it if the call is rate limited anyway
+        """
+        bucket = self.get_bucket(api, key)
+        await bucket.acquire()
+        return bucket
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get calls, rate-limit replies, queueing time and utilization per API and key
+
+        Keys are numbered per API in the order they were first used, so no part of a key is shown.
+        """
+        stats = {}
+        key_numbers: Dict[str, int] = {}
+        for (api, key), bucket in self._buckets.items():
+            if key:
+                key_numbers[api] = key_numbers.get(api, 0) + 1
+                stats[f"{api} (key {key_numbers[api]})"] = bucket.to_dict()
+            else:
+                stats[api] = bucket.to_dict()
+        return dict(sorted(stats.items()))
+
+
+class RateLimitExceeded(Exception):
+    """The quota of the current rate-limit window is used up"""
+
+    def __init__(self, reset_at: Optional[float] = None):
+        self.reset_at = reset_at
+        wait = f", resets in {max(0.0, reset_at - time.time()):.0f}s" if reset_at else ""
+        super().__init__(f"Rate limit exceeded{wait}")
+
+
+class QuotaScheduler:
+    """Spreads requests over the quota an API reports in X-RateLimit-Remaining / X-RateLimit-Reset
+
+    The remaining requests of a window are handed out evenly until the window resets, with up to
+    burst requests going out at once, so concurrent callers don't burn the quota at the start of
+    the window. Once only the reserve is left, callers wait for the reset if it is close, and are
+    turned away otherwise so they can defer their work to the next window.
+
+    Args:
+        reserve: Requests of each window that are left for others, e.g. interactive commands
+        max_wait: Seconds a caller may wait for a request slot
+        burst: Requests that may go out at once
+    """
+
+    def __init__(self, reserve: int = 0, max_wait: float = 60, burst: int = 1):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.burst = burst
+        self.remaining: Optional[int] = None  # Unknown until the first response
+        self.reset_at: Optional[float] = None  # Unix time the window resets
+        self._next_slot = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.deferred = 0
+        self.wait_time = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def update(self, headers: Any) -> None:
+        """Take the quota from the headers of a response"""
+        remaining, reset = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset_at = int(remaining), float(reset)
+        except ValueError:
+            return
+        if reset_at == self.reset_at and self.remaining is not None:
+            # Responses of concurrent requests arrive in any order, the lowest count is the latest
+            remaining = min(remaining, self.remaining)
+        self.remaining, self.reset_at = remaining, reset_at
+
+    def exhaust(self, retry_after: Optional[float] = None) -> None:
+        """Mark the quota as used up, e.g. after a rate-limit response"""
+        self.remaining = 0
+        if retry_after is not None:
+            self.reset_at = time.time() + retry_after
+        elif self.reset_at is None or self.reset_at <= time.time():
+            self.reset_at = time.time() + self.max_wait
+
+    def refund(self) -> None:
+        """Give back the request of a response that did not count against the quota, e.g. a 304"""
+        if self.remaining is not None:
+            self.remaining += 1
+
+    def _defer(self) -> None:
+        self.deferred += 1
+        raise RateLimitExceeded(self.reset_at)
+
+    async def acquire(self) -> None:
+        """Wait for a request slot
+
+        Raises:
+            RateLimitExceeded: If no slot is free within max_wait
+        """
+        queued = time.monotonic()
+        async with self._get_lock():
+            now = time.time()
+            if self.reset_at is not None and now >= self.reset_at:
+                # New window, its quota is learned from the next response
+                self.remaining = self.reset_at = None
+
+            if self.remaining is not None and self.remaining <= self.reserve:
+                wait = self.reset_at - now
+                if wait > self.max_wait:
+                    self._defer()
+                await asyncio.sleep(wait)
+                self.remaining = self.reset_at = None
+                now = time.time()
+
+            if self.remaining is not None:
+                # Spread the usable rest of the window evenly over the time until the reset
+                interval = (self.reset_at - now) / (self.remaining - self.reserve)
+                slot = max(now, self._next_slot)
+                wait = slot - now - (self.burst - 1) * interval
+                if wait > self.max_wait:
+                    self._defer()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_slot = slot + interval
+                self.remaining -= 1
+
+        self.requests += 1
+        self.wait_time += time.monotonic() - queued
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "deferred": self.deferred,
+            "remaining": self.remaining,
+            "resets_in": round(max(0.0, self.reset_at - time.time())) if self.reset_at else None,
+            "wait_seconds": round(self.wait_time, 2),
+        }
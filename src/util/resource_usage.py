@@ -0,0 +1,161 @@
+"""Per-job resource accounting
+
+A ResourceUsage collector is bound to the running job through a context variable. Tasks and
+threads started by the job (asyncio.create_task, asyncio.to_thread) inherit the context, so DB
+queries, HTTP requests and LLM calls made on behalf of the job are attributed to it without
+passing the collector around.
+
+CPU time and peak RSS are process-wide counters. When several jobs run at the same time, each
+job is charged with the process CPU time and RSS growth observed while it ran.
+"""
+
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import aiohttp
+from sqlalchemy import event
+
+_current_usage: ContextVar[Optional["ResourceUsage"]] = ContextVar("resource_usage", default=None)
+
+
+def _peak_rss_kb() -> int:
+    """Get the peak resident set size of the process in KB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class ResourceUsage:
+    """Collects the resources used by a single job run"""
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_rss_delta_kb = 0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.http_requests = 0
+        self.http_bytes = 0
+        self.llm_prompt_tokens = 0
+        self.llm_completion_tokens = 0
+        self._started_wall: Optional[float] = None
+        self._started_cpu: Optional[float] = None
+        self._started_rss: Optional[int] = None
+
+    def start(self) -> None:
+        """Start measuring wall time, CPU time and RSS"""
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._started_rss = _peak_rss_kb()
+
+    def stop(self) -> None:
+        """Stop measuring wall time, CPU time and RSS"""
+        if self._started_wall is None:
+            return
+        self.wall_time = time.perf_counter() - self._started_wall
+        self.cpu_time = time.process_time() - self._started_cpu
+        self.peak_rss_delta_kb = max(0, _peak_rss_kb() - self._started_rss)
+        self._started_wall = None
+
+    def add_db_query(self, duration: float) -> None:
+        """Record a database query and its duration in seconds"""
+        self.db_queries += 1
+        self.db_time += duration
+
+    def add_http_request(self) -> None:
+        """Record a completed HTTP request"""
+        self.http_requests += 1
+
+    def add_http_bytes(self, response_bytes: int) -> None:
+        """Record bytes received in HTTP responses"""
+        self.http_bytes += response_bytes
+
+    def add_llm_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Record LLM prompt and completion tokens"""
+        self.llm_prompt_tokens += prompt_tokens
+        self.llm_completion_tokens += completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert usage to a JSON serializable dictionary"""
+        return {
+            "wall_time": round(self.wall_time, 3),
+            "cpu_time": round(self.cpu_time, 3),
+            "peak_rss_delta_kb": self.peak_rss_delta_kb,
+            "db_queries": self.db_queries,
+            "db_time": round(self.db_time, 3),
+            "http_requests": self.http_requests,
+            "http_bytes": self.http_bytes,
+            "llm_prompt_tokens": self.llm_prompt_tokens,
+            "llm_completion_tokens": self.llm_completion_tokens,
+        }
+
+
+def current_usage() -> Optional[ResourceUsage]:
+    """Get the collector of the job running in the current context, if any"""
+    return _current_usage.get()
+
+
+@contextmanager
+def track_usage(usage: ResourceUsage):
+    """Attribute all resources used in the current context to a collector"""
+    token = _current_usage.set(usage)
+    usage.start()
+    try:
+        yield usage
+    finally:
+        usage.stop()
+        _current_usage.reset(token)
+
+
+def record_llm_usage(response: Any) -> None:
+    """Record the token usage reported in an OpenAI chat completion response"""
+    usage = current_usage()
+    if usage is None:
+        return
+    response_usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(response_usage, "prompt_tokens", 0)
+    completion_tokens = getattr(response_usage, "completion_tokens", 0)
+    if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+        usage.add_llm_tokens(prompt_tokens, completion_tokens)
+
+
+def instrument_engine(engine) -> None:
+    """Count queries and query time of a SQLAlchemy engine
+
+    Works for sync engines and for the sync_engine of an async engine.
+    """
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_usage() is not None:
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        usage = current_usage()
+        start_times = conn.info.get("query_start_time")
+        if usage is not None and start_times:
+            usage.add_db_query(time.perf_counter() - start_times.pop())
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """Create an aiohttp trace config that counts requests and response bytes"""
+
+    async def on_request_end(session, trace_config_ctx, params):
+        usage = current_usage()
+        if usage is not None:
+            usage.add_http_request()
+
+    async def on_response_chunk_received(session, trace_config_ctx, params):
+        usage = current_usage()
+        if usage is not None:
+            usage.add_http_bytes(len(params.chunk))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    return trace_config
@@ -0,0 +1,57 @@
+"""Minimal JSON-RPC client for EVM nodes"""
+
+from typing import Any, List, Optional, Tuple
+from src.util.http import HttpClient
+from src.util.logging import Logger
+
+logger = Logger("JsonRpc")
+
+
+class RpcError(Exception):
+    """A JSON-RPC request failed as a whole"""
+
+
+async def rpc_batch(url: str, calls: List[Tuple[str, list]]) -> List[Optional[Any]]:
+    """Send several JSON-RPC calls in a single HTTP request
+
+    Args:
+        url: Node endpoint
+        calls: (method, params) of each call
+
+    Returns:
+        The result of each call in order, None for calls the node answered with an error
+
+    Raises:
+        RpcError: If the request fails or the reply is not a batch response
+    """
+    if not calls:
+        return []
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+    try:
+        async with HttpClient().post(url, json=payload) as response:
+            if response.status != 200:
+                raise RpcError(f"Node returned HTTP {response.status}")
+            replies = await response.json(content_type=None)
+    except RpcError:
+        raise
+    except Exception as e:
+        raise RpcError(f"Batch request failed: {str(e)}") from e
+
+    if not isinstance(replies, list):
+        # Nodes without batch support answer with a single error object
+        message = (
+            replies.get("error", {}).get("message", "unexpected reply") if isinstance(replies, dict) else "unexpected reply"
+        )
+        raise RpcError(f"Batch request rejected: {message}")
+
+    # Replies may come in any order
+    results: List[Optional[Any]] = [None] * len(calls)
+    for reply in replies:
+        call_id = reply.get("id")
+        if not isinstance(call_id, int) or not 0 <= call_id < len(calls):
+            continue
+        if "error" in reply:
+            logger.debug(f"{calls[call_id][0]} failed: {reply['error']}")
+            continue
+        results[call_id] = reply.get("result")
+    return results
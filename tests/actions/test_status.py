@@ -45,6 +45,31 @@ def mock_job_manager():
     list_jobs_mock.return_value = jobs
     manager.list_jobs = list_jobs_mock
 
+    manager.get_resource_summary.return_value = {
+        "indexer": {
+            "runs": 2,
+            "wall_time": 120.5,
+            "cpu_time": 30.25,
+            "peak_rss_delta_kb": 20480,
+            "db_queries": 1500,
+            "db_time": 4.2,
+            "http_requests": 200,
+            "http_bytes": 3145728,
+            "llm_tokens": 0,
+        },
+        "autobot": {
+            "runs": 1,
+            "wall_time": 10.0,
+            "cpu_time": 1.0,
+            "peak_rss_delta_kb": 0,
+            "db_queries": 3,
+            "db_time": 0.1,
+            "http_requests": 4,
+            "http_bytes": 1024,
+            "llm_tokens": 1234,
+        },
+    }
+
     # Create get_instance class method
     manager.get_instance = AsyncMock(return_value=manager)
 
@@ -195,3 +220,24 @@ async def test_status_error_handling(mock_job_manager, mock_scheduler, mock_webh
         result_str = str(result)
         assert "📊 Job Statistics:" in result_str
         assert "• Error getting job statistics: Test error" in result_str
+
+
+@pytest.mark.asyncio
+async def test_status_resource_usage(mock_job_manager, mock_scheduler, mock_webhook_server):
+    """Test status shows resource usage per job type, most expensive first"""
+    with (
+        patch("src.jobs.manager.JobManager.get_instance", return_value=mock_job_manager),
+        patch("src.jobs.scheduler.Scheduler.get_instance", return_value=mock_scheduler),
+        patch("src.webhooks.server.WebhookServer.get_instance", return_value=mock_webhook_server),
+    ):
+        action = StatusAction()
+        result = await action.execute()
+
+        result_str = str(result)
+        assert "⚙️ Resource Usage (24h):" in result_str
+        assert result_str.index("• indexer (2 runs)") < result_str.index("• autobot (1 runs)")
+        assert "• Time: 120.5s wall, 30.2s CPU" in result_str
+        assert "• Peak RSS: +20.0 MB" in result_str
+        assert "• DB: 1500 queries in 4.2s" in result_str
+        assert "• HTTP: 200 requests, 3.0 MB" in result_str
+        assert "• LLM: 1234 tokens" in result_str
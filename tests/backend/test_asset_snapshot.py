@@ -0,0 +1,47 @@
+import os
+import pytest
+from src.backend.asset_snapshot import AssetSnapshot, FileChange, diff_manifests
+from src.backend.blob_store import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(root=str(tmp_path / "blobs"))
+
+
+def test_diff_manifests():
+    """Test that only files with a different digest are reported"""
+    old = {"A.sol": "a1", "B.sol": "b1", "C.sol": "c1"}
+    new = {"A.sol": "a1", "B.sol": "b2", "D.sol": "d1"}
+
+    assert diff_manifests(old, new) == [
+        FileChange("B.sol", "modified", "b1", "b2"),
+        FileChange("C.sol", "removed", "c1", None),
+        FileChange("D.sol", "added", None, "d1"),
+    ]
+    assert diff_manifests(old, dict(old)) == []
+
+
+def test_snapshot_keeps_old_versions_of_changed_files(store, tmp_path):
+    """Test that old versions survive replacing the asset and garbage collection"""
+    asset_dir = tmp_path / "asset"
+    asset_dir.mkdir()
+    (asset_dir / "A.sol").write_text("contract A {}\n")
+    (asset_dir / "B.sol").write_text("contract B {}\n")
+    old = store.add_tree(str(asset_dir))
+
+    (asset_dir / "B.sol").unlink()
+    (asset_dir / "B.sol").write_text("contract B { uint x; }\n")
+    new = store.add_tree(str(asset_dir))
+
+    snapshot = AssetSnapshot(1, store, root=str(tmp_path / "snapshots"))
+    snapshot.keep(diff_manifests(old, new))
+    store.gc()
+
+    assert os.listdir(snapshot.path) == ["B.sol"]
+    with open(snapshot.file_path("B.sol")) as f:
+        assert f.read() == "contract B {}\n"
+
+    snapshot.remove()
+    assert not os.path.exists(snapshot.path)
+    assert store.gc() == 1
@@ -0,0 +1,98 @@
+import os
+import pytest
+from src.backend.blob_store import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(root=str(tmp_path / "blobs"))
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_identical_files_share_one_blob(store, tmp_path):
+    """Test that the same file in two asset trees is stored once"""
+    library = "// SPDX-License-Identifier: MIT\ncontract ERC20 {}\n"
+    write(tmp_path / "1" / "repo" / "ERC20.sol", library)
+    write(tmp_path / "1" / "repo" / "Vault.sol", "contract Vault {}\n")
+    write(tmp_path / "2" / "repo" / "lib" / "ERC20.sol", library)
+
+    first = store.add_tree(str(tmp_path / "1" / "repo"))
+    second = store.add_tree(str(tmp_path / "2" / "repo"))
+
+    assert first["ERC20.sol"] == second[os.path.join("lib", "ERC20.sol")]
+    assert os.path.samefile(tmp_path / "1" / "repo" / "ERC20.sol", tmp_path / "2" / "repo" / "lib" / "ERC20.sol")
+    assert store.deduplicated_bytes == len(library)
+    assert store.get_stats()["blobs"] == 2
+    # Files stay readable at their asset paths
+    with open(tmp_path / "2" / "repo" / "lib" / "ERC20.sol") as f:
+        assert f.read() == library
+
+
+def test_single_file_asset(store, tmp_path):
+    """Test that a single-file asset is listed under its base name"""
+    write(tmp_path / "1" / "Token.sol", "contract Token {}\n")
+    manifest = store.add_tree(str(tmp_path / "1" / "Token.sol"))
+    assert list(manifest) == ["Token.sol"]
+    assert os.path.exists(store.blob_path(manifest["Token.sol"]))
+
+
+def test_digest_of_maps_files_to_blobs(store, tmp_path):
+    """Test that scanners can find the blob of a file without reading it"""
+    write(tmp_path / "1" / "A.sol", "contract A {}\n")
+    write(tmp_path / "loose.sol", "contract Loose {}\n")
+    manifest = store.add_tree(str(tmp_path / "1"))
+
+    assert BlobStore(root=store.root).digest_of(str(tmp_path / "1" / "A.sol")) == manifest["A.sol"]
+    assert store.digest_of(str(tmp_path / "loose.sol")) is None
+    assert store.digest_of(str(tmp_path / "missing.sol")) is None
+
+
+def test_gc_removes_unlinked_blobs(store, tmp_path):
+    """Test that blobs are removed once no asset tree links to them"""
+    write(tmp_path / "1" / "Old.sol", "contract Old {}\n")
+    write(tmp_path / "1" / "Kept.sol", "contract Kept {}\n")
+    manifest = store.add_tree(str(tmp_path / "1"))
+
+    os.remove(tmp_path / "1" / "Old.sol")
+    assert store.gc() == 1
+    assert not os.path.exists(store.blob_path(manifest["Old.sol"]))
+    assert os.path.exists(store.blob_path(manifest["Kept.sol"]))
+
+
+def test_replacing_a_file_keeps_other_links_intact(store, tmp_path):
+    """Test that rewriting a file by replacing it does not change the shared blob"""
+    write(tmp_path / "1" / "Lib.sol", "v1\n")
+    write(tmp_path / "2" / "Lib.sol", "v1\n")
+    store.add_tree(str(tmp_path / "1"))
+    store.add_tree(str(tmp_path / "2"))
+
+    os.remove(tmp_path / "1" / "Lib.sol")
+    write(tmp_path / "1" / "Lib.sol", "v2\n")
+
+    with open(tmp_path / "2" / "Lib.sol") as f:
+        assert f.read() == "v1\n"
+
+
+def test_link_materializes_blob(store, tmp_path):
+    """Test that a tree can be restored from a manifest"""
+    write(tmp_path / "1" / "A.sol", "contract A {}\n")
+    manifest = store.add_tree(str(tmp_path / "1"))
+
+    target = tmp_path / "restored" / "A.sol"
+    store.link(manifest["A.sol"], str(target))
+    assert os.path.samefile(target, tmp_path / "1" / "A.sol")
+
+
+def test_git_metadata_and_unlisted_files_are_skipped(store, tmp_path):
+    """Test that checkouts store their working tree only, or just the files a sync changed"""
+    write(tmp_path / "repo" / ".git" / "objects" / "ab" / "cdef", "object")
+    write(tmp_path / "repo" / "A.sol", "contract A {}\n")
+    write(tmp_path / "repo" / "B.sol", "contract B {}\n")
+
+    assert sorted(store.add_tree(str(tmp_path / "repo"))) == ["A.sol", "B.sol"]
+    assert list(store.add_tree(str(tmp_path / "repo"), ["B.sol", "Missing.sol"])) == ["B.sol"]
@@ -1,6 +1,7 @@
 import pytest
 from src.backend.query_builder import QueryBuilder
 from src.models.base import Asset, Project
+from src.models.proxy import ProxyUpgrade
 from sqlalchemy.sql.selectable import Select
 
 
@@ -17,6 +18,19 @@ def test_from_table():
         qb.from_table("invalid")
 
 
+def test_proxy_upgrades_are_queryable():
+    qb = QueryBuilder.from_spec(
+        {
+            "from": "proxy_upgrades",
+            "join": {"table": "assets", "on": {"proxy_id": "id"}},
+            "where": [{"field": "assets.identifier", "op": "=", "value": "https://etherscan.io/address/0xaaa"}],
+            "order_by": [{"field": "proxy_upgrades.block_number", "direction": "desc"}],
+        }
+    )
+    assert qb._table == ProxyUpgrade
+    assert "JOIN assets ON proxy_upgrades.proxy_id = assets.id" in str(qb.build())
+
+
 def test_join():
     qb = QueryBuilder().from_table("assets")
 
@@ -0,0 +1,55 @@
+import os
+import pytest
+from src.backend.blob_store import BlobStore
+from src.backend.source_cache import SourceCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SourceCache(blob_store=BlobStore(root=str(tmp_path / "blobs")), root=str(tmp_path / "sources"))
+
+
+def write_sources(path, files):
+    for name, content in files.items():
+        file_path = path / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+
+def test_cached_sources_are_linked_into_other_assets(cache, tmp_path):
+    """Test that sources stored once are materialized as hardlinks and survive garbage collection"""
+    first = tmp_path / "1" / "etherscan.io" / "address" / "0xabc"
+    write_sources(first, {"Vault.sol": "contract Vault {}\n", "lib/Math.sol": "library Math {}\n", "notes.txt": "x"})
+
+    manifest = cache.store("etherscan", "0xABC", str(first), ["Vault.sol", "lib/Math.sol"])
+    assert sorted(manifest) == ["Vault.sol", "lib/Math.sol"]
+    assert cache.get("etherscan", "0xabc") == manifest
+    assert cache.get("basescan", "0xabc") is None
+
+    # The asset that downloaded the sources goes away, the cache keeps the blobs alive
+    for name in ("Vault.sol", "lib/Math.sol"):
+        os.remove(first / name)
+    assert cache.blob_store.gc() == 0
+
+    second = tmp_path / "2" / "etherscan.io" / "address" / "0xabc"
+    write_sources(second, {"Vault.sol": "contract OldVault {}\n"})
+    assert cache.materialize("etherscan", "0xabc", str(second)) == ["Vault.sol", "lib/Math.sol"]
+
+    assert (second / "Vault.sol").read_text() == "contract Vault {}\n"
+    assert os.stat(second / "lib" / "Math.sol").st_ino == os.stat(cache.blob_store.blob_path(manifest["lib/Math.sol"])).st_ino
+
+
+def test_missing_entry_materializes_nothing(cache, tmp_path):
+    assert cache.materialize("etherscan", "0xdef", str(tmp_path / "target")) == []
+    assert not (tmp_path / "target").exists()
+
+
+def test_store_replaces_entry(cache, tmp_path):
+    source = tmp_path / "source"
+    write_sources(source, {"A.sol": "contract A {}\n"})
+    cache.store("etherscan", "0xabc", str(source), ["A.sol"])
+    write_sources(source, {"B.sol": "contract B {}\n"})
+    cache.store("etherscan", "0xabc", str(source), ["B.sol"])
+
+    assert sorted(cache.get("etherscan", "0xabc")) == ["B.sol"]
+    assert os.listdir(os.path.dirname(cache.entry_path("etherscan", "0xabc"))) == ["0xabc"]
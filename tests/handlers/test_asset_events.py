@@ -146,3 +146,82 @@ async def test_handle_asset_update_github_repo(handler, sample_asset, mock_teleg
     assert "📝 Asset Updated" in message
     assert "Test Project" in message
     assert "ℹ️ No diff available for repository updates" in message
+
+
+@pytest.mark.asyncio
+async def test_handle_asset_update_github_repo_changed_files(handler, sample_asset, mock_telegram):
+    """Test that repository updates list the files changed by the sync"""
+    sample_asset.asset_type = AssetType.GITHUB_REPO
+
+    handler.context = {
+        "asset": sample_asset,
+        "old_revision": "abc123",
+        "new_revision": "def456",
+        "changed_paths": ["src/Vault.sol"],
+        "removed_paths": ["src/Old.sol"],
+    }
+    handler.trigger = HandlerTrigger.ASSET_UPDATE
+
+    result = await handler.handle()
+
+    assert result.success
+    message = mock_telegram.send_message.call_args[0][0]
+    assert "1 files changed, 1 removed" in message
+    assert "~ src/Vault.sol" in message
+    assert "- src/Old.sol" in message
+    assert "No diff available" not in message
+
+
+@pytest.mark.asyncio
+async def test_handle_asset_update_diffs_changed_files(handler, sample_asset, mock_telegram, tmp_path):
+    """Test that the diff document is built from the snapshot and the new files"""
+    (tmp_path / "old.sol").write_text("contract Old { uint256 value; }\n")
+    (tmp_path / "new.sol").write_text("contract New { uint256 value; }\n")
+    (tmp_path / "added.sol").write_text("contract Added {}\n")
+
+    handler.context = {
+        "asset": sample_asset,
+        "old_revision": 1,
+        "new_revision": 2,
+        "snapshot_path": str(tmp_path),
+        "changed_files": [
+            {
+                "path": "Main.sol",
+                "status": "modified",
+                "old_file": str(tmp_path / "old.sol"),
+                "new_file": str(tmp_path / "new.sol"),
+            },
+            {"path": "Added.sol", "status": "added", "old_file": None, "new_file": str(tmp_path / "added.sol")},
+        ],
+    }
+    handler.trigger = HandlerTrigger.ASSET_UPDATE
+    documents = []
+
+    async def read_document(document, filename=None):
+        documents.append((document.read().decode("utf-8"), filename))
+
+    mock_telegram.send_document.side_effect = read_document
+    result = await handler.handle()
+
+    assert result.success
+    assert result.data["message"] == "Asset update processed with diff"
+    [(html, filename)] = documents
+    assert filename.endswith(".html")
+    assert "Main.sol (modified)" in html
+    assert "Added.sol (added)" in html
+    assert "contract Added {}" in html
+
+
+def test_diff_document_is_size_capped(handler):
+    """Test that diffs stop at diff.max_size with a note"""
+    old_code = "\n".join(f"uint256 value{i};" for i in range(2000))
+    new_code = "\n".join(f"uint256 other{i};" for i in range(2000))
+
+    with patch.object(
+        handler.config, "get", side_effect=lambda key, default=None: 5000 if key == "diff.max_size" else default
+    ):
+        html = handler._create_html_diff(old_code, new_code, "Revision 1", "Revision 2", "Test Project", "https://x")
+
+    assert len(html.encode("utf-8")) < 6000
+    assert "Diff truncated" in html
+    assert html.endswith("</html>")
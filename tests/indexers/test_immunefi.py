@@ -1,9 +1,16 @@
 import pytest
-from unittest.mock import Mock, patch, AsyncMock, MagicMock
+from unittest.mock import Mock, patch, AsyncMock, MagicMock, PropertyMock
 from src.indexers.immunefi import ImmunefiIndexer
 from src.models.base import Project, Asset, AssetType
+from src.models.indexer import IndexerState
 from src.handlers.base import HandlerTrigger
+from src.util.git import RepoSync
+from src.backend.blob_store import BlobStore
 import os
+import asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 
 class SerializableMock(MagicMock):
@@ -40,6 +47,7 @@ def mock_session():
     # Setup query mock - this needs to be a regular Mock for filter chains
     mock_query = Mock()
     mock_query.filter.return_value = mock_query
+    mock_query.options.return_value = mock_query
     mock_query.first.return_value = None
     mock_query.all.return_value = []  # Return empty list by default
 
@@ -317,3 +325,387 @@ async def test_asset_path_traversal_prevention(mock_session, mock_handler_regist
         "..\\..\\Windows\\System32\\config\\SAM" in msg or "../../Windows/System32/config/SAM" in msg for msg in warning_calls
     ), "Windows path traversal not caught"
     assert any("/etc/shadow" in msg for msg in warning_calls), "Absolute path not caught"
+
+
+@pytest.mark.asyncio
+async def test_index_resumes_after_checkpoint(mock_session):
+    """Test that an interrupted sync skips projects processed before the checkpoint"""
+    bounties = [
+        {"project": name, "assets": [{"url": f"https://github.com/org/{name}", "revision": 1}]}
+        for name in ["Alpha", "Beta", "Gamma", "Delta"]
+    ]
+    response = MagicMock()
+    response.raise_for_status = Mock()
+    response.json = AsyncMock(return_value=bounties)
+    http_session = MagicMock()
+    http_session.__aenter__.return_value = http_session
+    http_session.get.return_value.__aenter__.return_value = response
+
+    checkpoints = []
+
+    async def on_project_indexed(name):
+        checkpoints.append(name)
+
+    indexer = ImmunefiIndexer(
+        session=mock_session, initialize_mode=True, resume_after="Beta", on_project_indexed=on_project_indexed
+    )
+    indexer._fetch_asset = AsyncMock(return_value=True)
+    indexer.cleanup_removed_projects = AsyncMock()
+
+    with patch("src.indexers.immunefi.HttpClient", return_value=http_session):
+        await indexer.index()
+
+    created = [call.args[0].name for call in mock_session.add.call_args_list if isinstance(call.args[0], Project)]
+    assert created == ["Gamma", "Delta"]
+    assert checkpoints == ["Gamma", "Delta"]
+    # Removal of unlisted projects still considers the full project list
+    indexer.cleanup_removed_projects.assert_awaited_once_with({"Alpha", "Beta", "Gamma", "Delta"})
+
+
+@pytest.mark.asyncio
+async def test_download_assets_concurrently_with_ordered_events(mock_session, mock_handler_registry):
+    """Test that downloads overlap within the limits while records and events keep the input order"""
+    indexer = ImmunefiIndexer(mock_session)
+    indexer.handler_registry = mock_handler_registry
+    indexer.host_concurrency = 2
+    indexer._download_semaphore = asyncio.Semaphore(3)
+
+    urls = [f"https://github.com/org/repo{i}" for i in range(6)] + [
+        f"https://github.com/org/repo/blob/main/File{i}.sol" for i in range(2)
+    ]
+    active = {"github.com": 0, "raw.githubusercontent.com": 0, "total": 0}
+    peak = {key: 0 for key in active}
+
+    async def fake_fetch(url, target_dir, host, delay):
+        for key in (host, "total"):
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+        # Later assets finish first
+        await asyncio.sleep(delay)
+        for key in (host, "total"):
+            active[key] -= 1
+        return True
+
+    async def fetch_repo(url, target_dir):
+        await fake_fetch(url, target_dir, "github.com", 0.01 * (10 - urls.index(url)))
+        return RepoSync(old_commit=None, new_commit="abc123")
+
+    async def fetch_file(url, target_dir):
+        return await fake_fetch(url, target_dir, "raw.githubusercontent.com", 0.001)
+
+    with (
+        patch("src.indexers.immunefi.sync_github_repo", side_effect=fetch_repo),
+        patch("src.indexers.immunefi.fetch_github_file", side_effect=fetch_file),
+    ):
+        await indexer.download_assets(1, [{"url": url, "revision": 1} for url in urls])
+
+    assert peak["github.com"] == 2
+    assert peak["raw.githubusercontent.com"] <= 2
+    assert peak["total"] == 3
+
+    stored = [call.args[0].identifier for call in mock_session.add.call_args_list]
+    assert stored == urls
+    events = mock_handler_registry.trigger_event.call_args_list
+    assert [call.args[0] for call in events] == [HandlerTrigger.NEW_ASSET] * len(urls)
+    assert [call.args[1]["asset"].identifier for call in events] == urls
+
+
+@pytest.mark.asyncio
+async def test_failed_download_is_not_stored(mock_session, mock_handler_registry):
+    """Test that a failed download does not create a record or stop the others"""
+    indexer = ImmunefiIndexer(mock_session)
+    indexer.handler_registry = mock_handler_registry
+    urls = ["https://github.com/org/broken", "https://github.com/org/working"]
+
+    async def fetch_repo(url, target_dir):
+        if url.endswith("broken"):
+            raise RuntimeError("connection reset")
+        return RepoSync(old_commit=None, new_commit="abc123")
+
+    with patch("src.indexers.immunefi.sync_github_repo", side_effect=fetch_repo):
+        await indexer.download_assets(1, [{"url": url, "revision": 1} for url in urls])
+
+    assert [call.args[0].identifier for call in mock_session.add.call_args_list] == ["https://github.com/org/working"]
+
+
+@pytest.mark.asyncio
+async def test_repo_update_syncs_checkout_in_place(mock_session, mock_handler_registry, tmp_path):
+    """Test that an updated repo is not wiped before syncing and its event lists the changed files"""
+    indexer = ImmunefiIndexer(mock_session)
+    indexer.handler_registry = mock_handler_registry
+    url = "https://github.com/org/vault"
+    asset = Asset(identifier=url, project_id=1, asset_type=AssetType.GITHUB_REPO, extra_data={"revision": 1, "commit": "old"})
+    indexer._assets = {url: asset}
+    seen_files = []
+
+    async def sync_repo(url, target_dir):
+        seen_files.extend(os.listdir(target_dir))
+        return RepoSync(old_commit="old", new_commit="new", changed=["src/Vault.sol"], removed=["src/Old.sol"])
+
+    with (
+        patch("src.config.config.Config.data_dir", new_callable=PropertyMock, return_value=str(tmp_path)),
+        patch("src.indexers.immunefi.sync_github_repo", side_effect=sync_repo),
+    ):
+        os.makedirs(tmp_path / "1" / "github.com" / "org" / "vault" / "src")
+        await indexer.download_assets(1, [{"url": url, "revision": 2}])
+
+    assert seen_files == ["src"]
+    assert asset.extra_data == {"revision": 2, "commit": "new"}
+    event_type, event_data = mock_handler_registry.trigger_event.call_args.args
+    assert event_type == HandlerTrigger.ASSET_UPDATE
+    assert event_data["changed_paths"] == ["src/Vault.sol"]
+    assert event_data["removed_paths"] == ["src/Old.sol"]
+
+
+@pytest.mark.asyncio
+async def test_file_update_event_references_snapshot(mock_session, mock_handler_registry, tmp_path):
+    """Test that an update event points to the old and new file instead of carrying their code"""
+    indexer = ImmunefiIndexer(mock_session)
+    indexer.handler_registry = mock_handler_registry
+    indexer.blob_store = BlobStore(root=str(tmp_path / "blobs"))
+    url = "https://github.com/org/repo/blob/main/Vault.sol"
+    asset = Asset(id=7, identifier=url, project_id=1, asset_type=AssetType.GITHUB_FILE, extra_data={"revision": 1})
+    indexer._assets = {url: asset}
+    file_path = tmp_path / "1" / "github.com" / "org" / "repo" / "blob" / "main" / "Vault.sol"
+    file_path.parent.mkdir(parents=True)
+    file_path.write_text("contract Vault {}\n")
+
+    async def fetch_file(url, target_path):
+        with open(target_path, "w") as f:
+            f.write("contract Vault { uint x; }\n")
+        return True
+
+    with (
+        patch("src.config.config.Config.data_dir", new_callable=PropertyMock, return_value=str(tmp_path)),
+        patch("src.indexers.immunefi.fetch_github_file", side_effect=fetch_file),
+    ):
+        await indexer.download_assets(1, [{"url": url, "revision": 2}])
+
+    event_type, event_data = mock_handler_registry.trigger_event.call_args.args
+    assert event_type == HandlerTrigger.ASSET_UPDATE
+    assert "old_code" not in event_data and "new_code" not in event_data
+    assert event_data["snapshot_path"] == str(tmp_path / "snapshots" / "7")
+    [change] = event_data["changed_files"]
+    assert change["path"] == "Vault.sol"
+    assert change["status"] == "modified"
+    assert change["new_file"] == str(file_path)
+    with open(change["old_file"]) as f:
+        assert f.read() == "contract Vault {}\n"
+
+
+def _listing_http_client(status=200, bounties=None, headers=None):
+    """Mock HttpClient serving the bounty listing"""
+    response = MagicMock()
+    response.status = status
+    response.headers = headers or {}
+    response.raise_for_status = Mock()
+    response.json = AsyncMock(return_value=bounties or [])
+    http_client = MagicMock()
+    http_client.get.return_value.__aenter__.return_value = response
+    return http_client
+
+
+@pytest.mark.asyncio
+async def test_index_skips_unchanged_listing(mock_session):
+    """Test that a 304 for the stored ETag ends the sync without processing anything"""
+    mock_session.query.return_value.first.return_value = IndexerState(
+        platform="immunefi", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"
+    )
+    http_client = _listing_http_client(status=304)
+
+    indexer = ImmunefiIndexer(session=mock_session, initialize_mode=True)
+    indexer.process_bounty = AsyncMock()
+    indexer.cleanup_removed_projects = AsyncMock()
+
+    with patch("src.indexers.immunefi.HttpClient", return_value=http_client):
+        await indexer.index()
+
+    sent_headers = http_client.get.call_args.kwargs["headers"]
+    assert sent_headers == {"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    indexer.process_bounty.assert_not_awaited()
+    indexer.cleanup_removed_projects.assert_not_awaited()
+    mock_session.merge.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_index_processes_only_changed_projects(mock_session):
+    """Test that projects with an unchanged payload hash are skipped and validators are stored"""
+    bounties = [{"project": name, "description": name, "assets": []} for name in ["Alpha", "Beta", "Gamma"]]
+    unchanged = dict(bounties[0])
+    mock_session.query.return_value.all.return_value = [
+        Project(name="Alpha", source_hash=ImmunefiIndexer._hash_payload(unchanged)),
+        Project(name="Beta", source_hash="outdated-hash"),
+    ]
+    http_client = _listing_http_client(bounties=bounties, headers={"ETag": '"v2"'})
+
+    indexer = ImmunefiIndexer(session=mock_session, initialize_mode=True)
+    indexer.cleanup_removed_projects = AsyncMock()
+
+    with (
+        patch("src.indexers.immunefi.HttpClient", return_value=http_client),
+        patch.object(indexer, "_plan_project", wraps=indexer._plan_project) as plan_project,
+    ):
+        result = await indexer.index()
+
+    planned = [call.args[0] for call in plan_project.call_args_list if call.args[0].changed]
+    assert [work.name for work in planned] == ["Beta", "Gamma"]
+    assert planned[0].source_hash == ImmunefiIndexer._hash_payload(bounties[1])
+    indexer.cleanup_removed_projects.assert_awaited_once_with({"Alpha", "Beta", "Gamma"})
+    assert result["changed"] == 2
+    assert result["unchanged"] == 1
+    assert result["stages"]["plan"]["processed"] == 3
+
+    state = mock_session.merge.call_args.args[0]
+    assert state.platform == "immunefi"
+    assert state.etag == '"v2"'
+
+
+@pytest.mark.asyncio
+async def test_incomplete_sync_keeps_old_validators(mock_session):
+    """Test that validators are not stored when a project failed, so the next sync refetches"""
+    bounties = [{"project": "Alpha", "assets": [{"url": "https://github.com/org/repo", "revision": 1}]}]
+    http_client = _listing_http_client(bounties=bounties, headers={"ETag": '"v2"'})
+
+    indexer = ImmunefiIndexer(session=mock_session, initialize_mode=True)
+    indexer._fetch_asset = AsyncMock(return_value=False)
+    indexer.cleanup_removed_projects = AsyncMock()
+
+    with patch("src.indexers.immunefi.HttpClient", return_value=http_client):
+        result = await indexer.index()
+
+    assert result["incomplete"] == 1
+    mock_session.merge.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_dropped_project_is_downloaded_next_sync(mock_session):
+    """Test that assets of a project that failed in the download stage are not left marked as in flight"""
+    bounties = [{"project": "Alpha", "assets": [{"url": "https://github.com/org/repo", "revision": 1}]}]
+    indexer = ImmunefiIndexer(session=mock_session, initialize_mode=True)
+    indexer.cleanup_removed_projects = AsyncMock()
+    indexer._fetch_asset = AsyncMock(side_effect=RuntimeError("disk full"))
+
+    with patch("src.indexers.immunefi.HttpClient", return_value=_listing_http_client(bounties=bounties)):
+        result = await indexer.index()
+        assert result["stages"]["download"]["failed"] == 1
+        assert not indexer._in_flight_urls
+
+        indexer._fetch_asset = AsyncMock(return_value=True)
+        await indexer.index()
+
+    indexer._fetch_asset.assert_awaited_once()
+    assert indexer._fetch_asset.await_args.args[0].url == "https://github.com/org/repo"
+
+
+@pytest.mark.asyncio
+async def test_process_bounty_stores_hash_after_assets(mock_session, mock_handler_registry):
+    """Test that the payload hash is stored only when all assets were indexed"""
+    indexer = ImmunefiIndexer(mock_session)
+    indexer.handler_registry = mock_handler_registry
+    bounty_data = {"project": "Test Project", "assets": [{"url": "https://github.com/org/repo", "revision": 1}]}
+
+    indexer._fetch_asset = AsyncMock(return_value=False)
+    assert await indexer.process_bounty(bounty_data, "hash-1") is False
+    assert mock_session.add.call_args_list[0].args[0].source_hash is None
+
+    mock_session.add.reset_mock()
+    indexer._fetch_asset = AsyncMock(return_value=True)
+    assert await indexer.process_bounty(bounty_data, "hash-1") is True
+    assert mock_session.add.call_args_list[0].args[0].source_hash == "hash-1"
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Project, Asset, IndexerState):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.mark.asyncio
+async def test_index_prefetches_records_and_batches_writes(sqlite_session):
+    """Test that a sync looks up existing records once, not per project and asset"""
+    for i in range(3):
+        project = Project(name=f"P{i}", project_type="bounty", project_source="immunefi", keywords=[], extra_data={})
+        project.assets = [
+            Asset(
+                identifier=f"https://github.com/org/p{i}-kept", asset_type=AssetType.GITHUB_REPO, extra_data={"revision": 1}
+            ),
+            Asset(
+                identifier=f"https://github.com/org/p{i}-gone", asset_type=AssetType.GITHUB_REPO, extra_data={"revision": 1}
+            ),
+        ]
+        sqlite_session.add(project)
+    sqlite_session.commit()
+
+    bounties = [
+        {
+            "project": f"P{i}",
+            "assets": [
+                {"url": f"https://github.com/org/p{i}-kept", "revision": 2},
+                {"url": f"https://github.com/org/p{i}-new", "revision": 1},
+            ],
+        }
+        for i in range(3)
+    ]
+    statements = []
+
+    def count_select(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(sqlite_session.bind, "before_cursor_execute", count_select)
+    indexer = ImmunefiIndexer(session=sqlite_session, initialize_mode=True)
+    with (
+        patch("src.indexers.immunefi.HttpClient", return_value=_listing_http_client(bounties=bounties)),
+        patch("src.indexers.immunefi.sync_github_repo", AsyncMock(return_value=RepoSync(old_commit=None, new_commit="abc"))),
+    ):
+        await indexer.index()
+    event.remove(sqlite_session.bind, "before_cursor_execute", count_select)
+
+    # Indexer state, projects, their assets, listed assets, legacy projects and the state merge, for any number of projects
+    assert len(statements) == 6
+
+    identifiers = {asset.identifier: asset for asset in sqlite_session.query(Asset).all()}
+    for i in range(3):
+        assert identifiers[f"https://github.com/org/p{i}-kept"].extra_data == {"revision": 2, "commit": "abc"}
+        assert f"https://github.com/org/p{i}-new" in identifiers
+        assert f"https://github.com/org/p{i}-gone" not in identifiers
+
+
+@pytest.mark.asyncio
+async def test_slow_handlers_do_not_stall_downloads(mock_session, mock_handler_registry):
+    """Test that downloads of later projects continue while event handlers are busy"""
+    bounties = [{"project": f"P{i}", "assets": [{"url": f"https://github.com/org/p{i}", "revision": 1}]} for i in range(3)]
+    release = asyncio.Event()
+    fetched = []
+
+    async def slow_handler(event_type, event_data):
+        await release.wait()
+
+    async def fetch_asset(download):
+        fetched.append(download.url)
+        return True
+
+    mock_handler_registry.trigger_event = AsyncMock(side_effect=slow_handler)
+    indexer = ImmunefiIndexer(session=mock_session)
+    indexer.handler_registry = mock_handler_registry
+    indexer._fetch_asset = fetch_asset
+    indexer.cleanup_removed_projects = AsyncMock()
+
+    with patch("src.indexers.immunefi.HttpClient", return_value=_listing_http_client(bounties=bounties)):
+        sync = asyncio.create_task(indexer.index())
+        await asyncio.sleep(0.05)
+
+        # Handlers are stuck on the first events, yet every asset was downloaded
+        assert mock_handler_registry.trigger_event.await_count >= 1
+        assert len(fetched) == 3
+        assert not sync.done()
+
+        release.set()
+        result = await sync
+
+    assert result["stages"]["notify"]["processed"] == 3
+    assert result["stages"]["persist"]["processed"] == 3
@@ -4,6 +4,8 @@ from src.jobs.file_search import FileSearchJob
 from src.util.logging import LogConfig
 from src.models.base import Asset
 import os
+import asyncio
+import time
 
 
 @pytest.fixture
@@ -145,3 +147,80 @@ async def test_directory_search(mock_config):
         file_paths = [match["file_path"] for match in matches]
         assert any("test1.sol" in path for path in file_paths)
         assert any("test2.cairo" in path for path in file_paths)
+
+
+def test_search_directory_stops_when_cancelled(mock_config, tmp_path):
+    """Test that a cancelled search stops between files"""
+    for i in range(5):
+        (tmp_path / f"contract{i}.sol").write_text("function test() {}")
+
+    job = FileSearchJob(regex_pattern="test")
+    searched = []
+    search_file = job._search_file
+
+    def search_and_cancel(file_path, pattern):
+        searched.append(file_path)
+        job.request_cancellation()  # Cancel while the first file is being searched
+        return search_file(file_path, pattern)
+
+    job._search_file = search_and_cancel
+    matches = job._search_directory(str(tmp_path), job.pattern, job.cancel_token)
+
+    assert len(searched) == 1
+    assert len(matches) == 1
+
+
+@pytest.mark.asyncio
+async def test_executor_work_is_released_after_cancellation(mock_config, tmp_path):
+    """Test that executor work returns shortly after the job is cancelled"""
+    job = FileSearchJob(regex_pattern="test")
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_search(file_path, pattern):
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.05)
+        return []
+
+    job._search_file = slow_search
+    for i in range(200):
+        (tmp_path / f"contract{i}.sol").write_text("")
+
+    task = asyncio.create_task(job._search_directory_async(str(tmp_path), job.pattern))
+    await started.wait()
+    job.request_cancellation()
+    task.cancel()
+
+    # The thread keeps running after the task is cancelled, until it checks the token
+    assert await job.wait_for_release(timeout=2)
+    assert job._executor_work == []
+
+
+def test_identical_blobs_are_searched_once(mock_config, tmp_path):
+    """Test that a file shared by several assets through the blob store is only read once"""
+    from src.backend.blob_store import BlobStore
+
+    for project in ("1", "2"):
+        (tmp_path / project).mkdir()
+        (tmp_path / project / "ERC20.sol").write_text("function transfer() {}")
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    store.add_tree(str(tmp_path / "1"))
+    store.add_tree(str(tmp_path / "2"))
+
+    job = FileSearchJob(regex_pattern="transfer")
+    job.blob_store = store
+    searched = []
+    search_file = job._search_file
+
+    def tracking_search(file_path, pattern):
+        searched.append(file_path)
+        return search_file(file_path, pattern)
+
+    job._search_file = tracking_search
+    first = job._search_directory(str(tmp_path / "1"), job.pattern)
+    second = job._search_directory(str(tmp_path / "2"), job.pattern)
+
+    assert len(searched) == 1
+    assert first[0]["matches"] == second[0]["matches"]
+    assert second[0]["file_path"] == str(tmp_path / "2" / "ERC20.sol")
+    assert job.duplicates_skipped == 1
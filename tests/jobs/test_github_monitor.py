@@ -1,8 +1,12 @@
+import time
 import pytest
-from unittest.mock import Mock, AsyncMock
+from aiohttp import web
+from unittest.mock import Mock, AsyncMock, MagicMock, patch
 from datetime import datetime, timezone, timedelta
 from src.jobs.github_monitor import GithubMonitorJob
 from src.models.github import GitHubRepoState
+from src.util.http import HttpClient
+from src.util.rate_limit import QuotaScheduler
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -66,6 +70,14 @@ class AsyncSessionContextManager:
         await self.session.commit()
 
 
+def response_context(response):
+    """Wrap a mock response the way HttpClient.get returns it"""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=None)
+    return context
+
+
 @pytest.fixture
 async def github_monitor(mock_session):
     """Create GitHub monitor instance with mocked dependencies"""
@@ -84,12 +96,144 @@ async def github_monitor(mock_session):
     # Mock GitHub API responses
     commit_response = AsyncMock()
     commit_response.status = 200
+    commit_response.headers = {}
     commit_response.json = AsyncMock(return_value=[{"sha": "new-sha", "commit": {"message": "test commit"}}])
 
     pr_response = AsyncMock()
     pr_response.status = 200
+    pr_response.headers = {}
     pr_response.json = AsyncMock(return_value=[{"number": 2, "updated_at": datetime.now(timezone.utc).isoformat()}])
 
-    job.session.get = AsyncMock(side_effect=[commit_response, pr_response])
+    job.session.get = Mock(side_effect=[response_context(commit_response), response_context(pr_response)])
+
+    return job
+
+
+def repo(name, last_check=None):
+    return {
+        "repo_url": f"https://github.com/owner/{name}",
+        "last_commit_sha": "old-sha",
+        "last_pr_number": 1,
+        "last_check": last_check,
+    }
+
+
+@pytest.fixture
+async def github_api(aiohttp_server):
+    """Stand-in for the GitHub API with a quota of a few requests per window
+
+    Responses carry an ETag per repo and endpoint, conditional requests for unchanged content are
+    answered with 304 without using quota.
+    """
+    state = {"quota": 4, "requests": [], "forbidden": set()}
+    reset = str(int(time.time()) + 3600)
+
+    async def handler(request):
+        name, endpoint = request.match_info["repo"], request.match_info["endpoint"]
+        state["requests"].append((name, endpoint, request.headers.get("If-None-Match")))
+        etag = f'W/"{name}-{endpoint}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(
+                status=304, headers={"ETag": etag, "X-RateLimit-Remaining": str(state["quota"]), "X-RateLimit-Reset": reset}
+            )
+        if name in state["forbidden"]:
+            return web.json_response({"message": "Resource not accessible"}, status=403)
+        if state["quota"] == 0:
+            return web.json_response(
+                {"message": "API rate limit exceeded"},
+                status=403,
+                headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset},
+            )
+        state["quota"] -= 1
+        headers = {"ETag": etag, "X-RateLimit-Remaining": str(state["quota"]), "X-RateLimit-Reset": reset}
+        if endpoint == "commits":
+            return web.json_response([{"sha": f"{name}-sha", "commit": {"message": "change"}}], headers=headers)
+        updated = datetime.now(timezone.utc).isoformat()
+        return web.json_response([{"number": 2, "updated_at": updated}], headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/repos/owner/{repo}/{endpoint}", handler)
+    server = await aiohttp_server(app)
+    with patch("src.jobs.github_monitor.GITHUB_API_URL", str(server.make_url("")).rstrip("/")):
+        yield state
+    await HttpClient().close()
+
 
+@pytest.fixture
+def monitor(github_api):
+    job = GithubMonitorJob()
+    job.handler_registry = AsyncMock()
+    job._update_repo_state = AsyncMock()
+    job._notify_status = AsyncMock()
+    job.concurrency = 2
+    job.quota = QuotaScheduler(max_wait=0.1, burst=2)
     return job
+
+
+@pytest.mark.asyncio
+async def test_github_monitor_defers_repos_when_quota_runs_out(monitor, github_api):
+    """Test that repos left when the quota is used up are deferred instead of checked"""
+    repos = [repo("repo1"), repo("repo2"), repo("repo3")]
+    monitor._get_repos_in_scope = AsyncMock(return_value=repos)
+
+    await monitor.start()
+
+    assert monitor.result.success
+    assert monitor.result.data["checked"] == 2
+    assert monitor.result.data["deferred"] == 1
+    assert "1 deferred" in monitor.result.message
+    # The third repo was held back by the scheduler without spending a request
+    assert len(github_api["requests"]) == 4
+    updated = sorted(call.args[0] for call in monitor._update_repo_state.call_args_list)
+    assert updated == ["https://github.com/owner/repo1", "https://github.com/owner/repo2"]
+    assert monitor.result.data["rate_limit"]["remaining"] == 0
+
+
+@pytest.mark.asyncio
+async def test_github_monitor_defers_repo_on_rate_limit_reply(monitor, github_api):
+    """Test that a rate-limit reply defers the repo while a permission error does not"""
+    github_api["quota"] = 0
+    github_api["forbidden"].add("private")
+    last_check = datetime.utcnow() - timedelta(hours=1)
+    monitor._get_repos_in_scope = AsyncMock(return_value=[repo("private", last_check), repo("repo1", last_check)])
+    monitor.concurrency = 1
+
+    await monitor.start()
+
+    assert monitor.result.data["checked"] == 1
+    assert monitor.result.data["deferred"] == 1
+    # Only the repo that could not be read is marked as checked, the deferred repo keeps its
+    # state, so the next run checks it from its last check
+    assert [call.args[0] for call in monitor._update_repo_state.call_args_list] == ["https://github.com/owner/private"]
+    monitor.handler_registry.trigger_event.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_github_monitor_sends_stored_etags(monitor, github_api):
+    """Test that ETags are stored per endpoint and unchanged repos are answered with 304"""
+    github_api["quota"] = 100
+    monitor._get_repos_in_scope = AsyncMock(return_value=[repo("repo1")])
+    await monitor.start()
+
+    state = monitor._update_repo_state.call_args.kwargs
+    assert state["commits_etag"] == 'W/"repo1-commits"'
+    assert state["pulls_etag"] == 'W/"repo1-pulls"'
+    assert monitor.handler_registry.trigger_event.call_count == 2
+
+    # The next run sends the stored ETags
+    unchanged = {**repo("repo1", datetime.utcnow()), "last_commit_sha": "repo1-sha", "last_pr_number": 2}
+    unchanged.update(commits_etag=state["commits_etag"], pulls_etag=state["pulls_etag"])
+    monitor._get_repos_in_scope = AsyncMock(return_value=[unchanged])
+    monitor.handler_registry.trigger_event.reset_mock()
+    monitor._update_repo_state.reset_mock()
+    await monitor.start()
+
+    assert sorted(github_api["requests"][2:]) == [
+        ("repo1", "commits", 'W/"repo1-commits"'),
+        ("repo1", "pulls", 'W/"repo1-pulls"'),
+    ]
+    monitor.handler_registry.trigger_event.assert_not_called()
+    # 304s don't use quota
+    assert github_api["quota"] == 98
+    assert monitor.quota.remaining == 98
+    assert monitor._update_repo_state.call_args.kwargs["commits_etag"] == 'W/"repo1-commits"'
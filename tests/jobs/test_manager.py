@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from src.jobs.manager import JobManager
 from src.jobs.base import Job, JobStatus, JobResult
+from src.jobs.indexer import IndexerJob
 from datetime import datetime
 import asyncio
 from src.models.job import JobRecord
@@ -493,3 +494,209 @@ async def test_list_jobs_time_filter(job_manager, mock_session):
     # Verify job list
     assert len(jobs) == 1
     assert jobs[0]["id"] == "current-job"
+
+
+class SearchJob(Job):
+    """Minimal job with parameters for deduplication tests"""
+
+    def __init__(self, pattern: str):
+        super().__init__(job_type="search")
+        self.pattern = pattern
+        self.release = asyncio.Event()
+
+    def get_params(self):
+        return {"pattern": self.pattern}
+
+    async def start(self) -> None:
+        await self.release.wait()
+
+    async def stop_handler(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_identical_job_attaches_to_running_job(job_manager, mock_session):
+    """Test that an identical submission returns the job in flight instead of starting a duplicate"""
+    first = SearchJob("transfer")
+    duplicate = SearchJob("transfer")
+    other = SearchJob("approve")
+
+    assert first.get_fingerprint() == duplicate.get_fingerprint()
+    assert first.get_fingerprint() != other.get_fingerprint()
+
+    first_id = await job_manager.submit_job(first)
+    assert await job_manager.submit_job(duplicate) == first_id
+    assert duplicate.id not in job_manager._running_jobs
+
+    other_id = await job_manager.submit_job(other)
+    assert other_id == other.id
+
+    # Explicit resubmission bypasses deduplication
+    forced = SearchJob("transfer")
+    assert await job_manager.submit_job(forced, deduplicate=False) == forced.id
+
+    for job in (first, other, forced):
+        job.release.set()
+    await asyncio.gather(*list(job_manager._tasks.values()))
+
+    # Once the job finished, the same submission starts a new run
+    job_manager.dedup_ttl = 0
+    again = SearchJob("transfer")
+    assert await job_manager.submit_job(again) == again.id
+    again.release.set()
+    await job_manager._tasks[again.id]
+
+
+@pytest.mark.asyncio
+async def test_identical_job_reuses_fresh_result(job_manager, mock_session):
+    """Test that a successful result within the TTL is reused"""
+    job_manager.dedup_ttl = 300
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = Mock(id="finished-job")
+
+    job = SearchJob("transfer")
+    assert await job_manager.submit_job(job) == "finished-job"
+    assert job.id not in job_manager._running_jobs
+    mock_session.add.assert_not_called()
+
+
+class TargetJob(Job):
+    """Job with a constructor argument but without get_params"""
+
+    def __init__(self, target: str):
+        super().__init__(job_type="target")
+        self.target = target
+        self.release = asyncio.Event()
+
+    async def start(self) -> None:
+        await self.release.wait()
+
+    async def stop_handler(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_jobs_with_unknown_params_are_not_merged(job_manager, mock_session):
+    """Test that jobs whose arguments are not exposed through get_params are never deduplicated"""
+    first, second = TargetJob("a"), TargetJob("b")
+    assert first.get_fingerprint() is None
+
+    assert await job_manager.submit_job(first) == first.id
+    assert await job_manager.submit_job(second) == second.id
+
+    for job in (first, second):
+        job.release.set()
+    await asyncio.gather(*list(job_manager._tasks.values()))
+
+
+def test_jobs_without_arguments_are_fingerprinted():
+    class PollJob(Job):
+        def __init__(self):
+            super().__init__(job_type="poll")
+
+        async def start(self) -> None:
+            pass
+
+        async def stop_handler(self) -> None:
+            pass
+
+    assert PollJob().get_fingerprint() == PollJob().get_fingerprint() is not None
+
+
+class ResumableSearchJob(SearchJob):
+    """Search job that resumes from a checkpoint"""
+
+    resumable = True
+
+
+@pytest.mark.asyncio
+async def test_resumable_job_is_left_pending_on_shutdown(mock_session):
+    """Test that a server shutdown requeues resumable jobs instead of cancelling them"""
+    manager = JobManager()
+    manager.initialize()
+    await manager.start()
+
+    job = ResumableSearchJob("transfer")
+    job.save_checkpoint({"last_project": "Beta"})
+    await manager.submit_job(job)
+    await asyncio.sleep(0)
+
+    record = mock_session.query.return_value.filter.return_value.first.return_value
+    await manager.stop()
+
+    assert job.status == JobStatus.PENDING
+    assert record.status == JobStatus.PENDING.value
+    assert record.checkpoint == {"last_project": "Beta"}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_does_not_report_indexer_as_cancelled(mock_session):
+    """Test that an indexer interrupted by a shutdown is requeued without a cancellation notice"""
+    manager = JobManager()
+    manager.initialize()
+    await manager.start()
+
+    indexing = asyncio.Event()
+
+    async def index():
+        indexing.set()
+        await asyncio.Event().wait()
+
+    with patch("src.jobs.indexer.ImmunefiIndexer") as indexer_class:
+        indexer_class.return_value.index = index
+        job = IndexerJob("immunefi")
+        job.cancel = AsyncMock()
+        await manager.submit_job(job)
+        await indexing.wait()
+        await manager.stop()
+
+    job.cancel.assert_not_called()
+    assert job.status == JobStatus.PENDING
+
+
+@pytest.mark.asyncio
+async def test_resume_interrupted_jobs(job_manager, mock_session):
+    """Test that interrupted resumable jobs restart from their checkpoint and others are failed"""
+    JobManager.register_job_class("resumable_search", ResumableSearchJob)
+    JobManager.register_job_class("search", SearchJob)
+    try:
+        resumable = JobRecord(
+            id="resume-me",
+            type="resumable_search",
+            status=JobStatus.RUNNING.value,
+            params={"pattern": "transfer"},
+            checkpoint={"last_project": "Beta"},
+        )
+        stale = JobRecord(id="stale", type="search", status=JobStatus.PENDING.value, params={"pattern": "approve"})
+        mock_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [resumable, stale]
+
+        resumed = await job_manager.resume_interrupted_jobs()
+
+        assert resumed == ["resume-me"]
+        job = job_manager.get_job("resume-me")
+        assert isinstance(job, ResumableSearchJob)
+        assert job.checkpoint == {"last_project": "Beta"}
+        assert job.pattern == "transfer"
+        assert stale.status == JobStatus.FAILED.value
+        assert stale.message == "Job terminated due to server shutdown"
+
+        job.release.set()
+        await job_manager._tasks["resume-me"]
+    finally:
+        JobManager._job_classes.pop("resumable_search", None)
+        JobManager._job_classes.pop("search", None)
+
+
+@pytest.mark.asyncio
+async def test_stop_job_reports_release_time(job_manager, mock_session, mock_notifier):
+    """Test that stopping a job signals its cancel token and reports how long releasing took"""
+    job = SearchJob("transfer")
+    job_id = await job_manager.submit_job(job)
+    await asyncio.sleep(0)
+
+    assert await job_manager.stop_job(job_id)
+
+    assert job.cancel_token.is_cancelled
+    record = mock_session.query.return_value.filter.return_value.first.return_value
+    assert record.status == JobStatus.CANCELLED.value
+    assert record.message.startswith("Job cancelled by user, resources released in")
+    assert mock_notifier.notify_completion.call_args.kwargs["message"] == record.message
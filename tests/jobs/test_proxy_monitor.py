@@ -1,9 +1,20 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock, call
 from src.jobs.proxy_monitor import ProxyMonitorJob
 from src.models.base import Asset, AssetType
+from src.models.proxy import ProxyUpgrade
 from src.handlers.base import HandlerTrigger
 from src.services.telegram import TelegramService
+from src.util.eip1967 import ProxySlots
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.models.base import Project
+
+
+def recorded_upgrades(session):
+    return [c.args[0] for c in session.add.call_args_list if isinstance(c.args[0], ProxyUpgrade)]
 
 
 @pytest.fixture
@@ -43,6 +54,9 @@ def proxy_monitor(mock_session, mock_telegram):
         job = ProxyMonitorJob()
         job.get_session = Mock(return_value=mock_session)
         job.explorer = Mock()
+        job.explorer.is_supported_explorer = Mock(return_value=(True, "etherscan"))
+        job.explorer.get_block_number = AsyncMock(return_value=2000)
+        job.explorer.get_rpc_url = Mock(return_value=None)
         job.handler_registry = Mock()
         job.logger = Mock()
         yield job
@@ -98,10 +112,13 @@ async def test_proxy_monitor_handles_upgrade(proxy_monitor, mock_session):
 
     await proxy_monitor.start()
 
-    # Verify implementation history was updated
-    assert proxy.extra_data.get("implementation_history") is not None
-    assert len(proxy.extra_data["implementation_history"]) == 1
-    assert proxy.extra_data["implementation_history"][0]["address"] == "0x456"
+    # Verify the upgrade was recorded in the implementation history
+    upgrades = recorded_upgrades(mock_session)
+    assert len(upgrades) == 1
+    assert upgrades[0].implementation_address == "0x456"
+    assert upgrades[0].proxy is proxy
+    assert upgrades[0].implementation is proxy.implementation
+    assert "implementation_history" not in proxy.extra_data
 
 
 @pytest.mark.asyncio
@@ -129,9 +146,10 @@ async def test_proxy_monitor_handles_first_implementation(proxy_monitor, mock_se
     await proxy_monitor.start()
 
     # Verify implementation history was created
-    assert proxy.extra_data.get("implementation_history") is not None
-    assert len(proxy.extra_data["implementation_history"]) == 1
-    assert proxy.extra_data["implementation_history"][0]["address"] == "0x456"
+    upgrades = recorded_upgrades(mock_session)
+    assert len(upgrades) == 1
+    assert upgrades[0].implementation_address == "0x456"
+    assert upgrades[0].block_number == 1234
 
 
 @pytest.mark.asyncio
@@ -150,8 +168,177 @@ async def test_proxy_monitor_handles_errors(proxy_monitor, mock_session):
     # Run job
     await proxy_monitor.start()
 
-    # Verify error was handled
-    assert mock_session.rollback.called
+    # Verify error was handled and the contract is scanned again on the next run
+    assert contract.proxy_scanned_block is None
     assert contract.checked_for_proxy is False
     assert contract.is_proxy is False
     assert "implementation_history" not in contract.extra_data
+
+
+def make_contract(address, scanned_block=None, is_proxy=False):
+    return Asset(
+        identifier=f"https://etherscan.io/address/{address}",
+        asset_type=AssetType.DEPLOYED_CONTRACT,
+        extra_data={},
+        is_proxy=is_proxy,
+        checked_for_proxy=scanned_block is not None,
+        proxy_scanned_block=scanned_block,
+    )
+
+
+@pytest.mark.asyncio
+async def test_proxy_monitor_scans_from_cursor(proxy_monitor, mock_session):
+    """Test that only blocks after the last scanned block are searched and the cursor moves to the head"""
+    scanned = make_contract("0x123", scanned_block=1500, is_proxy=True)
+    new = make_contract("0x456")
+    up_to_date = make_contract("0x789", scanned_block=2000, is_proxy=True)
+    mock_session.query.return_value.filter.return_value.all.return_value = [scanned, new, up_to_date]
+    proxy_monitor.explorer.get_proxy_upgrade_events = AsyncMock(return_value=[])
+
+    await proxy_monitor.start()
+
+    calls = {c.args[0]: c.kwargs for c in proxy_monitor.explorer.get_proxy_upgrade_events.call_args_list}
+    assert calls == {
+        scanned.identifier: {"from_block": 1501, "to_block": 2000},
+        new.identifier: {"from_block": None, "to_block": 2000},
+    }
+    assert proxy_monitor.explorer.get_block_number.await_count == 1
+    assert [c.proxy_scanned_block for c in (scanned, new, up_to_date)] == [2000, 2000, 2000]
+    # A known proxy without new upgrades stays a proxy
+    assert scanned.is_proxy is True
+    assert new.is_proxy is False
+
+
+@pytest.mark.asyncio
+async def test_proxy_monitor_checks_concurrently_and_commits_in_batches(proxy_monitor, mock_session):
+    """Test that contracts are scanned at the same time and updates are committed per batch"""
+    contracts = [make_contract(f"0x{i}") for i in range(5)]
+    mock_session.query.return_value.filter.return_value.all.return_value = contracts
+    proxy_monitor.concurrency = 5
+    proxy_monitor.batch_size = 2
+
+    active = 0
+    max_active = 0
+
+    async def get_events(url, from_block=None, to_block=None):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return []
+
+    proxy_monitor.explorer.get_proxy_upgrade_events = get_events
+
+    await proxy_monitor.start()
+
+    assert max_active > 1
+    # Batches of 2, 2 and 1 contracts, then the job record
+    assert mock_session.commit.call_count == 4
+    assert all(c.checked_for_proxy for c in contracts)
+    assert proxy_monitor.result.data["contracts"]["scanned"] == 5
+
+
+def make_unchecked_contract(address, scanned_block):
+    """Contract searched for upgrade events up to scanned_block, which is still checked through its slots"""
+    contract = make_contract(address, scanned_block)
+    contract.checked_for_proxy = False
+    return contract
+
+
+@pytest.mark.asyncio
+async def test_proxy_monitor_classifies_with_rpc(proxy_monitor, mock_session):
+    """Test that contracts searched before and with empty EIP-1967 slots are not scanned again, keeping the read block"""
+    plain = make_unchecked_contract("0xaaa", 1500)
+    proxy = make_unchecked_contract("0xbbb", 1500)
+    unread = make_unchecked_contract("0xccc", 1500)
+    new = make_contract("0xddd")
+    mock_session.query.return_value.filter.return_value.all.return_value = [plain, proxy, unread, new]
+    proxy_monitor.explorer.get_rpc_url = Mock(return_value="http://node")
+    proxy_monitor.explorer.get_proxy_upgrade_events = AsyncMock(return_value=[])
+    slots = {"0xaaa": ProxySlots(), "0xbbb": ProxySlots(implementation="0x" + "1" * 40)}
+
+    with patch("src.jobs.proxy_monitor.detect_proxies", AsyncMock(return_value=slots)) as detect:
+        await proxy_monitor.start()
+
+    # A contract never searched for upgrade events gets a full scan first
+    detect.assert_awaited_once_with("http://node", ["0xaaa", "0xbbb", "0xccc"], 100)
+    fetched = [c.args[0] for c in proxy_monitor.explorer.get_proxy_upgrade_events.call_args_list]
+    assert sorted(fetched) == [proxy.identifier, unread.identifier, new.identifier]
+    # Their slots are read again on the next run
+    assert all(c.checked_for_proxy is False and c.is_proxy is False for c in (plain, proxy, unread, new))
+    assert plain.proxy_scanned_block == 2000
+    assert new.proxy_scanned_block == 2000
+    assert proxy_monitor.result.data["contracts"]["detected_by_rpc"] == 1
+
+
+@pytest.mark.asyncio
+async def test_proxy_monitor_finds_upgrades_of_proxy_without_eip1967_slots(proxy_monitor, mock_session):
+    """Test that a proxy keeping its implementation in another slot is found by its first full scan"""
+    contract = make_contract("0xaaa")
+    mock_session.query.return_value.filter.return_value.all.return_value = [contract]
+    mock_session.query.return_value.filter.return_value.first.return_value = None
+    proxy_monitor.explorer.get_rpc_url = Mock(return_value="http://node")
+    proxy_monitor.explorer.EXPLORERS = {"etherscan": {"domain": "etherscan.io"}}
+    event = {"implementation": "0x" + "1" * 40, "blockNumber": 1700, "timestamp": 1700000000}
+    proxy_monitor.explorer.get_proxy_upgrade_events = AsyncMock(return_value=[event])
+
+    with patch("src.jobs.proxy_monitor.detect_proxies", AsyncMock(return_value={"0xaaa": ProxySlots()})):
+        await proxy_monitor.start()
+
+    proxy_monitor.explorer.get_proxy_upgrade_events.assert_awaited_once_with(
+        contract.identifier, from_block=None, to_block=2000
+    )
+    assert contract.checked_for_proxy is True
+    assert contract.is_proxy is True
+    assert proxy_monitor.result.data["contracts"]["detected_by_rpc"] == 0
+
+
+@pytest.mark.asyncio
+async def test_proxy_monitor_scans_rpc_classified_contract_from_read_block(proxy_monitor, mock_session):
+    """Test that a contract whose slots were empty is scanned for upgrades after the block of that read"""
+    contract = make_unchecked_contract("0xaaa", 1500)
+    mock_session.query.return_value.filter.return_value.all.return_value = [contract]
+    mock_session.query.return_value.filter.return_value.first.return_value = None
+    proxy_monitor.explorer.get_rpc_url = Mock(return_value="http://node")
+    proxy_monitor.explorer.EXPLORERS = {"etherscan": {"domain": "etherscan.io"}}
+    event = {"implementation": "0x" + "1" * 40, "blockNumber": 1700, "timestamp": 1700000000}
+    proxy_monitor.explorer.get_proxy_upgrade_events = AsyncMock(return_value=[event])
+    slots = {"0xaaa": ProxySlots(implementation="0x" + "1" * 40)}
+
+    with patch("src.jobs.proxy_monitor.detect_proxies", AsyncMock(return_value=slots)):
+        await proxy_monitor.start()
+
+    proxy_monitor.explorer.get_proxy_upgrade_events.assert_awaited_once_with(
+        contract.identifier, from_block=1501, to_block=2000
+    )
+    assert contract.checked_for_proxy is True
+    assert contract.is_proxy is True
+    assert contract.proxy_scanned_block == 2000
+
+
+def test_proxy_monitor_appends_only_new_upgrades(proxy_monitor):
+    """Test that upgrades already in the history, e.g. migrated ones found by a full scan, are not stored twice"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Project, Asset, ProxyUpgrade):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    impl = Asset(identifier="https://etherscan.io/address/0x456", asset_type=AssetType.DEPLOYED_CONTRACT)
+    proxy = make_contract("0x123", is_proxy=True)
+    session.add_all([impl, proxy, ProxyUpgrade(proxy=proxy, implementation_address="0x111", block_number=100)])
+    session.commit()
+
+    proxy_monitor._run_session = session
+    events = [
+        {"implementation": "0x111", "blockNumber": 100, "timestamp": "1000", "transactionHash": "0xa"},
+        {"implementation": "0x456", "blockNumber": 200, "timestamp": "2000", "transactionHash": "0xb"},
+    ]
+    proxy_monitor._record_upgrades(proxy, events, impl)
+    session.commit()
+
+    upgrades = proxy.upgrades.all()
+    assert [(u.block_number, u.implementation_id, u.transaction_hash) for u in upgrades] == [
+        (100, None, None),
+        (200, impl.id, "0xb"),
+    ]
+    session.close()
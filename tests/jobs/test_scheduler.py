@@ -1,9 +1,16 @@
 """Tests for the scheduler"""
 
+import asyncio
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import Mock, AsyncMock, MagicMock, patch
 from src.jobs.scheduler import Scheduler, ScheduledAction
 from src.actions.registry import ActionRegistry
+from src.actions.result import ActionResult
+from src.models.scheduler import ScheduledActionState, SchedulerLease
 
 
 @pytest.fixture
@@ -117,3 +124,178 @@ async def test_run_action(scheduler, mock_action_registry):
     handler = mock_action_registry.get_action.return_value[0]
     handler.assert_called_once_with("arg1")
     assert action.last_run is not None
+
+
+@pytest.mark.asyncio
+async def test_run_action_records_job(scheduler, mock_action_registry):
+    """Test that the job started by a run is remembered"""
+    handler = mock_action_registry.get_action.return_value[0]
+    handler.return_value = ActionResult.job("job-1")
+
+    action = ScheduledAction("test", "test_command", 60)
+    await scheduler._run_action(action)
+
+    assert action.last_job_id == "job-1"
+
+
+def test_cron_schedule_with_jitter():
+    """Test next run computation for cron schedules with jitter"""
+    action = ScheduledAction("test", "test_command", cron="0 3 * * *", jitter_minutes=10)
+    next_run = action.compute_next_run(datetime(2024, 1, 1, 12, 0))
+    assert datetime(2024, 1, 2, 3, 0) <= next_run <= datetime(2024, 1, 2, 3, 10)
+
+    with pytest.raises(ValueError):
+        ScheduledAction("test", "test_command")
+
+
+def test_cron_that_never_matches_is_rejected(scheduler):
+    with pytest.raises(ValueError, match="never matches"):
+        ScheduledAction("test", "test_command", cron="0 0 31 2 *")
+
+    scheduler.schedule_action("feb31", "test_command", cron="0 0 31 2 *")
+    assert "feb31" not in scheduler.scheduled_actions
+
+
+@pytest.mark.asyncio
+async def test_action_without_next_run_is_disabled(scheduler):
+    """Test that an action whose next run can't be computed runs once instead of every minute"""
+    action = ScheduledAction("test", "test_command", cron="0 3 * * *")
+    action.next_run = datetime.utcnow() - timedelta(seconds=1)
+    scheduler._running = True
+    scheduler.is_leader = True
+
+    with (
+        patch.object(action, "compute_next_run", side_effect=ValueError("Cron expression never matches")),
+        patch.object(scheduler, "_run_action", new_callable=AsyncMock) as run_action,
+        patch.object(scheduler, "_save_state") as save,
+    ):
+        await asyncio.wait_for(scheduler._schedule_loop(action), 1)
+
+    run_action.assert_called_once_with(action)
+    save.assert_called_once_with(action)
+    assert action.enabled is False
+    assert action.next_run is None
+
+
+def _mock_state_session(states):
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.query.return_value.all.return_value = states
+    return session
+
+
+def test_load_state_continues_schedule(scheduler):
+    """Test that persisted run times are restored and missed runs are made up once"""
+    now = datetime.utcnow()
+    scheduler.schedule_action("upcoming", "command1", 60)
+    scheduler.schedule_action("missed", "command2", 60)
+    scheduler.schedule_action("skipped", "command3", 60, catch_up=False)
+
+    upcoming_run = now + timedelta(minutes=30)
+    states = [
+        ScheduledActionState(name="upcoming", last_run=now - timedelta(minutes=30), next_run=upcoming_run),
+        ScheduledActionState(name="missed", last_run=now - timedelta(days=3), next_run=now - timedelta(days=2)),
+        ScheduledActionState(name="skipped", last_run=now - timedelta(days=3), next_run=now - timedelta(days=2)),
+    ]
+    with patch.object(scheduler, "get_session", return_value=_mock_state_session(states)):
+        scheduler._load_state()
+
+    actions = scheduler.scheduled_actions
+    assert actions["upcoming"].next_run == upcoming_run
+    assert actions["upcoming"].last_run is not None
+    # Missed run happens right away, not once per missed interval
+    assert now <= actions["missed"].next_run <= datetime.utcnow()
+    # Without catch-up the schedule continues from now
+    assert actions["skipped"].next_run >= now + timedelta(minutes=60)
+
+
+@pytest.mark.asyncio
+async def test_skip_while_previous_run_active(scheduler):
+    """Test that a due run is skipped while the previous job is still running"""
+    action = ScheduledAction("test", "test_command", 60)
+    action.last_job_id = "job-1"
+    action.next_run = datetime.utcnow() - timedelta(seconds=1)
+    scheduler._running = True
+    scheduler.is_leader = True
+
+    def save_state(saved_action):
+        scheduler._running = False
+
+    job_manager = Mock()
+    job_manager.is_job_active.return_value = True
+    with (
+        patch("src.jobs.manager.JobManager", return_value=job_manager),
+        patch.object(scheduler, "_run_action", new_callable=AsyncMock) as run_action,
+        patch.object(scheduler, "_save_state", side_effect=save_state) as save,
+    ):
+        await scheduler._schedule_loop(action)
+
+    job_manager.is_job_active.assert_called_once_with("job-1")
+    run_action.assert_not_called()
+    save.assert_called_once_with(action)
+    assert action.next_run > datetime.utcnow() + timedelta(minutes=59)
+
+
+@pytest.fixture
+def lease_session():
+    """Create an in-memory database with the lease table"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SchedulerLease.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _replica(session, mock_action_registry, lease_timeout=60):
+    replica = Scheduler()
+    replica._session = session
+    replica._action_registry = mock_action_registry
+    replica.lease_timeout = lease_timeout
+    return replica
+
+
+def test_only_one_replica_holds_lease(lease_session, mock_action_registry):
+    """Test that a second replica cannot take a live lease but takes over an expired one"""
+    leader = _replica(lease_session, mock_action_registry)
+    standby = _replica(lease_session, mock_action_registry)
+
+    assert leader._try_acquire_lease() is True
+    assert standby._try_acquire_lease() is False
+    # Renewing works for the holder
+    assert leader._try_acquire_lease() is True
+
+    # Leader dies and its lease expires
+    lease = lease_session.query(SchedulerLease).one()
+    lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    lease_session.commit()
+
+    assert standby._try_acquire_lease() is True
+    assert lease_session.query(SchedulerLease).one().holder == standby.instance_id
+    assert leader._try_acquire_lease() is False
+
+
+@pytest.mark.asyncio
+async def test_leadership_starts_and_stops_actions(lease_session, mock_action_registry):
+    """Test that actions only run on the leader and a clean stop hands over the lease"""
+    leader = _replica(lease_session, mock_action_registry)
+    standby = _replica(lease_session, mock_action_registry)
+    for replica in (leader, standby):
+        replica.schedule_action("test", "test_command", 60)
+        replica._running = True
+
+    with patch.object(Scheduler, "_load_state"):
+        await leader._update_leadership()
+        await standby._update_leadership()
+
+        assert leader.is_leader is True
+        assert leader.scheduled_actions["test"]._task is not None
+        assert standby.is_leader is False
+        assert standby.scheduled_actions["test"]._task is None
+
+        await leader.stop()
+        await standby._update_leadership()
+
+    assert standby.is_leader is True
+    assert standby.scheduled_actions["test"]._task is not None
+    await standby.stop()
+    assert not standby.scheduled_actions["test"]._task
@@ -0,0 +1,244 @@
+import pytest
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock, MagicMock, patch
+from src.jobs.base import Job, JobStatus
+from src.jobs.manager import JobManager
+from src.jobs.worker import JobWorker
+from src.models.job import JobRecord
+from src.server.extension_loader import ExtensionLoader
+
+
+class SleepJob(Job):
+    """Job that runs until it is cancelled"""
+
+    def __init__(self, seconds: int = 60):
+        super().__init__(job_type="sleep")
+        self.seconds = seconds
+
+    def get_params(self):
+        return {"seconds": self.seconds}
+
+    async def start(self) -> None:
+        await asyncio.sleep(self.seconds)
+
+    async def stop_handler(self) -> None:
+        pass
+
+
+@pytest.fixture
+def mock_session():
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.__exit__.return_value = None
+
+    query = Mock()
+    query.filter = Mock(return_value=query)
+    query.order_by = Mock(return_value=query)
+    query.with_for_update = Mock(return_value=query)
+    query.first = Mock(return_value=None)
+    query.all = Mock(return_value=[])
+    session.query = Mock(return_value=query)
+    return session
+
+
+@pytest.fixture
+def worker(mock_session):
+    JobManager.register_job_class("sleep", SleepJob)
+    with patch("src.backend.database.DBSessionMixin.get_session", return_value=mock_session):
+        worker = JobWorker(worker_id="worker-1", concurrency=2)
+        worker.job_manager.initialize()
+        yield worker
+    JobManager._job_classes.pop("sleep", None)
+
+
+def test_claim_job_skips_locked_rows(worker, mock_session):
+    """Test that a pending job is claimed with SKIP LOCKED and assigned to the worker"""
+    record = JobRecord(id="job-1", type="sleep", status=JobStatus.PENDING.value, params={"seconds": 5}, attempts=0)
+    mock_session.query.return_value.first.return_value = record
+
+    claimed = worker.claim_job()
+
+    assert claimed is record
+    mock_session.query.return_value.with_for_update.assert_called_once_with(skip_locked=True)
+    assert record.status == JobStatus.RUNNING.value
+    assert record.worker_id == "worker-1"
+    assert record.heartbeat_at is not None
+    assert record.attempts == 1
+    mock_session.commit.assert_called_once()
+
+
+def test_claim_job_empty_queue(worker, mock_session):
+    """Test that claiming from an empty queue returns None"""
+    assert worker.claim_job() is None
+    mock_session.commit.assert_not_called()
+
+
+def test_requeue_stale_jobs(worker, mock_session):
+    """Test that jobs of unresponsive workers are requeued or failed after too many attempts"""
+    stale = datetime.utcnow() - timedelta(seconds=worker.heartbeat_timeout + 10)
+    retry = JobRecord(id="job-1", status=JobStatus.RUNNING.value, worker_id="dead", heartbeat_at=stale, attempts=1)
+    exhausted = JobRecord(
+        id="job-2", status=JobStatus.RUNNING.value, worker_id="dead", heartbeat_at=stale, attempts=worker.max_attempts
+    )
+    mock_session.query.return_value.all.return_value = [retry, exhausted]
+
+    requeued = worker.requeue_stale_jobs()
+
+    assert requeued == ["job-1"]
+    assert retry.status == JobStatus.PENDING.value
+    assert retry.worker_id is None
+    assert exhausted.status == JobStatus.FAILED.value
+    assert exhausted.success is False
+    assert exhausted.worker_id is None
+
+
+@pytest.mark.asyncio
+async def test_claimed_job_runs_and_heartbeat_detects_cancellation(worker, mock_session):
+    """Test that a claimed job is restored from its params and stopped once cancelled in the database"""
+    record = JobRecord(id="job-1", type="sleep", status=JobStatus.PENDING.value, params={"seconds": 60}, attempts=0)
+    mock_session.query.return_value.first.side_effect = [record, None]
+
+    assert await worker.run_once() == 1
+    job = worker.job_manager.get_job("job-1")
+    assert isinstance(job, SleepJob)
+    assert job.seconds == 60
+    assert job.worker_id == "worker-1"
+
+    # Job keeps running while the record is owned by this worker
+    mock_session.query.return_value.all.return_value = [record]
+    assert worker.send_heartbeat() == []
+
+    # Cancelling the record makes the worker stop the job
+    record.status = JobStatus.CANCELLED.value
+    lost = worker.send_heartbeat()
+    assert lost == ["job-1"]
+    await worker._stop_lost_jobs(lost)
+    assert "job-1" not in worker._active
+    assert worker.job_manager.get_job("job-1") is None
+
+
+@pytest.mark.asyncio
+async def test_distributed_submit_only_enqueues(mock_session):
+    """Test that the job manager only stores jobs when running in distributed mode"""
+    JobManager.register_job_class("sleep", SleepJob)
+    with patch("src.backend.database.DBSessionMixin.get_session", return_value=mock_session):
+        manager = JobManager()
+        manager.initialize()
+        manager.distributed = True
+        await manager.start()
+        try:
+            job = SleepJob(seconds=5)
+            job_id = await manager.submit_job(job)
+
+            assert job_id == job.id
+            assert job_id not in manager._running_jobs
+            assert job_id not in manager._tasks
+            record = mock_session.add.call_args[0][0]
+            assert record.status == JobStatus.PENDING.value
+            assert record.params == {"seconds": 5}
+        finally:
+            await manager.stop()
+            JobManager._job_classes.pop("sleep", None)
+
+
+EXTENSION_JOB = """
+import asyncio
+from src.jobs.base import Job, JobResult
+
+
+class ScanJob(Job):
+    job_type = "extension_scan"
+
+    def __init__(self, target: str):
+        super().__init__()
+        self.target = target
+
+    def get_params(self):
+        return {"target": self.target}
+
+    async def start(self) -> None:
+        await self.complete(JobResult(success=True, message=f"Scanned {self.target}"))
+
+    async def stop_handler(self) -> None:
+        pass
+"""
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_extension_job(worker, mock_session, tmp_path):
+    """Test that a worker that loaded the extensions can recreate and run an extension job"""
+    (tmp_path / "scan_ext.py").write_text(EXTENSION_JOB)
+    settings = {"extensions_dir": str(tmp_path), "active_extensions": ["scan_ext"]}
+
+    with patch.dict("sys.modules"):
+        loader = ExtensionLoader()
+        with patch.object(loader.config, "get", side_effect=lambda key, default=None: settings.get(key, default)):
+            loader.load_extensions()
+        await loader.register_components()
+
+        record = JobRecord(
+            id="job-1", type="extension_scan", status=JobStatus.PENDING.value, params={"target": "vault"}, attempts=0
+        )
+        mock_session.query.return_value.first.side_effect = [record, None]
+        try:
+            assert await worker.run_once() == 1
+            job = worker.job_manager.get_job("job-1")
+            assert type(job).__name__ == "ScanJob"
+            assert job.type == "extension_scan"
+            assert job.target == "vault"
+            mock_session.query.return_value.first.side_effect = None
+            await worker._active["job-1"]
+            assert job.result.message == "Scanned vault"
+        finally:
+            JobManager._job_classes.pop("extension_scan", None)
+
+
+class ExecutorJob(Job):
+    """Job whose work runs in an executor thread until its cancel token is set"""
+
+    def __init__(self):
+        super().__init__(job_type="executor")
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def _work(self) -> None:
+        self.started.set()
+        while not self.cancel_token.is_cancelled:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.finished.set()
+
+    async def start(self) -> None:
+        await self.run_in_executor(self._work)
+
+    async def stop_handler(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shutdown", [True, False])
+async def test_worker_stops_executor_work(worker, mock_session, shutdown):
+    """Test that stopping the worker or losing a job stops its executor work before returning"""
+    JobManager.register_job_class("executor", ExecutorJob)
+    record = JobRecord(id="job-1", type="executor", status=JobStatus.PENDING.value, params={}, attempts=0)
+    mock_session.query.return_value.first.side_effect = [record, None]
+    try:
+        assert await worker.run_once() == 1
+        mock_session.query.return_value.first.side_effect = None
+        job = worker.job_manager.get_job("job-1")
+        await asyncio.to_thread(job.started.wait, 1)
+
+        if shutdown:
+            await worker.stop()
+        else:
+            await worker._stop_lost_jobs(["job-1"])
+
+        assert job.cancel_token.is_cancelled
+        assert job.finished.is_set()
+        assert job.interrupted is shutdown
+        assert "job-1" not in worker._active
+    finally:
+        JobManager._job_classes.pop("executor", None)
@@ -0,0 +1,58 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.models.base import Asset, AssetType, Project
+from src.models.proxy import ProxyUpgrade
+from src.server.initialization import Initializer
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Project, Asset, ProxyUpgrade):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+def test_migrate_implementation_history(sqlite_session):
+    """Test that histories in extra_data become proxy_upgrades rows and are removed from the JSON"""
+    impl = Asset(identifier="https://etherscan.io/address/0xbbb", asset_type=AssetType.DEPLOYED_CONTRACT, extra_data={})
+    proxy = Asset(
+        identifier="https://etherscan.io/address/0xaaa",
+        asset_type=AssetType.DEPLOYED_CONTRACT,
+        is_proxy=True,
+        implementation=impl,
+        extra_data={
+            "note": "kept",
+            "implementation_history": [
+                {"address": "0xccc", "url": "https://etherscan.io/address/0xccc", "block_number": 10, "timestamp": None},
+                {
+                    "address": "0xbbb",
+                    "url": "https://etherscan.io/address/0xbbb",
+                    "block_number": 20,
+                    "timestamp": "1700000000",
+                },
+            ],
+        },
+    )
+    sqlite_session.add_all([impl, proxy])
+    sqlite_session.commit()
+
+    initializer = Initializer()
+    assert initializer.migrate_implementation_history(sqlite_session) == 2
+    # Migrated histories are gone, so a second start migrates nothing
+    assert initializer.migrate_implementation_history(sqlite_session) == 0
+
+    sqlite_session.expire_all()
+    assert proxy.extra_data == {"note": "kept"}
+    upgrades = proxy.upgrades.all()
+    assert [(u.block_number, u.implementation_address, u.implementation_id) for u in upgrades] == [
+        (10, "0xccc", None),
+        (20, "0xbbb", impl.id),
+    ]
+    assert upgrades[1].timestamp == datetime(2023, 11, 14, 22, 13, 20)
+    assert upgrades[1].to_dict()["timestamp"] == "2023-11-14T22:13:20"
@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime
+from src.util.cron import CronExpression
+
+
+def test_every_fifteen_minutes():
+    """Test step values in the minute field"""
+    cron = CronExpression("*/15 * * * *")
+    assert cron.next_after(datetime(2024, 1, 1, 10, 7, 30)) == datetime(2024, 1, 1, 10, 15)
+    assert cron.next_after(datetime(2024, 1, 1, 10, 45)) == datetime(2024, 1, 1, 11, 0)
+
+
+def test_daily_rolls_over_month_and_year():
+    """Test that a daily expression crosses month and year boundaries"""
+    cron = CronExpression("30 3 * * *")
+    assert cron.next_after(datetime(2024, 1, 31, 4, 0)) == datetime(2024, 2, 1, 3, 30)
+    assert cron.next_after(datetime(2024, 12, 31, 3, 30)) == datetime(2025, 1, 1, 3, 30)
+
+
+def test_weekdays_and_ranges():
+    """Test day of week ranges with Sunday as 0 and 7"""
+    weekdays = CronExpression("0 9 * * 1-5")
+    # 2024-01-06 is a Saturday
+    assert weekdays.next_after(datetime(2024, 1, 6, 12, 0)) == datetime(2024, 1, 8, 9, 0)
+
+    sundays = CronExpression("0 0 * * 7")
+    assert sundays.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 7)
+
+
+def test_day_of_month_or_day_of_week():
+    """Test that restricted day of month and day of week match either"""
+    cron = CronExpression("0 0 15 * 1")
+    # 2024-01-08 is a Monday, before the 15th
+    assert cron.next_after(datetime(2024, 1, 3)) == datetime(2024, 1, 8)
+    assert cron.next_after(datetime(2024, 1, 12)) == datetime(2024, 1, 15)
+
+
+def test_leap_day():
+    """Test that a date missing in most years is found"""
+    cron = CronExpression("0 12 29 2 *")
+    assert cron.next_after(datetime(2025, 3, 1)) == datetime(2028, 2, 29, 12, 0)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    """Test that malformed expressions are rejected"""
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_never_matching_expression():
+    """Test that an impossible date raises instead of looping forever"""
+    with pytest.raises(ValueError):
+        CronExpression("0 0 31 2 *").next_after(datetime(2024, 1, 1))
@@ -0,0 +1,110 @@
+import random
+import time
+from src.util import diff as diff_module
+from src.util.diff import diff_lines, group_hunks, render_html, unified_diff
+
+
+def apply(opcodes, a, b):
+    """Rebuild the new lines from the opcodes, checking that equal ranges really are equal"""
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def test_opcodes_transform_old_into_new():
+    """Test random edits, including many repeated lines without unique anchors"""
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [rng.choice(["}", "", "return x;", f"uint {rng.randint(0, 50)};"]) for _ in range(rng.randint(0, 40))]
+        b = list(a)
+        for _ in range(rng.randint(0, 6)):
+            position = rng.randint(0, len(b))
+            if rng.random() < 0.5:
+                b.insert(position, rng.choice(["}", "emit X();"]))
+            elif b:
+                del b[min(position, len(b) - 1)]
+        result = diff_lines(a, b, timeout=None)
+        assert result.exact
+        assert apply(result.opcodes, a, b) == b
+        assert [op[1] for op in result.opcodes[1:]] == [op[2] for op in result.opcodes[:-1]]
+
+
+def test_minimal_diff_without_unique_lines():
+    """Test that regions without unique lines get a minimal diff"""
+    a, b = list("abcabba"), list("cbabac")
+    matched = sum(i2 - i1 for tag, i1, i2, _, _ in diff_lines(a, b, timeout=None).opcodes if tag == "equal")
+    assert matched == 4
+
+
+def test_unique_lines_anchor_the_diff():
+    """Test that moved blocks are matched around unique declarations, not repeated braces"""
+    a = ["function a() {", "  x();", "}", "function b() {", "  y();", "}"]
+    b = ["function b() {", "  y();", "}", "function c() {", "  z();", "}"]
+    assert list(unified_diff(a, b, "old", "new", context=1)) == [
+        "--- old",
+        "+++ new",
+        "@@ -1,6 +1,6 @@",
+        "-function a() {",
+        "-  x();",
+        "-}",
+        " function b() {",
+        "   y();",
+        "+}",
+        "+function c() {",
+        "+  z();",
+        " }",
+    ]
+
+
+def test_hunks_fold_unchanged_lines():
+    """Test that distant changes become separate hunks and unchanged lines are summarized"""
+    a = [f"line {i}" for i in range(100)]
+    b = list(a)
+    b[10] = "changed 10"
+    b[80] = "changed 80"
+
+    hunks = group_hunks(diff_lines(a, b).opcodes, context=3)
+    assert [(hunk[0][1], hunk[-1][2]) for hunk in hunks] == [(7, 14), (77, 84)]
+
+    html = "".join(render_html(a, b, context=3))
+    assert html.count("<details open>") == 2
+    assert "⋯ 7 unchanged lines" in html
+    assert "⋯ 63 unchanged lines" in html
+    assert "⋯ 16 unchanged lines" in html
+    assert "changed 10" in html and "line 50" not in html
+
+
+def test_html_escapes_code():
+    html = "".join(render_html(["a"], ["if (a < b && c > d) {"], layout="unified"))
+    assert "if (a &lt; b &amp;&amp; c &gt; d) {" in html
+
+
+def test_costly_regions_are_shown_replaced(monkeypatch):
+    """Test that the limits give a coarser but correct diff"""
+    monkeypatch.setattr(diff_module, "MAX_MYERS_COST", 10)
+    a = ["x"] * 50 + ["y"] * 50
+    b = ["y"] * 50 + ["x"] * 50
+
+    result = diff_lines(a, b)
+    assert not result.exact
+    assert apply(result.opcodes, a, b) == b
+    assert "shown as replaced" in "".join(render_html(a, b))
+
+
+def test_large_file_diff_is_fast():
+    """Test a contract size where difflib.HtmlDiff becomes slow"""
+    rng = random.Random(1)
+    a = [f"    function f{i % 500}() external {{ balance += {rng.randint(0, 9)}; }}" for i in range(20000)]
+    b = list(a)
+    for _ in range(500):
+        b[rng.randrange(len(b))] = "    // changed"
+
+    started = time.perf_counter()
+    html = "".join(render_html(a, b))
+    assert time.perf_counter() - started < 10
+    assert "// changed" in html
@@ -0,0 +1,107 @@
+import pytest
+from aiohttp import web
+from src.util.eip1967 import (
+    ADMIN_SLOT,
+    BEACON_IMPLEMENTATION_SELECTOR,
+    BEACON_SLOT,
+    IMPLEMENTATION_SLOT,
+    detect_proxies,
+)
+from src.util.http import HttpClient
+from src.util.rpc import RpcError, rpc_batch
+
+PROXY = "0x" + "1" * 40
+BEACON_PROXY = "0x" + "2" * 40
+PLAIN = "0x" + "3" * 40
+BROKEN = "0x" + "4" * 40
+IMPL = "0x" + "a" * 40
+ADMIN = "0x" + "b" * 40
+BEACON = "0x" + "c" * 40
+BEACON_IMPL = "0x" + "d" * 40
+
+ZERO_WORD = "0x" + "0" * 64
+
+
+def word(address):
+    return "0x" + "0" * 24 + address[2:]
+
+
+@pytest.fixture
+async def node(aiohttp_server):
+    """Stand-in for an EVM node answering batched storage reads and beacon calls"""
+    storage = {
+        (PROXY, IMPLEMENTATION_SLOT): word(IMPL),
+        (PROXY, ADMIN_SLOT): word(ADMIN),
+        (BEACON_PROXY, BEACON_SLOT): word(BEACON),
+    }
+    batches = []
+
+    def answer(call):
+        if call["method"] == "eth_getStorageAt":
+            address, slot, _ = call["params"]
+            if address == BROKEN:
+                return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": "missing trie node"}}
+            return {"jsonrpc": "2.0", "id": call["id"], "result": storage.get((address, slot), ZERO_WORD)}
+        if call["method"] == "eth_call":
+            target, _ = call["params"]
+            assert target == {"to": BEACON, "data": BEACON_IMPLEMENTATION_SELECTOR}
+            return {"jsonrpc": "2.0", "id": call["id"], "result": word(BEACON_IMPL)}
+        return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "method not found"}}
+
+    async def handler(request):
+        payload = await request.json()
+        if not isinstance(payload, list):
+            return web.json_response({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch only"}})
+        batches.append(payload)
+        # Nodes may answer batch entries in any order
+        return web.json_response([answer(call) for call in reversed(payload)])
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = await aiohttp_server(app)
+    server.rpc_url = str(server.make_url("/"))
+    server.batches = batches
+    yield server
+    await HttpClient().close()
+
+
+@pytest.mark.asyncio
+async def test_detect_proxies_reads_slots_in_batches(node):
+    """Test that slots of several contracts are read per request and beacons are resolved"""
+    slots = await detect_proxies(node.rpc_url, [PROXY, BEACON_PROXY, PLAIN], batch_size=2)
+
+    # Two storage batches of 2 and 1 contracts, then one batch of beacon calls
+    assert [len(batch) for batch in node.batches] == [6, 3, 1]
+    assert slots[PROXY].implementation == IMPL
+    assert slots[PROXY].admin == ADMIN
+    assert slots[PROXY].is_proxy
+    assert slots[BEACON_PROXY].beacon == BEACON
+    assert slots[BEACON_PROXY].implementation == BEACON_IMPL
+    assert not slots[PLAIN].is_proxy
+    assert slots[PLAIN].admin is None
+
+
+@pytest.mark.asyncio
+async def test_detect_proxies_leaves_out_failed_reads(node):
+    """Test that contracts whose slots the node could not read are not classified"""
+    slots = await detect_proxies(node.rpc_url, [PLAIN, BROKEN])
+
+    assert list(slots) == [PLAIN]
+    assert len(node.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_rpc_batch_returns_none_for_failed_calls(node):
+    results = await rpc_batch(node.rpc_url, [("eth_getStorageAt", [PROXY, IMPLEMENTATION_SLOT, "latest"]), ("eth_foo", [])])
+
+    assert results == [word(IMPL), None]
+
+
+@pytest.mark.asyncio
+async def test_unreachable_node_classifies_nothing(unused_tcp_port):
+    url = f"http://127.0.0.1:{unused_tcp_port}/"
+    with pytest.raises(RpcError):
+        await rpc_batch(url, [("eth_blockNumber", [])])
+
+    assert await detect_proxies(url, [PROXY]) == {}
+    await HttpClient().close()
@@ -1,8 +1,20 @@
 import json
 import os
 import pytest
-from unittest.mock import patch, Mock
-from src.util.etherscan import fetch_verified_sources, ExplorerType
+from unittest.mock import patch, Mock, PropertyMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.models.chain import BlockTimestamp
+from src.util.block_timestamps import BlockTimestampCache
+from src.util.etherscan import EVMExplorer, fetch_verified_sources, ExplorerType
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    """Keep the source cache and blob store of each test in its own directory"""
+    with patch("src.config.config.Config.data_dir", new_callable=PropertyMock, return_value=str(tmp_path / "data")):
+        yield tmp_path / "data"
 
 
 @pytest.fixture
@@ -88,8 +100,8 @@ async def test_fetch_verified_sources(tmp_path, mock_config, mock_response):
         mock_explorer.logger = Mock()
 
         with patch("src.util.etherscan.EVMExplorer", return_value=mock_explorer):
-            # Mock the aiohttp.ClientSession
-            with patch("aiohttp.ClientSession", return_value=MockClientSession(mock_response)):
+            # Mock the shared HTTP client
+            with patch("src.util.etherscan.HttpClient", return_value=MockClientSession(mock_response)):
                 # Test URL and target path
                 etherscan_url = "https://etherscan.io/address/0x1234567890123456789012345678901234567890"
                 target_path = str(tmp_path / "sources")
@@ -158,7 +170,7 @@ async def test_path_traversal_prevention(tmp_path, mock_config):
         mock_explorer.logger = Mock()
 
         with patch("src.util.etherscan.EVMExplorer", return_value=mock_explorer):
-            with patch("aiohttp.ClientSession", return_value=MockClientSession(malicious_response)):
+            with patch("src.util.etherscan.HttpClient", return_value=MockClientSession(malicious_response)):
                 etherscan_url = "https://etherscan.io/address/0x1234567890123456789012345678901234567890"
 
                 # Call the function
@@ -175,3 +187,130 @@ async def test_path_traversal_prevention(tmp_path, mock_config):
                 # Verify no files were created
                 assert not os.path.exists(os.path.join(target_path, malicious_path))
                 assert len(os.listdir(target_path)) == 0, "No files should be created when path traversal is detected"
+
+
+class FailingClient:
+    def get(self, url):
+        raise AssertionError(f"Unexpected request to {url}")
+
+
+@pytest.mark.asyncio
+async def test_fetch_verified_sources_serves_cached_sources(tmp_path, mock_config, mock_response, data_dir):
+    """Test that an address is downloaded once and linked into other asset directories"""
+    mock_explorer = Mock()
+    mock_explorer.is_supported_explorer.return_value = (True, ExplorerType.ETHERSCAN)
+    mock_explorer.get_api_key.return_value = "dummy_key"
+    mock_explorer.get_api_url.return_value = "https://api.etherscan.io/api"
+    etherscan_url = "https://etherscan.io/address/0x1234567890123456789012345678901234567890"
+    first, second = str(tmp_path / "1" / "sources"), str(tmp_path / "2" / "sources")
+
+    with (
+        patch("src.util.etherscan.Config", return_value=mock_config),
+        patch("src.util.etherscan.EVMExplorer", return_value=mock_explorer),
+    ):
+        with patch("src.util.etherscan.HttpClient", return_value=MockClientSession(mock_response)):
+            assert await fetch_verified_sources(etherscan_url, first) is True
+
+        with patch("src.util.etherscan.HttpClient", return_value=FailingClient()):
+            assert await fetch_verified_sources(etherscan_url, second) is True
+
+        assert sorted(os.listdir(second)) == sorted(os.listdir(first))
+        assert os.stat(os.path.join(second, "Proxy.sol")).st_ino == os.stat(os.path.join(first, "Proxy.sol")).st_ino
+        assert os.path.isdir(data_dir / "sources" / "etherscan" / "0x1234567890123456789012345678901234567890")
+
+        # Bypassing the cache downloads again
+        client = MockClientSession(mock_response)
+        client.get = Mock(wraps=client.get)
+        with patch("src.util.etherscan.HttpClient", return_value=client):
+            assert await fetch_verified_sources(etherscan_url, second, use_cache=False) is True
+        assert client.get.call_count == 1
+
+
+UPGRADE_TOPIC = "0xbc7cd75a20ee27fd9adebab32041f755214dbc6bffa90cc0225b39da2e5c2d3b"
+
+
+def upgrade_log(block_number, implementation, timestamp=None):
+    log = {
+        "topics": [UPGRADE_TOPIC, "0x" + "0" * 24 + implementation[2:]],
+        "blockNumber": hex(block_number),
+        "transactionHash": f"0x{block_number:064x}",
+    }
+    if timestamp is not None:
+        log["timeStamp"] = hex(timestamp)
+    return log
+
+
+class RoutingClient:
+    """Answers getLogs with the given logs and block lookups with block_number * 10"""
+
+    def __init__(self, logs):
+        self.logs = logs
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        if "action=getLogs" in url:
+            return MockResponse({"status": "1", "message": "OK", "result": self.logs})
+        block_number = int(url.split("blockno=")[1].split("&")[0])
+        return MockResponse({"status": "1", "message": "OK", "result": {"timeStamp": str(block_number * 10)}})
+
+
+@pytest.fixture
+def timestamp_cache():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BlockTimestamp.__table__.create(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    BlockTimestampCache.clear_memory()
+    yield BlockTimestampCache(session)
+    BlockTimestampCache.clear_memory()
+    session.close()
+
+
+@pytest.fixture
+def explorer(timestamp_cache):
+    explorer = EVMExplorer()
+    explorer.config = Mock(get=Mock(return_value="dummy_key"))
+    explorer.block_timestamps = timestamp_cache
+    return explorer
+
+
+PROXY_URL = "https://etherscan.io/address/0x1234567890123456789012345678901234567890"
+IMPL_A = "0x" + "a" * 40
+IMPL_B = "0x" + "b" * 40
+
+
+@pytest.mark.asyncio
+async def test_upgrade_events_use_log_timestamps(explorer):
+    """Test that timestamps in getLogs replies are used without block lookups"""
+    client = RoutingClient([upgrade_log(200, IMPL_B, 2_000_123), upgrade_log(100, IMPL_A, 1_000_123)])
+
+    with patch("src.util.etherscan.HttpClient", return_value=client):
+        events = await explorer.get_proxy_upgrade_events(PROXY_URL)
+
+    assert len(client.urls) == 1
+    assert [(e["blockNumber"], e["implementation"], e["timestamp"]) for e in events] == [
+        (100, IMPL_A, "1000123"),
+        (200, IMPL_B, "2000123"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upgrade_events_cache_block_timestamps(explorer, timestamp_cache):
+    """Test that blocks without a log timestamp are looked up once and then served from the cache"""
+    logs = [upgrade_log(100, IMPL_A), upgrade_log(100, IMPL_B), upgrade_log(300, IMPL_A, 3_000_000)]
+    client = RoutingClient(logs)
+
+    with patch("src.util.etherscan.HttpClient", return_value=client):
+        events = await explorer.get_proxy_upgrade_events(PROXY_URL)
+    assert [e["timestamp"] for e in events] == ["1000", "1000", "3000000"]
+    assert sum("getblockreward" in url for url in client.urls) == 1
+
+    # The cache survives a restart through the database
+    BlockTimestampCache.clear_memory()
+    assert timestamp_cache.get_many("etherscan", [100, 300]) == {100: 1000}
+
+    client.urls.clear()
+    with patch("src.util.etherscan.HttpClient", return_value=client):
+        events = await explorer.get_proxy_upgrade_events(PROXY_URL)
+    assert [e["timestamp"] for e in events] == ["1000", "1000", "3000000"]
+    assert len(client.urls) == 1
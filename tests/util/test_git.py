@@ -0,0 +1,143 @@
+import os
+import subprocess
+import pytest
+from src.backend.blob_store import BlobStore
+from src.util.git import GitError, sync_repo
+from src.util.github import sync_github_repo
+
+
+def git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=Legion", "-c", "user.email=legion@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+class RemoteRepo:
+    """A bare repository standing in for GitHub, with a working copy to push commits from"""
+
+    def __init__(self, path):
+        self.work = str(path / "work")
+        self.bare = str(path / "remote.git")
+        self.url = f"file://{self.bare}"
+        git("init", "-q", "--bare", "-b", "main", self.bare, cwd=str(path))
+        git("init", "-q", "-b", "main", self.work, cwd=str(path))
+        git("remote", "add", "origin", self.bare, cwd=self.work)
+
+    def commit(self, files=None, removed=()):
+        for name, content in (files or {}).items():
+            file_path = os.path.join(self.work, name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as f:
+                f.write(content)
+        for name in removed:
+            os.remove(os.path.join(self.work, name))
+        git("add", "-A", cwd=self.work)
+        git("commit", "-q", "-m", "update", cwd=self.work)
+        git("push", "-q", "origin", "main", cwd=self.work)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    return RemoteRepo(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_sync_rewrites_only_changed_files(remote, tmp_path):
+    """Test that an update fetches the new revision and leaves unchanged files alone"""
+    remote.commit({"src/A.sol": "contract A {}\n", "src/B.sol": "contract B {}\n", "src/C.sol": "contract C {}\n"})
+    target = str(tmp_path / "checkout")
+
+    first = await sync_repo(remote.url, target)
+    assert first.cloned
+    assert sorted(first.changed) == ["src/A.sol", "src/B.sol", "src/C.sol"]
+    unchanged_inode = os.stat(os.path.join(target, "src/A.sol")).st_ino
+
+    remote.commit({"src/B.sol": "contract B { uint x; }\n", "src/D.sol": "contract D {}\n"}, removed=["src/C.sol"])
+    second = await sync_repo(remote.url, target)
+
+    assert second.old_commit == first.new_commit
+    assert sorted(second.changed) == ["src/B.sol", "src/D.sol"]
+    assert second.removed == ["src/C.sol"]
+    assert os.stat(os.path.join(target, "src/A.sol")).st_ino == unchanged_inode
+    assert not os.path.exists(os.path.join(target, "src/C.sol"))
+    with open(os.path.join(target, "src/B.sol")) as f:
+        assert f.read() == "contract B { uint x; }\n"
+
+    third = await sync_repo(remote.url, target)
+    assert third.new_commit == second.new_commit
+    assert third.changed == [] and third.removed == []
+
+
+@pytest.mark.asyncio
+async def test_sync_keeps_linked_copies(remote, tmp_path):
+    """Test that files linked into the blob store are not rewritten unless they changed"""
+    remote.commit({"A.sol": "contract A {}\n", "B.sol": "contract B {}\n"})
+    target = str(tmp_path / "checkout")
+    await sync_repo(remote.url, target)
+
+    # Another asset already stored the same file, so the checkout's copy is replaced by a link
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "A.sol").write_text("contract A {}\n")
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    store.add_tree(str(other))
+    digest = store.add_tree(target)["A.sol"]
+    linked_inode = os.stat(store.blob_path(digest)).st_ino
+
+    remote.commit({"B.sol": "contract B { uint x; }\n"})
+    sync = await sync_repo(remote.url, target)
+
+    assert sync.changed == ["B.sol"]
+    assert os.stat(os.path.join(target, "A.sol")).st_ino == linked_inode
+
+
+@pytest.mark.asyncio
+async def test_sync_replaces_extracted_archive(remote, tmp_path):
+    """Test that a directory of files extracted from an archive becomes a checkout"""
+    remote.commit({"A.sol": "contract A {}\n"})
+    target = tmp_path / "checkout"
+    target.mkdir()
+    (target / "org-repo-abc123").mkdir()
+    (target / "org-repo-abc123" / "A.sol").write_text("contract A {}\n")
+
+    sync = await sync_repo(remote.url, str(target))
+
+    assert sync.cloned
+    assert sorted(os.listdir(target)) == [".git", "A.sol"]
+
+
+@pytest.mark.asyncio
+async def test_sync_fails_for_missing_remote(tmp_path):
+    with pytest.raises(GitError):
+        await sync_repo(f"file://{tmp_path}/missing.git", str(tmp_path / "checkout"))
+
+
+@pytest.mark.asyncio
+async def test_sync_github_repo_checks_out_only_sources(remote, tmp_path):
+    """Test that the checkout and the reported paths skip tests, dependencies and non-source files"""
+    remote.commit(
+        {
+            "contracts/Vault.sol": "contract Vault {}\n",
+            "contracts/Vault.t.sol": "contract VaultTest {}\n",
+            "contracts/test/Mock.sol": "contract Mock {}\n",
+            "test/Fork.sol": "contract Fork {}\n",
+            "node_modules/lib/Lib.sol": "contract Lib {}\n",
+            "README.md": "# Vault\n",
+        }
+    )
+    target = str(tmp_path / "checkout")
+
+    first = await sync_github_repo(remote.url, target)
+    assert first.changed == ["contracts/Vault.sol"]
+    assert not os.path.exists(os.path.join(target, "README.md"))
+    assert not os.path.exists(os.path.join(target, "test"))
+
+    remote.commit({"contracts/Vault.sol": "contract Vault { uint x; }\n", "test/Fork.sol": "contract Fork2 {}\n"})
+    second = await sync_github_repo(remote.url, target)
+    assert second.changed == ["contracts/Vault.sol"]
+    assert second.removed == []
+
+    assert await sync_github_repo(f"file://{tmp_path}/missing.git", str(tmp_path / "other")) is None
@@ -0,0 +1,111 @@
+import io
+import os
+import zipfile
+import pytest
+from unittest.mock import patch
+from aiohttp import web
+from src.util.github import fetch_github_repo
+from src.util.http import HttpClient
+
+
+def make_zipball(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        for name, content in files.items():
+            zip_ref.writestr(f"org-repo-abc123/{name}", content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+async def github_api(aiohttp_server):
+    """Stand-in for the GitHub API serving a repository zipball"""
+    archives = {}
+
+    async def zipball(request):
+        body = archives[request.match_info["repo"]]
+        response = web.StreamResponse()
+        await response.prepare(request)
+        # Send in pieces like a large download
+        for start in range(0, len(body), 1024):
+            await response.write(body[start : start + 1024])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/repos/{owner}/{repo}/zipball", zipball)
+    server = await aiohttp_server(app)
+    with patch("src.util.github.GITHUB_API_URL", str(server.make_url("")).rstrip("/")):
+        yield archives
+    await HttpClient().close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_github_repo_extracts_only_sources(github_api, tmp_path):
+    """Test that only source files outside dependency, test and build directories are written"""
+    github_api["repo"] = make_zipball(
+        {
+            "src/Vault.sol": "contract Vault {}",
+            "src/interfaces/IVault.sol": "interface IVault {}",
+            "README.md": "# Repo",
+            "node_modules/@openzeppelin/ERC20.sol": "contract ERC20 {}",
+            "test/Vault.t.sol": "contract VaultTest {}",
+            "src/Vault.t.sol": "contract VaultTest {}",
+            "out/Vault.sol/Vault.json": "{}",
+            "artifacts/Vault.sol": "contract Vault {}",
+        }
+    )
+
+    assert await fetch_github_repo("https://github.com/org/repo", str(tmp_path))
+
+    written = sorted(
+        os.path.relpath(os.path.join(root, name), tmp_path) for root, _, files in os.walk(tmp_path) for name in files
+    )
+    assert written == [
+        os.path.join("org-repo-abc123", "src", "Vault.sol"),
+        os.path.join("org-repo-abc123", "src", "interfaces", "IVault.sol"),
+    ]
+    # The archive itself is never written next to the sources
+    assert not os.path.exists(tmp_path / "repo.zip")
+
+
+@pytest.mark.asyncio
+async def test_fetch_github_repo_aborts_oversized_archive(github_api, tmp_path):
+    """Test that downloads beyond the archive size limit are abandoned"""
+    github_api["big"] = make_zipball({f"src/C{i}.sol": os.urandom(2048).hex() for i in range(10)})
+    limits = {"github.max_archive_size": 4096}
+
+    with patch("src.util.github.Config") as config:
+        config.return_value.get.side_effect = lambda key, default=None: limits.get(key, default)
+        assert not await fetch_github_repo("https://github.com/org/big", str(tmp_path / "big"))
+
+    assert not os.path.exists(tmp_path / "big")
+
+
+@pytest.mark.asyncio
+async def test_fetch_github_repo_skips_large_files(github_api, tmp_path):
+    """Test that oversized files, e.g. generated or flattened sources, are not extracted"""
+    github_api["repo"] = make_zipball({"src/Small.sol": "contract Small {}", "src/Flat.sol": "x" * 10000})
+    limits = {"github.max_file_size": 1000}
+
+    with patch("src.util.github.Config") as config:
+        config.return_value.get.side_effect = lambda key, default=None: limits.get(key, default)
+        assert await fetch_github_repo("https://github.com/org/repo", str(tmp_path))
+
+    assert os.path.exists(tmp_path / "org-repo-abc123" / "src" / "Small.sol")
+    assert not os.path.exists(tmp_path / "org-repo-abc123" / "src" / "Flat.sol")
+
+
+@pytest.mark.asyncio
+async def test_fetch_github_repo_replaces_linked_files(github_api, tmp_path):
+    """Test that extracting over a file shared through the blob store leaves the shared copy intact"""
+    github_api["repo"] = make_zipball({"src/Vault.sol": "contract Vault { uint256 x; }"})
+    blob = tmp_path / "blob"
+    blob.write_text("contract Vault {}")
+    source = tmp_path / "repo" / "org-repo-abc123" / "src" / "Vault.sol"
+    source.parent.mkdir(parents=True)
+    os.link(blob, source)
+
+    assert await fetch_github_repo("https://github.com/org/repo", str(tmp_path / "repo"))
+
+    assert source.read_text() == "contract Vault { uint256 x; }"
+    assert blob.read_text() == "contract Vault {}"
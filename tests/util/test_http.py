@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from aiohttp import web
+from src.util.http import HttpClient
+
+
+@pytest.fixture
+async def http_client():
+    client = HttpClient()
+    client.backoff = 0
+    client._metrics.clear()
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+async def flaky_server(aiohttp_server):
+    """Server that fails the first requests of each path"""
+    calls = {}
+    ports = set()
+
+    async def handler(request):
+        path = request.match_info["path"]
+        calls[path] = calls.get(path, 0) + 1
+        ports.add(request.transport.get_extra_info("peername")[1])
+        failures = int(request.query.get("fail", 0))
+        if calls[path] <= failures:
+            return web.Response(status=int(request.query.get("status", 503)), headers={"Retry-After": "0"})
+        return web.json_response({"path": path, "calls": calls[path]})
+
+    app = web.Application()
+    app.router.add_route("*", "/{path}", handler)
+    server = await aiohttp_server(app)
+    server.calls = calls
+    server.ports = ports
+    return server
+
+
+async def test_retries_until_success(http_client, flaky_server):
+    """Test that retryable statuses are retried and counted"""
+    async with http_client.get(str(flaky_server.make_url("/a?fail=2"))) as response:
+        assert response.status == 200
+        assert (await response.json())["calls"] == 3
+
+    metrics = http_client.get_metrics()[f"{flaky_server.host}:{flaky_server.port}"]
+    assert metrics["requests"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["errors"] == 0
+
+
+async def test_gives_up_after_max_retries(http_client, flaky_server):
+    """Test that the last failed response is returned once retries are used up"""
+    http_client.max_retries = 1
+    try:
+        response = await http_client.get(str(flaky_server.make_url("/b?fail=5&status=429")))
+        assert response.status == 429
+        response.release()
+    finally:
+        http_client.max_retries = 3
+
+    assert flaky_server.calls["b"] == 2
+    assert http_client.get_metrics()[f"{flaky_server.host}:{flaky_server.port}"]["errors"] == 1
+
+
+async def test_non_idempotent_requests_are_not_retried(http_client, flaky_server):
+    """Test that POST requests are sent once"""
+    async with http_client.request("POST", str(flaky_server.make_url("/c?fail=1"))) as response:
+        assert response.status == 503
+    assert flaky_server.calls["c"] == 1
+
+
+async def test_connections_are_reused(http_client, flaky_server):
+    """Test that sequential requests to the same host share a keep-alive connection"""
+    for path in ["d", "e", "f"]:
+        async with http_client.get(str(flaky_server.make_url(f"/{path}"))) as response:
+            await response.read()
+    assert len(flaky_server.ports) == 1
+
+
+async def test_connection_errors_are_retried(http_client, unused_tcp_port):
+    """Test that connection failures are retried and raised when retries are used up"""
+    http_client.max_retries = 2
+    try:
+        with pytest.raises(Exception):
+            await http_client.get(f"http://127.0.0.1:{unused_tcp_port}/")
+    finally:
+        http_client.max_retries = 3
+
+    metrics = http_client.get_metrics()[f"127.0.0.1:{unused_tcp_port}"]
+    assert metrics["requests"] == 3
+    assert metrics["errors"] == 3
+    assert metrics["retries"] == 2
+
+
+def test_session_of_previous_event_loop_is_closed():
+    """Test that switching event loops, e.g. with asyncio.run per command, doesn't leak the old session"""
+    client = HttpClient()
+    first = asyncio.run(client._get_session())
+    second = asyncio.run(client._get_session())
+
+    assert second is not first
+    assert first.closed
+    assert not second.closed
+    asyncio.run(client.close())
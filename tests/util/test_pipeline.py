@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from src.util.pipeline import Pipeline, Stage
+
+
+@pytest.mark.asyncio
+async def test_items_pass_through_all_stages():
+    """Test that every stage sees every item and results are passed on"""
+    seen = []
+
+    async def double(item):
+        return item * 2
+
+    async def collect(item):
+        seen.append(item)
+        return item
+
+    pipeline = Pipeline([Stage("double", double, concurrency=3), Stage("collect", collect)])
+    await pipeline.run(range(10))
+
+    assert sorted(seen) == [i * 2 for i in range(10)]
+    metrics = pipeline.get_metrics()
+    assert metrics["double"]["processed"] == 10
+    assert metrics["collect"]["processed"] == 10
+    assert metrics["double"]["concurrency"] == 3
+
+
+@pytest.mark.asyncio
+async def test_ordered_stage_receives_items_in_order():
+    """Test that an ordered stage gets items in input order even if earlier stages finish out of order"""
+    seen = []
+
+    async def slow_first(item):
+        await asyncio.sleep(0.001 * (10 - item))
+        return item
+
+    async def drop_odd(item):
+        return None if item % 2 else item
+
+    async def collect(item):
+        seen.append(item)
+        return item
+
+    pipeline = Pipeline(
+        [
+            Stage("slow", slow_first, concurrency=10),
+            Stage("drop", drop_odd, concurrency=4),
+            Stage("collect", collect, ordered=True),
+        ]
+    )
+    await pipeline.run(range(10))
+
+    assert seen == [0, 2, 4, 6, 8]
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_dropped_and_counted():
+    """Test that a handler exception drops the item without stopping the pipeline"""
+    seen = []
+
+    async def check(item):
+        if item == 3:
+            raise RuntimeError("boom")
+        return item
+
+    async def collect(item):
+        seen.append(item)
+        return item
+
+    pipeline = Pipeline([Stage("check", check), Stage("collect", collect, ordered=True)])
+    await pipeline.run(range(5))
+
+    assert seen == [0, 1, 2, 4]
+    assert pipeline.get_metrics()["check"]["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_stage_applies_backpressure():
+    """Test that a slow stage blocks producers once its queue is full, while faster stages keep their own pace"""
+    produced = []
+    release = asyncio.Event()
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    async def fast(item):
+        return item
+
+    async def slow(item):
+        await release.wait()
+        return item
+
+    pipeline = Pipeline([Stage("fast", fast, queue_size=2), Stage("slow", slow, queue_size=2)])
+    run = asyncio.create_task(pipeline.run(source()))
+    await asyncio.sleep(0.05)
+
+    # One item in the slow handler, two in its queue, one held by the fast worker and two in the fast queue
+    assert len(produced) < 10
+    release.set()
+    await run
+
+    assert len(produced) == 20
+    metrics = pipeline.get_metrics()
+    assert metrics["slow"]["max_queue_depth"] == 2
+    assert metrics["slow"]["blocked_seconds"] > 0
+
+
+def test_ordered_stage_requires_single_worker():
+    async def handler(item):
+        return item
+
+    with pytest.raises(ValueError):
+        Stage("ordered", handler, concurrency=2, ordered=True)
@@ -0,0 +1,216 @@
+import time
+import pytest
+from unittest.mock import patch
+from src.util.etherscan import ExplorerType, explorer_request
+from src.util.rate_limit import QuotaScheduler, RateLimiter, RateLimitExceeded, TokenBucket
+
+
+@pytest.fixture
+def limiter():
+    RateLimiter._instance = None
+    yield RateLimiter()
+    RateLimiter._instance = None
+
+
+class MockResponse:
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class MockHttpClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        return MockResponse(self.replies.pop(0))
+
+
+@pytest.mark.asyncio
+async def test_bucket_paces_calls():
+    """Test that calls beyond the burst wait for tokens"""
+    bucket = TokenBucket(rate=50, burst=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two calls go out at once, the other four wait 20ms each
+    assert elapsed >= 0.07
+    stats = bucket.to_dict()
+    assert stats["requests"] == 6
+    assert stats["throttled"] == 0
+    assert 0.9 <= stats["utilization"] <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_bucket_pause_delays_next_call():
+    bucket = TokenBucket(rate=1000, burst=5)
+    await bucket.acquire()
+
+    bucket.pause(0.1)
+    start = time.monotonic()
+    await bucket.acquire()
+
+    assert time.monotonic() - start >= 0.09
+    assert bucket.to_dict()["throttled"] == 1
+
+
+def test_limiter_buckets_by_api_and_key(limiter):
+    with patch(
+        "src.config.config.Config.get", side_effect=lambda key, default=None: 2 if key.endswith("rate_limit") else default
+    ):
+        first = limiter.get_bucket("etherscan", "key-1")
+        assert limiter.get_bucket("etherscan", "key-1") is first
+        assert limiter.get_bucket("etherscan", "key-2") is not first
+        assert limiter.get_bucket("basescan", "key-1") is not first
+    assert first.rate == 2
+    assert first.burst == 1
+    # Keys are numbered per API rather than shown
+    assert list(limiter.get_stats()) == ["basescan (key 1)", "etherscan (key 1)", "etherscan (key 2)"]
+
+
+def test_limiter_splits_rate_among_workers(limiter):
+    """Test that in distributed mode each worker process gets its share of a key's rate limit"""
+    config = {"block_explorers.etherscan.rate_limit": 6, "block_explorers.etherscan.burst": 4}
+    config.update({"jobs.distributed": True, "jobs.workers": 3})
+    with patch("src.config.config.Config.get", side_effect=lambda key, default=None: config.get(key, default)):
+        bucket = limiter.get_bucket("etherscan", "key-1")
+    assert bucket.rate == 2
+    assert bucket.burst == 1
+
+
+@pytest.mark.asyncio
+async def test_explorer_request_retries_rate_limited_calls(limiter):
+    """Test that a rate-limit reply pauses the key's bucket and the call is retried"""
+    client = MockHttpClient(
+        [
+            {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"},
+            {"status": "1", "message": "OK", "result": []},
+        ]
+    )
+
+    with patch("src.util.etherscan.HttpClient", return_value=client), patch("src.util.etherscan.RATE_LIMIT_BACKOFF", 0.01):
+        data = await explorer_request(ExplorerType.ETHERSCAN, "key-1234", "https://api.etherscan.io/api?module=logs")
+
+    assert data["status"] == "1"
+    assert len(client.urls) == 2
+    stats = limiter.get_stats()
+    assert stats["etherscan (key 1)"]["requests"] == 2
+    assert stats["etherscan (key 1)"]["throttled"] == 1
+    assert not any("1234" in name for name in stats)
+
+
+@pytest.mark.asyncio
+async def test_explorer_request_gives_up_after_retries(limiter):
+    reply = {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+    client = MockHttpClient([reply] * 3)
+
+    with (
+        patch("src.util.etherscan.HttpClient", return_value=client),
+        patch("src.util.etherscan.RATE_LIMIT_BACKOFF", 0.001),
+        patch("src.util.etherscan.RATE_LIMIT_RETRIES", 2),
+    ):
+        data = await explorer_request(ExplorerType.ETHERSCAN, "key", "https://api.etherscan.io/api")
+
+    assert data == reply
+    assert len(client.urls) == 3
+
+
+def quota_headers(remaining, reset_in):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(time.time() + reset_in)}
+
+
+@pytest.mark.asyncio
+async def test_quota_scheduler_spreads_requests_over_window():
+    """Test that the remaining quota is handed out evenly until the window resets"""
+    scheduler = QuotaScheduler(reserve=2)
+    # 10 usable requests over 0.5s, one every 50ms
+    scheduler.update(quota_headers(12, 0.5))
+
+    start = time.monotonic()
+    for _ in range(4):
+        await scheduler.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.13 <= elapsed < 0.4
+    assert scheduler.remaining == 8
+    assert scheduler.to_dict()["requests"] == 4
+
+
+@pytest.mark.asyncio
+async def test_quota_scheduler_allows_bursts_and_defers_late_slots():
+    scheduler = QuotaScheduler(max_wait=0.5, burst=3)
+    # One request every 100ms
+    scheduler.update(quota_headers(100, 10))
+
+    start = time.monotonic()
+    for _ in range(3):
+        await scheduler.acquire()
+    assert time.monotonic() - start < 0.05
+
+    # The next slot is 100ms out
+    scheduler.max_wait = 0.05
+    with pytest.raises(RateLimitExceeded):
+        await scheduler.acquire()
+    scheduler.max_wait = 0.5
+    await scheduler.acquire()
+    assert time.monotonic() - start >= 0.08
+    assert scheduler.to_dict()["deferred"] == 1
+    assert scheduler.remaining == 96
+
+
+def test_quota_scheduler_keeps_lowest_count_of_window():
+    scheduler = QuotaScheduler()
+    headers = quota_headers(5, 60)
+    scheduler.update(headers)
+    scheduler.update({**headers, "X-RateLimit-Remaining": "7"})
+
+    assert scheduler.remaining == 5
+
+
+@pytest.mark.asyncio
+async def test_quota_scheduler_waits_for_close_reset():
+    scheduler = QuotaScheduler(reserve=5, max_wait=1)
+    scheduler.update(quota_headers(5, 0.1))
+
+    start = time.monotonic()
+    await scheduler.acquire()
+
+    assert time.monotonic() - start >= 0.09
+    # The new window is learned from the next response
+    assert scheduler.remaining is None
+
+
+@pytest.mark.asyncio
+async def test_quota_scheduler_refuses_when_reset_is_far():
+    scheduler = QuotaScheduler(max_wait=1)
+    scheduler.update(quota_headers(0, 3600))
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await scheduler.acquire()
+    assert exc_info.value.reset_at == scheduler.reset_at
+
+    scheduler.exhaust(retry_after=0.01)
+    time.sleep(0.02)
+    await scheduler.acquire()
+
+
+def test_quota_scheduler_ignores_responses_without_quota():
+    scheduler = QuotaScheduler()
+    scheduler.update({})
+    scheduler.update({"X-RateLimit-Remaining": "many", "X-RateLimit-Reset": "soon"})
+
+    assert scheduler.remaining is None
+    assert scheduler.to_dict()["resets_in"] is None
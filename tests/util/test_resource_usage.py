@@ -0,0 +1,103 @@
+import pytest
+import asyncio
+import aiohttp
+from aiohttp import web
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from src.util.resource_usage import (
+    ResourceUsage,
+    current_usage,
+    http_trace_config,
+    instrument_engine,
+    record_llm_usage,
+    track_usage,
+)
+
+
+@pytest.mark.asyncio
+async def test_usage_is_attributed_to_child_tasks_and_threads():
+    """Test that tasks and threads started by a job share its collector"""
+    usage = ResourceUsage()
+
+    def in_thread():
+        current_usage().add_db_query(0.5)
+
+    async def in_task():
+        current_usage().add_http_request()
+
+    with track_usage(usage):
+        await asyncio.gather(asyncio.create_task(in_task()), asyncio.to_thread(in_thread))
+
+    assert current_usage() is None
+    assert usage.http_requests == 1
+    assert usage.db_queries == 1
+    assert usage.db_time == 0.5
+    assert usage.wall_time > 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs_have_separate_collectors():
+    """Test that concurrently running jobs do not share counters"""
+
+    async def job(usage: ResourceUsage, requests: int):
+        with track_usage(usage):
+            for _ in range(requests):
+                await asyncio.sleep(0)
+                current_usage().add_http_request()
+
+    first, second = ResourceUsage(), ResourceUsage()
+    await asyncio.gather(job(first, 3), job(second, 5))
+
+    assert first.http_requests == 3
+    assert second.http_requests == 5
+
+
+def test_db_queries_are_counted():
+    """Test that queries on an instrumented engine are counted for the active job only"""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    usage = ResourceUsage()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with track_usage(usage):
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    assert usage.db_queries == 2
+    assert usage.db_time >= 0
+
+
+def test_llm_tokens_are_recorded():
+    """Test that token usage of a chat completion response is recorded"""
+    usage = ResourceUsage()
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20))
+
+    record_llm_usage(response)  # No active job, nothing to record
+    with track_usage(usage):
+        record_llm_usage(response)
+
+    assert usage.llm_prompt_tokens == 100
+    assert usage.llm_completion_tokens == 20
+    assert usage.to_dict()["llm_completion_tokens"] == 20
+
+
+async def test_http_requests_and_bytes_are_counted(aiohttp_server):
+    """Test that the trace config counts requests and response bytes"""
+
+    async def handler(request):
+        return web.Response(body=b"x" * 1000)
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = await aiohttp_server(app)
+
+    usage = ResourceUsage()
+    with track_usage(usage):
+        async with aiohttp.ClientSession(trace_configs=[http_trace_config()]) as session:
+            for _ in range(2):
+                async with session.get(server.make_url("/")) as response:
+                    await response.read()
+
+    assert usage.http_requests == 2
+    assert usage.http_bytes == 2000
@@ -0,0 +1,111 @@
+"""Compare the diff engine used for update notifications with difflib.HtmlDiff
+
+Usage:
+    python tools/benchmark_diff.py                          # Synthetic contract with scattered edits
+    python tools/benchmark_diff.py OLD.sol NEW.sol [...]    # Pairs of files
+    python tools/benchmark_diff.py --git REPO PATH [-n 10]  # Consecutive revisions of a file in a git clone
+
+Run from the repository root.
+"""
+
+import argparse
+import difflib
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.util.diff import render_html  # noqa: E402
+
+
+def synthetic_revisions(functions: int = 2000, edits: int = 200, seed: int = 1):
+    """A large contract of similar functions and a revision with scattered edits"""
+    rng = random.Random(seed)
+    old = ["// SPDX-License-Identifier: MIT", "pragma solidity ^0.8.20;", "", "contract Large {"]
+    for i in range(functions):
+        old += [
+            f"    function f{i}(uint256 amount) external returns (uint256) {{",
+            "        require(amount > 0);",
+            "        balance += amount;",
+            "        return balance;",
+            "    }",
+            "",
+        ]
+    old.append("}")
+    new = list(old)
+    for _ in range(edits):
+        position = rng.randrange(4, len(new) - 1)
+        choice = rng.random()
+        if choice < 0.4:
+            new.insert(position, "        emit Updated(amount);")
+        elif choice < 0.7:
+            del new[position]
+        else:
+            new[position] = "        balance -= fee(amount);"
+    return [("synthetic", old, new)]
+
+
+def file_pairs(paths):
+    if len(paths) % 2:
+        raise SystemExit("Expected pairs of old and new files")
+    pairs = []
+    for old_path, new_path in zip(paths[::2], paths[1::2]):
+        with open(old_path, errors="replace") as old, open(new_path, errors="replace") as new:
+            pairs.append((f"{old_path} -> {new_path}", old.read().splitlines(), new.read().splitlines()))
+    return pairs
+
+
+def git_revisions(repo: str, path: str, count: int):
+    """Consecutive revisions of a file, e.g. a contract in a full clone of its repository"""
+
+    def git(*args):
+        return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True, text=True).stdout
+
+    commits = git("log", f"-{count + 1}", "--format=%H", "--", path).split()
+    pairs = []
+    for new_commit, old_commit in zip(commits, commits[1:]):
+        try:
+            old = git("show", f"{old_commit}:{path}").splitlines()
+            new = git("show", f"{new_commit}:{path}").splitlines()
+        except subprocess.CalledProcessError:
+            continue  # Renamed or added in this commit
+        pairs.append((f"{path}@{new_commit[:8]}", old, new))
+    return pairs
+
+
+def measure(render):
+    started = time.perf_counter()
+    output = render()
+    return time.perf_counter() - started, len(output.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Pairs of old and new files")
+    parser.add_argument("--git", nargs=2, metavar=("REPO", "PATH"), help="File in a git clone to take revisions from")
+    parser.add_argument("-n", type=int, default=10, help="Number of git revisions")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Time limit of the diff engine")
+    args = parser.parse_args()
+
+    if args.git:
+        pairs = git_revisions(args.git[0], args.git[1], args.n)
+    elif args.files:
+        pairs = file_pairs(args.files)
+    else:
+        pairs = synthetic_revisions()
+
+    print(f"{'revision':<40} {'lines':>13} {'difflib s':>10} {'difflib KB':>11} {'engine s':>9} {'engine KB':>10}")
+    for name, old, new in pairs:
+        difflib_time, difflib_size = measure(lambda: difflib.HtmlDiff().make_file(old, new, context=True))
+        engine_time, engine_size = measure(lambda: "".join(render_html(old, new, timeout=args.timeout)))
+        print(
+            f"{name[-40:]:<40} {len(old):>6}/{len(new):<6} {difflib_time:>10.3f} {difflib_size / 1024:>11.1f} "
+            f"{engine_time:>9.3f} {engine_size / 1024:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()